@@ -22,12 +22,17 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 import psycopg2
+import psycopg2.pool
 from dotenv import load_dotenv
 import os
 from datetime import datetime
 import anthropic
+from dashboard.sql_guard import MAX_ROWS, UnsafeQueryError, check_readonly_role, run_guarded_query
+from src.analytics.insights import cards, compact_table, compute_insights, digest, format_volume
 import json
 import re
+import threading
+from contextlib import contextmanager
 
 # ============================================================================
 # CONFIGURATION & CACHE
@@ -113,47 +118,190 @@ st.markdown("""
 # DATABASE FUNCTIONS
 # ============================================================================
 
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '1'))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+
+class SharedConnectionPool:
+    """
+    Pool thread-safe partagé entre toutes les sessions Streamlit.
+    Les connexions sont empruntées puis rendues, jamais fermées par l'appelant.
+    Au-delà de DB_POOL_MAX, les sessions attendent une connexion libre
+    au lieu de recevoir PoolError.
+    """
+
+    def __init__(self, minconn, maxconn, readonly=False, **db_config):
+        self._pool = psycopg2.pool.ThreadedConnectionPool(minconn, maxconn, **db_config)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._readonly = readonly
+
+    @contextmanager
+    def connection(self):
+        """Emprunte une connexion (autocommit, lecture seule côté appli)"""
+        if not self._slots.acquire(timeout=DB_POOL_TIMEOUT):
+            raise TimeoutError(f"Aucune connexion libre après {DB_POOL_TIMEOUT:.0f}s")
+        conn = None
+        broken = False
+        try:
+            conn = self._pool.getconn()
+            if not conn.autocommit or bool(conn.readonly) != self._readonly:
+                conn.set_session(readonly=self._readonly, autocommit=True)
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # Connexion morte (redémarrage BD, timeout réseau): ne pas la recycler
+            broken = True
+            raise
+        finally:
+            if conn is not None:
+                self._pool.putconn(conn, close=broken or bool(conn.closed))
+            self._slots.release()
+
+    def close(self):
+        """Ferme toutes les connexions du pool"""
+        self._pool.closeall()
+
+@st.cache_resource
+def get_db_pool():
+    """Crée le pool PostgreSQL (une seule instance par process)"""
+    return SharedConnectionPool(
+        DB_POOL_MIN, DB_POOL_MAX,
+        host=os.getenv('DB_HOST', 'localhost'),
+        database=os.getenv('DB_NAME', 'ports_dashboard'),
+        user=os.getenv('DB_USER', 'postgres'),
+        password=os.getenv('DB_PASSWORD', 'postgres'),
+        port=os.getenv('DB_PORT', '5432')
+    )
+
 @st.cache_resource
-def get_db_connection():
-    """Crée connexion PostgreSQL"""
+def get_readonly_db_pool():
+    """
+    Pool séparé, lecture seule, pour le SQL généré par Claude.
+    Petite taille: le chat ne peut pas épuiser les connexions du dashboard.
+    Rôle dédié obligatoire (DB_READONLY_USER, SELECT sur public_marts seulement,
+    cf. migrations/009_dashboard_readonly_role.sql): pas de repli sur DB_USER,
+    superutilisateur refusé.
+    """
+    user = os.getenv('DB_READONLY_USER')
+    if not user:
+        raise UnsafeQueryError("DB_READONLY_USER non configuré: rôle lecture seule dédié requis")
+    pool = SharedConnectionPool(
+        1, int(os.getenv('DB_READONLY_POOL_MAX', '3')),
+        readonly=True,
+        host=os.getenv('DB_HOST', 'localhost'),
+        database=os.getenv('DB_NAME', 'ports_dashboard'),
+        user=user,
+        password=os.getenv('DB_READONLY_PASSWORD', ''),
+        port=os.getenv('DB_PORT', '5432')
+    )
     try:
-        conn = psycopg2.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            database=os.getenv('DB_NAME', 'ports_dashboard'),
-            user=os.getenv('DB_USER', 'postgres'),
-            password=os.getenv('DB_PASSWORD', 'postgres'),
-            port=os.getenv('DB_PORT', '5432')
-        )
-        return conn
-    except Exception as e:
-        st.error(f"❌ Erreur BD: {str(e)[:100]}")
-        return None
+        with pool.connection() as conn:
+            check_readonly_role(conn)
+    except Exception:
+        pool.close()
+        raise
+    return pool
+
+def run_query(query, params=None) -> pd.DataFrame:
+    """Exécute une requête via le pool et retourne un DataFrame"""
+    with get_db_pool().connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(query, params)
+            columns = [col[0] for col in cursor.description]
+            rows = cursor.fetchall()
+    # coerce_float: NUMERIC (Decimal) -> float, comme pd.read_sql
+    return pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
 
-@st.cache_data(ttl=3600)
-def load_data(query):
-    """Charge données avec cache 1h"""
+# ============================================================================
+# SNAPSHOT DES MARTS (CACHE PAR VERSION DE DONNÉES)
+# ============================================================================
+
+# Fréquence max de vérification de la version (pas de requête BD entre deux)
+DATA_VERSION_TTL = int(os.getenv('DATA_VERSION_TTL', '60'))
+
+MART_SNAPSHOT_QUERY = """
+    SELECT
+        (SELECT json_agg(t) FROM (
+            SELECT port_code, port_name, year, total_tonnage_mt, total_teus
+            FROM public_marts.mart_port_annual_summary
+            ORDER BY port_code, year
+        ) t) AS annual,
+        (SELECT json_agg(t) FROM (
+            SELECT port_code, port_name, year,
+                   total_tonnage_mt, tonnage_market_share_pct,
+                   total_teus, teu_market_share_pct, tonnage_rank
+            FROM public_marts.mart_port_comparison
+            ORDER BY tonnage_rank
+        ) t) AS comparison,
+        (SELECT json_agg(t) FROM (
+            SELECT port_code, year, total_tonnage_mt, tonnage_yoy_pct
+            FROM public_marts.mart_port_trends
+            ORDER BY port_code, year
+        ) t) AS trends,
+        (SELECT json_agg(t) FROM (
+            SELECT port_code, year, tonnage_coverage_pct, quality_level
+            FROM public_marts.mart_data_quality
+            ORDER BY port_code, year
+        ) t) AS quality
+"""
+
+MART_SNAPSHOT_COLUMNS = {
+    'annual': ['port_code', 'port_name', 'year', 'total_tonnage_mt', 'total_teus'],
+    'comparison': ['port_code', 'port_name', 'year', 'total_tonnage_mt', 'tonnage_market_share_pct',
+                   'total_teus', 'teu_market_share_pct', 'tonnage_rank'],
+    'trends': ['port_code', 'year', 'total_tonnage_mt', 'tonnage_yoy_pct'],
+    'quality': ['port_code', 'year', 'tonnage_coverage_pct', 'quality_level'],
+}
+
+@st.cache_data(ttl=DATA_VERSION_TTL, show_spinner=False)
+def get_data_version() -> str:
+    """
+    Jeton de version des données: change quand dbt reconstruit les marts
+    (created_at) ou quand le loader enregistre un nouveau chargement.
+    """
+    version_df = run_query("""
+        SELECT
+            (SELECT max(created_at) FROM public_marts.mart_port_annual_summary)::text
+            || '|' ||
+            (SELECT coalesce(max(load_id), 0) FROM public.etl_load_history)::text
+            AS data_version
+    """)
+    return str(version_df.iloc[0, 0])
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def load_mart_snapshot(data_version: str) -> dict:
+    """Charge les 4 marts en un seul aller-retour BD (cache par version)"""
+    snapshot_df = run_query(MART_SNAPSHOT_QUERY)
+    row = snapshot_df.iloc[0]
+    return {
+        name: pd.DataFrame(row[name] or [], columns=columns)
+        for name, columns in MART_SNAPSHOT_COLUMNS.items()
+    }
+
+def get_mart_snapshot() -> dict:
+    """Snapshot courant des marts; DataFrames vides si la BD est indisponible"""
     try:
-        conn = get_db_connection()
-        if conn:
-            df = pd.read_sql(query, conn)
-            conn.close()
-            return df
-        return pd.DataFrame()
+        return load_mart_snapshot(get_data_version())
     except Exception as e:
         st.warning(f"⚠️ Erreur requête: {str(e)[:100]}")
-        return pd.DataFrame()
+        return {name: pd.DataFrame(columns=columns) for name, columns in MART_SNAPSHOT_COLUMNS.items()}
 
-def execute_query(query):
-    """Exécute requête et retourne résultats"""
-    try:
-        conn = get_db_connection()
-        if conn:
-            df = pd.read_sql(query, conn)
-            conn.close()
-            return df
-        return pd.DataFrame()
-    except Exception as e:
-        return pd.DataFrame()
+@st.cache_data(max_entries=2, show_spinner=False)
+def load_snapshot_digest(data_version: str) -> str:
+    """Synthèse précalculée du snapshot (leaders, variations, anomalies...) pour les prompts"""
+    snapshot = load_mart_snapshot(data_version)
+    return digest(compute_insights(snapshot['annual'], snapshot['quality']))
+
+def execute_guarded_query(query) -> pd.DataFrame:
+    """
+    Exécute du SQL généré (non fiable) via sql_guard: SELECT sur public_marts
+    uniquement, coût EXPLAIN plafonné, statement_timeout, plafond de lignes.
+    Lève UnsafeQueryError si la requête est refusée.
+    """
+    with get_readonly_db_pool().connection() as conn:
+        columns, rows, truncated = run_guarded_query(conn, query)
+    result_df = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+    result_df.attrs['truncated'] = truncated
+    return result_df
 
 # ============================================================================
 # GROQ/CLAUDE API FUNCTIONS
@@ -168,6 +316,7 @@ def generate_sql_query(question: str, context: str) -> str:
     """
     Claude génère une requête SQL basée sur la question
     Utilise function calling pour générer du SQL sûr
+    Lève une exception en cas d'échec (jamais mis en cache)
     """
     client = init_claude_client()
     
@@ -180,6 +329,7 @@ def generate_sql_query(question: str, context: str) -> str:
       * public_marts.mart_port_comparison (port_code, port_name, year, total_tonnage_mt, tonnage_market_share_pct, total_teus, teu_market_share_pct)
       * public_marts.mart_port_trends (port_code, port_name, year, total_tonnage_mt, tonnage_yoy_pct, total_teus)
       * public_marts.mart_data_quality (port_code, port_name, year, tonnage_coverage_pct, quality_level)
+      * public_marts.mart_port_forecast (port_code, port_name, metric, year, forecast, lower_bound, upper_bound, method)
     
     - Ports disponibles: ABIDJAN, LOME, PAC, TEMA
     - Années: 2020-2024
@@ -191,26 +341,25 @@ def generate_sql_query(question: str, context: str) -> str:
     La requête doit être robuste et inclure ORDER BY si approprié.
     """
     
-    try:
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=500,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-        
-        sql_text = message.content[0].text.strip()
-        # Nettoie si Claude ajoute des backticks
-        sql_text = sql_text.replace("```sql", "").replace("```", "").strip()
-        return sql_text
-    except Exception as e:
-        st.error(f"❌ Erreur génération SQL: {str(e)[:100]}")
-        return ""
+    message = client.messages.create(
+        model="claude-sonnet-4-20250514",
+        max_tokens=500,
+        messages=[
+            {"role": "user", "content": prompt}
+        ]
+    )
+    
+    sql_text = message.content[0].text.strip()
+    # Nettoie si Claude ajoute des backticks
+    sql_text = sql_text.replace("```sql", "").replace("```", "").strip()
+    if not sql_text:
+        raise ValueError("Requête SQL vide")
+    return sql_text
 
 def get_claude_insights(question: str, data_context: str) -> str:
     """
     Claude analyse les données et génère insights avec contexte business
+    Lève une exception en cas d'échec (jamais mis en cache)
     """
     client = init_claude_client()
     
@@ -242,17 +391,14 @@ def get_claude_insights(question: str, data_context: str) -> str:
     Format: Utilise **gras** pour les points clés et emojis pour clarté.
     """
     
-    try:
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=800,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return message.content[0].text
-    except Exception as e:
-        return f"⚠️ Erreur analyse: {str(e)[:100]}"
+    message = client.messages.create(
+        model="claude-sonnet-4-20250514",
+        max_tokens=800,
+        messages=[
+            {"role": "user", "content": prompt}
+        ]
+    )
+    return message.content[0].text
 
 def generate_chart_data(df: pd.DataFrame, chart_type: str) -> go.Figure | None:
     """
@@ -284,6 +430,33 @@ def generate_chart_data(df: pd.DataFrame, chart_type: str) -> go.Figure | None:
             )
             fig.update_layout(showlegend=False)
         
+        elif chart_type == "line_ports":
+            # Une courbe par port
+            fig = px.line(
+                df,
+                x='year',
+                y=df.columns[1],
+                color=df.columns[0],
+                markers=True,
+                title=f"Évolution par port: {df.columns[1]}"
+            )
+        
+        elif chart_type == "forecast":
+            # Projections: barre + intervalle de prévision, un panneau par indicateur
+            forecast_df = df.astype({'forecast': float, 'lower_bound': float, 'upper_bound': float})
+            fig = px.bar(
+                forecast_df,
+                x='port_code',
+                y='forecast',
+                color='port_code',
+                facet_col='metric',
+                error_y=forecast_df['upper_bound'] - forecast_df['forecast'],
+                error_y_minus=forecast_df['forecast'] - forecast_df['lower_bound'],
+                title=f"Projections {forecast_df['year'].max()} (intervalle 95%)"
+            )
+            fig.update_yaxes(matches=None, showticklabels=True)
+            fig.update_layout(showlegend=False)
+        
         elif chart_type == "heatmap":
             # Heatmap
             if len(df.columns) >= 2:
@@ -361,17 +534,159 @@ PREDEFINED_QUESTIONS = {
         """,
         "chart_type": "bar_comparison"
     },
-    "🔮 Projections 2025 pour tous les ports": {
+    "🔮 Projections de l'année prochaine pour tous les ports": {
+        "sql": """
+            SELECT port_code, year, forecast, lower_bound, upper_bound,
+                   metric, method, n_points, last_year, slope
+            FROM public_marts.mart_port_forecast
+            WHERE year = (SELECT MIN(year) FROM public_marts.mart_port_forecast)
+            ORDER BY metric DESC, forecast DESC
+        """,
+        "chart_type": "forecast",
+        "local_insight": "forecast"
+    },
+    "📌 Faits marquants de la dernière année": {
         "sql": """
-            SELECT port_code, year, total_tonnage_mt
+            SELECT port_code, total_tonnage_mt, year, total_teus
             FROM public_marts.mart_port_annual_summary
-            WHERE year >= 2022
+            WHERE year >= (SELECT MAX(year) - 4 FROM public_marts.mart_port_annual_summary)
             ORDER BY port_code, year
         """,
-        "chart_type": "line_time"
+        "chart_type": "line_ports",
+        "local_insight": "highlights"
     }
 }
 
+# ============================================================================
+# RÉPONSES LOCALES (SANS APPEL LLM)
+# ============================================================================
+
+FORECAST_METRIC_LABELS = {'tonnage_mt': ('📦 Tonnage', 't'), 'teus': ('🚢 Conteneurs', 'TEU')}
+FORECAST_METHOD_LABELS = {
+    'linear_ols': 'tendance linéaire',
+    'linear_2pts': 'tendance sur 2 points, sans intervalle',
+    'naive': 'dernière valeur reconduite',
+}
+
+def forecast_insight(result_df: pd.DataFrame) -> str:
+    """Résumé déterministe des projections précalculées (mart_port_forecast)"""
+    if result_df.empty:
+        return "⚠️ Aucune projection disponible: relancer le chargement (agg_port_forecast)."
+    
+    lines = [f"**🔮 Projections {result_df['year'].max()}** (précalculées après chargement, intervalle de prévision 95%)"]
+    for metric, group in result_df.groupby('metric', sort=False):
+        label, unit = FORECAST_METRIC_LABELS.get(metric, (metric, ''))
+        lines.append(f"\n{label}:")
+        for row in group.itertuples(index=False):
+            interval = ""
+            if pd.notna(row.lower_bound) and pd.notna(row.upper_bound):
+                interval = f" [{format_volume(float(row.lower_bound))} – {format_volume(float(row.upper_bound))}]"
+            trend = f", {'+' if row.slope >= 0 else ''}{format_volume(float(row.slope))} {unit}/an" if pd.notna(row.slope) else ""
+            lines.append(
+                f"- **{row.port_code}**: {format_volume(float(row.forecast))} {unit}{interval}"
+                f" — {FORECAST_METHOD_LABELS.get(row.method, row.method)}"
+                f" ({row.n_points} an(s) jusqu'à {row.last_year}{trend})"
+            )
+    return "\n".join(lines)
+
+def highlights_insight(result_df: pd.DataFrame) -> str:
+    """Faits marquants calculés localement (src/analytics/insights.py)"""
+    insights = compute_insights(result_df)
+    if insights['year'] is None:
+        return "⚠️ Aucune donnée disponible."
+    return f"**📌 Faits marquants {insights['year']}**\n\n" + "\n".join(
+        f"- {sentence}" for sentence in cards(insights, limit=6)
+    )
+
+LOCAL_INSIGHTS = {
+    'forecast': forecast_insight,
+    'highlights': highlights_insight,
+}
+
+# ============================================================================
+# CACHE CHAT (3 NIVEAUX)
+# ============================================================================
+# 1. Questions prédéfinies → SQL fourni, aucun appel LLM pour le SQL
+#    (local_insight: réponse calculée localement, aucun appel LLM du tout)
+# 2. SQL généré → mémoïsé par question normalisée
+# 3. Résultats + insights → mémoïsés par version des données
+
+def normalize_question(question: str) -> str:
+    """Clé de cache: casse, espaces multiples et ponctuation finale ignorés"""
+    return re.sub(r'\s+', ' ', question).strip().rstrip(' ?!.').lower()
+
+PREDEFINED_BY_NORMALIZED = {
+    normalize_question(question): spec for question, spec in PREDEFINED_QUESTIONS.items()
+}
+
+@st.cache_data(max_entries=500, show_spinner=False)
+def cached_generate_sql(normalized_question: str) -> str:
+    """SQL généré par Claude, une fois par question normalisée"""
+    return generate_sql_query(normalized_question, "")
+
+@st.cache_data(max_entries=200, show_spinner=False)
+def cached_query_result(sql_query: str, data_version: str, trusted: bool) -> pd.DataFrame:
+    """
+    Résultat d'une requête, valable tant que les données ne changent pas.
+    Seul le SQL prédéfini (trusted) contourne le garde-fou.
+    """
+    if trusted:
+        return run_query(sql_query)
+    return execute_guarded_query(sql_query)
+
+@st.cache_data(max_entries=200, show_spinner=False)
+def cached_insights(normalized_question: str, result_text: str, data_version: str) -> str:
+    """
+    Analyse Claude d'un résultat, valable tant que les données ne changent pas.
+    Contexte envoyé: synthèse précalculée du snapshot + résultat en CSV compact
+    (plus de df.to_string() aligné par espaces).
+    """
+    data_context = f"SYNTHÈSE PRÉCALCULÉE:\n{load_snapshot_digest(data_version)}\n\nRÉSULTAT (CSV):\n{result_text}"
+    return get_claude_insights(normalized_question, data_context)
+
+def answer_question(question: str) -> dict:
+    """Construit la réponse assistant (texte + graphique) via le cache 3 niveaux"""
+    normalized = normalize_question(question)
+    predefined = PREDEFINED_BY_NORMALIZED.get(normalized)
+    
+    try:
+        data_version = get_data_version()
+        if predefined:
+            sql_query, chart_type = predefined["sql"], predefined["chart_type"]
+        else:
+            sql_query, chart_type = cached_generate_sql(normalized), "line_time"
+        
+        result_df = cached_query_result(sql_query, data_version, trusted=predefined is not None)
+        if predefined and predefined.get("local_insight"):
+            # Réponse calculée localement: instantanée, déterministe, sans LLM
+            insight = LOCAL_INSIGHTS[predefined["local_insight"]](result_df)
+        else:
+            insight = cached_insights(normalized, compact_table(result_df), data_version)
+    except UnsafeQueryError as e:
+        return {"role": "assistant", "content": f"🛡️ Requête refusée: {e}", "chart": None}
+    except Exception as e:
+        return {"role": "assistant", "content": f"⚠️ Erreur analyse: {str(e)[:100]}", "chart": None}
+    
+    # Génère graphique si données
+    chart = None
+    if not result_df.empty and len(result_df.columns) >= 2:
+        chart = generate_chart_data(result_df, chart_type)
+    
+    if result_df.attrs.get('truncated'):
+        insight += f"\n\n_Résultat limité aux {MAX_ROWS} premières lignes._"
+    
+    return {"role": "assistant", "content": insight, "chart": chart}
+
+def handle_question(question: str):
+    """Ajoute question + réponse à l'historique puis relance le script"""
+    st.session_state.chat_history.append({
+        "role": "user",
+        "content": question
+    })
+    with st.spinner("🔄 Claude analyse votre question..."):
+        st.session_state.chat_history.append(answer_question(question))
+    st.rerun()
+
 # ============================================================================
 # SESSION STATE
 # ============================================================================
@@ -379,6 +694,9 @@ PREDEFINED_QUESTIONS = {
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
 
+if "last_question" not in st.session_state:
+    st.session_state.last_question = None
+
 # ============================================================================
 # MAIN APP
 # ============================================================================
@@ -396,6 +714,9 @@ st.markdown("""
 # TABS
 # ============================================================================
 
+# Un seul snapshot par rerun: les onglets sont des tranches en mémoire
+snapshot = get_mart_snapshot()
+
 tab1, tab2, tab3, tab4, tab5 = st.tabs([
     "📊 Dashboard",
     "💬 Claude Chat",
@@ -411,12 +732,8 @@ tab1, tab2, tab3, tab4, tab5 = st.tabs([
 with tab1:
     st.markdown("## 📊 Vue d'ensemble des Ports")
     
-    annual_df = load_data("""
-        SELECT port_code, port_name, year, total_tonnage_mt, total_teus
-        FROM public_marts.mart_port_annual_summary
-        WHERE year BETWEEN 2020 AND 2024
-        ORDER BY port_code, year
-    """)
+    annual_df = snapshot['annual']
+    annual_df = annual_df[annual_df['year'].between(2020, 2024)]
     
     if not annual_df.empty:
         col1, col2, col3, col4 = st.columns(4)
@@ -479,11 +796,7 @@ with tab2:
         col = cols[idx % 2]
         with col:
             if st.button(question, key=f"btn_{idx}", use_container_width=True):
-                st.session_state.chat_history.append({
-                    "role": "user",
-                    "content": question
-                })
-                st.rerun()
+                handle_question(question)
     
     st.markdown("---")
     
@@ -518,46 +831,10 @@ with tab2:
         label_visibility="collapsed"
     )
     
-    if user_input:
-        # Ajoute question à historique
-        st.session_state.chat_history.append({
-            "role": "user",
-            "content": user_input
-        })
-        
-        # Prépare contexte pour Claude
-        context_df = load_data("""
-            SELECT port_code, port_name, year, total_tonnage_mt, total_teus
-            FROM public_marts.mart_port_annual_summary
-            WHERE year = 2024
-        """)
-        
-        data_context = context_df.to_string(index=False)
-        
-        # Génère SQL
-        with st.spinner("🔄 Claude analyse votre question..."):
-            sql_query = generate_sql_query(user_input, data_context)
-            
-            if sql_query:
-                # Exécute requête
-                result_df = execute_query(sql_query)
-                
-                # Génère insights
-                insight = get_claude_insights(user_input, result_df.to_string(index=False))
-                
-                # Génère graphique si données
-                chart = None
-                if not result_df.empty and len(result_df.columns) >= 2:
-                    chart = generate_chart_data(result_df, "line_time")
-                
-                # Ajoute réponse à historique
-                st.session_state.chat_history.append({
-                    "role": "assistant",
-                    "content": insight,
-                    "chart": chart
-                })
-                
-                st.rerun()
+    # Le texte reste dans le champ après rerun: ne traiter qu'une fois
+    if user_input and user_input != st.session_state.last_question:
+        st.session_state.last_question = user_input
+        handle_question(user_input)
 
 # ============================================================================
 # TAB 3: COMPARAISON
@@ -566,13 +843,11 @@ with tab2:
 with tab3:
     st.markdown("## 🏆 Comparaison Inter-Ports")
     
-    comparison_df = load_data("""
-        SELECT port_code, port_name, year, 
-               total_tonnage_mt, tonnage_market_share_pct,
-               total_teus
-        FROM public_marts.mart_port_comparison
-        WHERE year = 2024
-    """)
+    comparison_df = snapshot['comparison']
+    comparison_df = comparison_df.loc[
+        comparison_df['year'] == 2024,
+        ['port_code', 'port_name', 'year', 'total_tonnage_mt', 'tonnage_market_share_pct', 'total_teus']
+    ]
     
     if not comparison_df.empty:
         fig = px.bar(
@@ -601,12 +876,8 @@ with tab3:
 with tab4:
     st.markdown("## 📈 Tendances (2020-2024)")
     
-    trends_df = load_data("""
-        SELECT port_code, year, total_tonnage_mt, tonnage_yoy_pct
-        FROM public_marts.mart_port_trends
-        WHERE year >= 2020
-        ORDER BY port_code, year
-    """)
+    trends_df = snapshot['trends']
+    trends_df = trends_df[trends_df['year'] >= 2020]
     
     if not trends_df.empty:
         fig = px.line(
@@ -633,11 +904,8 @@ with tab4:
 with tab5:
     st.markdown("## ✅ Qualité des Données")
     
-    quality_df = load_data("""
-        SELECT port_code, year, tonnage_coverage_pct, quality_level
-        FROM public_marts.mart_data_quality
-        WHERE year >= 2020
-    """)
+    quality_df = snapshot['quality']
+    quality_df = quality_df[quality_df['year'] >= 2020]
     
     if not quality_df.empty:
         st.info("📊 Couverture de données entre 50-100%")
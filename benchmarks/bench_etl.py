@@ -0,0 +1,223 @@
+"""
+Benchmark ETL: génération synthétique → DatasetCleaner.run → PostgreSQLDataLoader.run
+✅ Durée, lignes/s et pic mémoire (tracemalloc) par étape
+✅ Résultats JSON horodatés + commit git (benchmarks/results/)
+✅ Comparaison avec le dernier résultat de même scénario (régressions)
+
+Le chargement cible une base dédiée (BENCH_DB_NAME, défaut ports_bench),
+recréée à chaque run depuis src/database/schema.sql.
+
+Usage:
+  python benchmarks/bench_etl.py --ports 50 --granularity monthly
+  python benchmarks/bench_etl.py --ports 200 --skip-load
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic_data import PERIODS, generate_traffic, reset_database, synthetic_ports
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+RESULTS_DIR = ROOT / 'benchmarks' / 'results'
+REGRESSION_THRESHOLD = 1.2  # +20% de durée = régression signalée
+
+BENCH_DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'database': os.getenv('BENCH_DB_NAME', 'ports_bench'),
+    'user': os.getenv('DB_USER', 'postgres'),
+    'password': os.getenv('DB_PASSWORD', 'postgres'),
+    'port': os.getenv('DB_PORT', '5432'),
+}
+
+# Loggers des scripts ETL: bruit (et I/O) hors mesure sauf --verbose
+ETL_LOGGERS = ('src.extraction.clean_dataset_phase1', 'src.loading.load_postgres')
+
+# ============================================================================
+# MESURE
+# ============================================================================
+
+def measure(stage, rows, func, *args, **kwargs):
+    """Exécute func et retourne (résultat, métriques de l'étape)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    metrics = {
+        'stage': stage,
+        'rows': rows,
+        'seconds': round(elapsed, 4),
+        'rows_per_second': round(rows / elapsed, 1) if elapsed > 0 else None,
+        'peak_memory_mb': round(peak / 1024 ** 2, 2),
+    }
+    logger.info(
+        f"  {stage:<10} {rows:>9,} lignes  {elapsed:>8.3f}s  "
+        f"{metrics['rows_per_second'] or 0:>12,.0f} lignes/s  {metrics['peak_memory_mb']:>8.1f} Mo"
+    )
+    return result, metrics
+
+# ============================================================================
+# RÉSULTATS
+# ============================================================================
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def scenario_key(scenario):
+    return f"p{scenario['ports']}-{scenario['granularity']}-{scenario['first_year']}-{scenario['last_year']}"
+
+
+def previous_result(scenario):
+    """Dernier résultat enregistré pour le même scénario"""
+    candidates = sorted(RESULTS_DIR.glob(f"*_{scenario_key(scenario)}.json"))
+    if not candidates:
+        return None
+    with open(candidates[-1], 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(result, previous):
+    """Signale les étapes plus lentes que le résultat précédent"""
+    if previous is None:
+        logger.info("Pas de résultat précédent pour ce scénario")
+        return []
+
+    before = {stage['stage']: stage for stage in previous['stages']}
+    regressions = []
+    logger.info(f"\nComparaison avec {previous.get('commit')} ({previous['timestamp']}):")
+    for stage in result['stages']:
+        old = before.get(stage['stage'])
+        if not old or not old['seconds']:
+            continue
+        ratio = stage['seconds'] / old['seconds']
+        marker = '✗ RÉGRESSION' if ratio > REGRESSION_THRESHOLD else '✓'
+        logger.info(f"  {marker} {stage['stage']}: {old['seconds']:.3f}s → {stage['seconds']:.3f}s (x{ratio:.2f})")
+        if ratio > REGRESSION_THRESHOLD:
+            regressions.append(stage['stage'])
+    return regressions
+
+
+def save_result(result):
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%dT%H%M%S')
+    path = RESULTS_DIR / f"{stamp}_{scenario_key(result['scenario'])}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    logger.info(f"\n✓ Résultats: {path}")
+    return path
+
+# ============================================================================
+# EXECUTION
+# ============================================================================
+
+def run_benchmark(scenario, skip_load=False):
+    from src.extraction.clean_dataset_phase1 import DatasetCleaner
+
+    stages = []
+    with tempfile.TemporaryDirectory(prefix='bench_etl_') as tmp:
+        tmp = Path(tmp)
+        raw_file, clean_file = tmp / 'all_ports_raw.csv', tmp / 'ports_clean.csv'
+
+        df, metrics = measure(
+            'generate', scenario['ports'] * (scenario['last_year'] - scenario['first_year'] + 1)
+            * PERIODS[scenario['granularity']],
+            generate_traffic, scenario['ports'], scenario['first_year'], scenario['last_year'],
+            scenario['granularity'], scenario['missing_rate'], seed=scenario['seed']
+        )
+        stages.append(metrics)
+        df.to_csv(raw_file, index=False)
+
+        cleaner = DatasetCleaner(raw_file, clean_file, tmp / 'cleaning_report.json')
+        ok, metrics = measure('clean', len(df), cleaner.run)
+        stages.append(dict(metrics, success=bool(ok)))
+
+        if skip_load:
+            logger.info("  load       ignoré (--skip-load)")
+        elif ok:
+            from src.loading.load_postgres import PostgreSQLDataLoader
+
+            reset_database(BENCH_DB_CONFIG, synthetic_ports(df))
+            loader = PostgreSQLDataLoader(BENCH_DB_CONFIG, clean_file)
+            ok, metrics = measure('load', len(cleaner.df_raw), loader.run)
+            stages.append(dict(metrics, success=bool(ok)))
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'commit': git_commit(),
+        'python': sys.version.split()[0],
+        'scenario': scenario,
+        'stages': stages,
+    }
+
+
+def main():
+    """Script principal"""
+    parser = argparse.ArgumentParser(description="Benchmark ETL sur données synthétiques")
+    parser.add_argument('--ports', type=int, default=20)
+    parser.add_argument('--years', type=int, nargs=2, default=[2015, 2024], metavar=('DEBUT', 'FIN'))
+    parser.add_argument('--granularity', choices=list(PERIODS), default='quarterly')
+    parser.add_argument('--missing-rate', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skip-load', action='store_true', help="sans PostgreSQL")
+    parser.add_argument('--no-save', action='store_true', help="ne pas écrire le JSON")
+    parser.add_argument('--verbose', action='store_true', help="garder les logs des scripts ETL")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        for name in ETL_LOGGERS:
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+    scenario = {
+        'ports': args.ports,
+        'first_year': args.years[0],
+        'last_year': args.years[1],
+        'granularity': args.granularity,
+        'missing_rate': args.missing_rate,
+        'seed': args.seed,
+    }
+
+    logger.info("="*70)
+    logger.info(f"BENCHMARK ETL - {scenario_key(scenario)}")
+    logger.info("="*70)
+
+    previous = previous_result(scenario)
+    result = run_benchmark(scenario, args.skip_load)
+    regressions = compare(result, previous)
+    if not args.no_save:
+        save_result(result)
+
+    failed = [stage['stage'] for stage in result['stages'] if stage.get('success') is False]
+    return 1 if failed or regressions else 0
+
+
+if __name__ == '__main__':
+    exit(main())
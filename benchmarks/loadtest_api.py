@@ -0,0 +1,391 @@
+"""
+Test de charge de l'API Flask (dashboard/api.py)
+✅ Base PostgreSQL jetable: générateur synthétique → cleaner → loader → dbt
+✅ Groq remplacé par un stub HTTP local déterministe (latence configurable)
+✅ API lancée sous gunicorn (comme en production), trafic concurrent
+✅ RPS + latences p50/p95/p99 par endpoint, résultats JSON (benchmarks/results/)
+
+Usage:
+  python benchmarks/loadtest_api.py --ports 50 --concurrency 32 --duration 30
+  python benchmarks/loadtest_api.py --no-seed --llm-latency 1.5 --endpoints summary=5 chat=1
+  python benchmarks/loadtest_api.py --api-url http://localhost:5000   # API déjà lancée
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import requests
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.bench_etl import RESULTS_DIR, git_commit
+from benchmarks.synthetic_data import PERIODS, generate_traffic, reset_database, synthetic_ports
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+LOADTEST_DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'database': os.getenv('LOADTEST_DB_NAME', 'ports_loadtest'),
+    'user': os.getenv('DB_USER', 'postgres'),
+    'password': os.getenv('DB_PASSWORD', 'postgres'),
+    'port': os.getenv('DB_PORT', '5432'),
+}
+
+DBT_DIR = ROOT / 'dbt_project'
+FRONTEND_INDEX = ROOT / 'frontend' / 'dist' / 'index.html'
+API_START_TIMEOUT = 30  # secondes
+
+CHAT_QUESTIONS = [
+    "Quel port a le plus fort tonnage ?",
+    "Compare les parts de marché conteneurs",
+    "Quelles tendances pour 2024 ?",
+]
+
+# nom -> (méthode, chemin, corps JSON, poids par défaut)
+ENDPOINTS = {
+    'summary': ('GET', '/api/ports/summary', None, 4),
+    'comparison': ('GET', '/api/ports/comparison', None, 4),
+    'trends': ('GET', '/api/ports/trends', None, 4),
+    'insights': ('GET', '/api/groq/insights', None, 1),
+    'chat': ('POST', '/api/groq/chat', 'question', 1),
+    'health': ('GET', '/api/health', None, 1),
+    'index': ('GET', '/', None, 2),
+    'spa_route': ('GET', '/ports/SYN000', None, 1),  # repli React Router -> index.html
+}
+
+# ============================================================================
+# STUB GROQ (API compatible OpenAI, déterministe)
+# ============================================================================
+
+class GroqStubHandler(BaseHTTPRequestHandler):
+    """POST */chat/completions: réponse fixe par prompt après `latency` secondes"""
+
+    latency = 0.5
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if not self.path.endswith('/chat/completions'):
+            self.send_error(404)
+            return
+
+        time.sleep(self.latency)
+        prompt = json.dumps(body.get('messages', []), ensure_ascii=False)
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8]
+        content = "\n".join(f"Insight {digest}-{i}: le trafic portuaire reste stable." for i in range(1, 4))
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        payload = json.dumps({
+            'id': f'stub-{digest}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            },
+        }).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # pas de log par requête (bruit + coût)
+
+
+def start_groq_stub(latency):
+    """Démarre le stub dans un thread; retourne (serveur, base_url)"""
+    handler = type('ConfiguredGroqStub', (GroqStubHandler,), {'latency': latency})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+# ============================================================================
+# BASE + API
+# ============================================================================
+
+def seed_database(num_ports, first_year, last_year, granularity, seed):
+    """Base jetable peuplée par le pipeline réel (cleaner, loader, dbt)"""
+    from src.extraction.clean_dataset_phase1 import DatasetCleaner
+    from src.loading.load_postgres import PostgreSQLDataLoader
+
+    if shutil.which('dbt') is None:
+        raise RuntimeError("dbt introuvable: installer dbt-postgres ou utiliser --no-seed")
+
+    df = generate_traffic(num_ports, first_year, last_year, granularity, seed=seed)
+    with tempfile.TemporaryDirectory(prefix='loadtest_') as tmp:
+        tmp = Path(tmp)
+        df.to_csv(tmp / 'all_ports_raw.csv', index=False)
+        cleaner = DatasetCleaner(tmp / 'all_ports_raw.csv', tmp / 'ports_clean.csv', tmp / 'report.json')
+        if not cleaner.run():
+            raise RuntimeError("Nettoyage des données synthétiques en échec")
+
+        reset_database(LOADTEST_DB_CONFIG, synthetic_ports(df))
+        if not PostgreSQLDataLoader(LOADTEST_DB_CONFIG, tmp / 'ports_clean.csv').run():
+            raise RuntimeError("Chargement des données synthétiques en échec")
+
+    env = dict(os.environ, LOADTEST_DB_NAME=LOADTEST_DB_CONFIG['database'])
+    subprocess.run(
+        ['dbt', 'run', '--target', 'loadtest', '--profiles-dir', '.', '--full-refresh'],
+        cwd=DBT_DIR, env=env, check=True
+    )
+    logger.info(f"✓ Base {LOADTEST_DB_CONFIG['database']} peuplée ({len(df):,} lignes brutes)")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_api(groq_url, workers):
+    """gunicorn dashboard.api:app sur la base de test; attend /api/health"""
+    port = free_port()
+    env = dict(
+        os.environ,
+        DB_HOST=LOADTEST_DB_CONFIG['host'],
+        DB_NAME=LOADTEST_DB_CONFIG['database'],
+        DB_USER=LOADTEST_DB_CONFIG['user'],
+        DB_PASSWORD=LOADTEST_DB_CONFIG['password'],
+        DB_PORT=str(LOADTEST_DB_CONFIG['port']),
+        GROQ_API_KEY='loadtest-stub',
+        GROQ_BASE_URL=groq_url,
+    )
+    # Logs JSON par requête de l'API: hors console (volume), conservés pour analyse
+    api_log = tempfile.NamedTemporaryFile(prefix='loadtest_api_', suffix='.log', delete=False)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(workers),
+         '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'dashboard.api:app'],
+        cwd=ROOT, env=env, stdout=api_log, stderr=subprocess.STDOUT
+    )
+    api_log.close()
+    base_url = f"http://127.0.0.1:{port}"
+    logger.info(f"API {base_url} ({workers} workers), logs: {api_log.name}")
+
+    deadline = time.monotonic() + API_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn arrêté au démarrage (code {process.returncode}), voir {api_log.name}")
+        try:
+            if requests.get(f"{base_url}/api/health", timeout=1).ok:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"API non disponible après {API_START_TIMEOUT}s")
+
+# ============================================================================
+# GÉNÉRATION DE CHARGE
+# ============================================================================
+
+def send(session, base_url, name, rng=random):
+    method, path, body, _ = ENDPOINTS[name]
+    kwargs = {'timeout': 30}
+    if body == 'question':
+        kwargs['json'] = {'message': rng.choice(CHAT_QUESTIONS)}
+    start = time.perf_counter()
+    try:
+        response = session.request(method, base_url + path, **kwargs)
+        ok = response.status_code < 400
+    except requests.RequestException:
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def run_load(base_url, weights, concurrency, duration, warmup, seed):
+    """
+    `concurrency` clients en boucle fermée pendant `duration` secondes.
+    Chaque client tire un endpoint selon `weights` (graine fixe par client).
+    """
+    names, probs = list(weights), list(weights.values())
+
+    # Échauffement: caches API (get_cached_data) et pools remplis, non mesuré
+    with requests.Session() as session:
+        for name in names:
+            send(session, base_url, name)
+    time.sleep(warmup)
+
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(index):
+        rng = random.Random(seed + index)
+        local = defaultdict(list)
+        local_errors = defaultdict(int)
+        with requests.Session() as session:
+            while time.monotonic() < stop_at:
+                name = rng.choices(names, probs)[0]
+                latency, ok = send(session, base_url, name, rng)
+                local[name].append(latency)
+                if not ok:
+                    local_errors[name] += 1
+        with lock:
+            for name, values in local.items():
+                samples[name].extend(values)
+            for name, count in local_errors.items():
+                errors[name] += count
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return summarize(samples, errors, elapsed)
+
+
+def summarize(samples, errors, elapsed):
+    def stats(values, error_count):
+        latencies = np.array(values) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        return {
+            'requests': len(values),
+            'errors': error_count,
+            'rps': round(len(values) / elapsed, 1),
+            'mean_ms': round(float(latencies.mean()), 2),
+            'p50_ms': round(float(p50), 2),
+            'p95_ms': round(float(p95), 2),
+            'p99_ms': round(float(p99), 2),
+        }
+
+    endpoints = {name: stats(values, errors[name]) for name, values in sorted(samples.items())}
+    all_values = [value for values in samples.values() for value in values]
+    total = stats(all_values, sum(errors.values())) if all_values else None
+    return {'elapsed_seconds': round(elapsed, 2), 'endpoints': endpoints, 'total': total}
+
+
+def print_report(report):
+    logger.info("\n" + "="*78)
+    logger.info(f"{'endpoint':<12}{'req':>8}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'moy ms':>10}")
+    logger.info("-"*78)
+    rows = list(report['endpoints'].items())
+    if report['total']:
+        rows.append(('TOTAL', report['total']))
+    for name, s in rows:
+        logger.info(
+            f"{name:<12}{s['requests']:>8}{s['errors']:>6}{s['rps']:>9.1f}"
+            f"{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['mean_ms']:>10.1f}"
+        )
+    logger.info("="*78)
+
+# ============================================================================
+# EXECUTION
+# ============================================================================
+
+def parse_weights(specs):
+    """['summary=5', 'chat'] -> {'summary': 5, 'chat': poids par défaut}"""
+    if not specs:
+        return {name: spec[3] for name, spec in ENDPOINTS.items()}
+    weights = {}
+    for item in specs:
+        name, _, weight = item.partition('=')
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Endpoint inconnu: {name} (disponibles: {', '.join(ENDPOINTS)})")
+        weights[name] = float(weight) if weight else ENDPOINTS[name][3]
+    return weights
+
+
+def main():
+    """Script principal"""
+    parser = argparse.ArgumentParser(description="Test de charge de l'API dashboard")
+    parser.add_argument('--ports', type=int, default=50)
+    parser.add_argument('--years', type=int, nargs=2, default=[2015, 2024], metavar=('DEBUT', 'FIN'))
+    parser.add_argument('--granularity', choices=list(PERIODS), default='quarterly')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-seed', action='store_true', help="réutiliser la base de test existante")
+    parser.add_argument('--api-url', help="cibler une API déjà lancée (pas de gunicorn ni de stub)")
+    parser.add_argument('--workers', type=int, default=4, help="workers gunicorn")
+    parser.add_argument('--llm-latency', type=float, default=0.5, help="latence du stub Groq (s)")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30, help="secondes de charge mesurée")
+    parser.add_argument('--warmup', type=float, default=1, help="pause après l'échauffement (s)")
+    parser.add_argument('--endpoints', nargs='*', help="nom[=poids] (défaut: tous)")
+    parser.add_argument('--no-save', action='store_true', help="ne pas écrire le JSON")
+    args = parser.parse_args()
+
+    weights = parse_weights(args.endpoints)
+    if not args.api_url and not FRONTEND_INDEX.exists() and {'index', 'spa_route'} & set(weights):
+        logger.warning("⚠ frontend/dist absent (npm run build): routes statiques en 404")
+    stub = api = None
+    try:
+        if args.api_url:
+            base_url = args.api_url.rstrip('/')
+        else:
+            if not args.no_seed:
+                seed_database(args.ports, args.years[0], args.years[1], args.granularity, args.seed)
+            stub, groq_url = start_groq_stub(args.llm_latency)
+            api, base_url = start_api(groq_url, args.workers)
+
+        logger.info(f"Charge: {args.concurrency} clients × {args.duration:.0f}s sur {base_url}")
+        report = run_load(base_url, weights, args.concurrency, args.duration, args.warmup, args.seed)
+    finally:
+        if api is not None:
+            api.terminate()
+            api.wait(timeout=10)
+        if stub is not None:
+            stub.shutdown()
+
+    print_report(report)
+
+    result = {
+        'timestamp': datetime.now().isoformat(),
+        'commit': git_commit(),
+        'config': {
+            'api_url': args.api_url,
+            'workers': None if args.api_url else args.workers,
+            'llm_latency_s': None if args.api_url else args.llm_latency,
+            'concurrency': args.concurrency,
+            'duration_s': args.duration,
+            'weights': weights,
+            'dataset': {'ports': args.ports, 'years': args.years, 'granularity': args.granularity,
+                        'seeded': not (args.no_seed or args.api_url)},
+        },
+        **report,
+    }
+    if not args.no_save:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        path = RESULTS_DIR / f"loadtest_{datetime.now().strftime('%Y%m%dT%H%M%S')}.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        logger.info(f"✓ Résultats: {path}")
+
+    return 1 if report['total'] is None or report['total']['errors'] else 0
+
+
+if __name__ == '__main__':
+    exit(main())
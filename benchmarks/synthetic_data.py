@@ -0,0 +1,199 @@
+"""
+Générateur de données portuaires synthétiques (benchmarks, tests de charge)
+Même format que data/raw/all_ports_raw.csv (entrée du DatasetCleaner)
+
+Réalisme:
+- Profil d'indicateurs par port (tonnage seul / TEU seul / les deux) calé
+  sur le mix has_tonnage / has_teus de data/processed/ports_clean.csv
+- Trous aléatoires supplémentaires (missing_rate) et part ESTIMATED
+- Croissance annuelle + saisonnalité (mensuel / trimestriel)
+
+Usage:
+  python benchmarks/synthetic_data.py --ports 50 --years 2015 2024 --granularity monthly
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.extraction.registry import RECORD_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+REFERENCE_CSV = ROOT / 'data' / 'processed' / 'ports_clean.csv'
+SCHEMA_FILE = ROOT / 'src' / 'database' / 'schema.sql'
+
+# Mix observé dans ports_clean.csv (repli si le fichier est absent)
+DEFAULT_PROFILE_MIX = {'BOTH_INDICATORS': 0.2, 'TONNAGE_ONLY': 0.5, 'TEU_ONLY': 0.3}
+DEFAULT_ESTIMATED_RATE = 0.2
+
+PERIODS = {'annual': 1, 'quarterly': 4, 'monthly': 12}
+
+COUNTRIES = ['Benin', 'Ghana', 'Togo', "Côte d'Ivoire", 'Nigeria', 'Senegal',
+             'Guinea', 'Cameroon', 'Mauritania', 'Sierra Leone']
+
+
+def reference_mix(reference_csv=REFERENCE_CSV):
+    """Part de chaque profil d'indicateurs + part ESTIMATED dans les données réelles"""
+    try:
+        df = pd.read_csv(reference_csv)
+    except FileNotFoundError:
+        return DEFAULT_PROFILE_MIX, DEFAULT_ESTIMATED_RATE
+
+    profile = np.select(
+        [df['has_tonnage'] & df['has_teus'], df['has_tonnage'], df['has_teus']],
+        ['BOTH_INDICATORS', 'TONNAGE_ONLY', 'TEU_ONLY'],
+        default='NO_DATA'
+    )
+    mix = pd.Series(profile).value_counts(normalize=True).to_dict()
+    mix.pop('NO_DATA', None)
+    estimated_rate = float((df['data_quality_flag'] == 'ESTIMATED').mean())
+    return mix or DEFAULT_PROFILE_MIX, estimated_rate
+
+# ============================================================================
+# GÉNÉRATION
+# ============================================================================
+
+def generate_traffic(num_ports=20, first_year=2015, last_year=2024, granularity='quarterly',
+                     missing_rate=0.1, estimated_rate=None, seed=42):
+    """
+    DataFrame brut (colonnes RECORD_FIELDS), construit par vecteurs:
+    num_ports × années × périodes lignes.
+    """
+    if granularity not in PERIODS:
+        raise ValueError(f"Granularité inconnue: {granularity} (attendu: {', '.join(PERIODS)})")
+
+    rng = np.random.default_rng(seed)
+    profile_mix, reference_estimated = reference_mix()
+    if estimated_rate is None:
+        estimated_rate = reference_estimated
+
+    periods = PERIODS[granularity]
+    years = np.arange(first_year, last_year + 1)
+    n_years = len(years)
+    rows_per_port = n_years * periods
+    n = num_ports * rows_per_port
+
+    # Index: port (lent) × année × période (rapide)
+    port_idx = np.repeat(np.arange(num_ports), rows_per_port)
+    year = np.tile(np.repeat(years, periods), num_ports)
+    period = np.tile(np.arange(1, periods + 1), num_ports * n_years)
+
+    # Caractéristiques par port
+    base_tonnage = rng.lognormal(mean=np.log(15e6), sigma=0.6, size=num_ports)
+    growth = rng.normal(0.03, 0.02, size=num_ports)
+    teu_ratio = rng.uniform(0.03, 0.08, size=num_ports)  # EVP par tonne
+    profiles = rng.choice(list(profile_mix), size=num_ports, p=list(profile_mix.values()))
+
+    # Volumes: tendance + saisonnalité + bruit, répartis sur les périodes
+    trend = (1 + growth[port_idx]) ** (year - first_year)
+    season = 1 + 0.08 * np.sin(2 * np.pi * (period - 1) / periods) if periods > 1 else 1.0
+    noise = rng.normal(1, 0.05, size=n)
+    tonnage = base_tonnage[port_idx] * trend * season * noise / periods
+    teus = tonnage * teu_ratio[port_idx]
+    vessels = tonnage / rng.uniform(15_000, 25_000, size=num_ports)[port_idx]
+
+    has_tonnage = np.isin(profiles, ['BOTH_INDICATORS', 'TONNAGE_ONLY'])[port_idx]
+    has_teus = np.isin(profiles, ['BOTH_INDICATORS', 'TEU_ONLY'])[port_idx]
+    has_tonnage &= rng.random(n) >= missing_rate
+    has_teus &= rng.random(n) >= missing_rate
+    estimated = rng.random(n) < estimated_rate
+
+    codes = np.array([f"SYN{i:03d}" for i in range(num_ports)])
+    df = pd.DataFrame({
+        'port_code': codes[port_idx],
+        'port_name': np.char.add('Synthetic Port ', np.char.mod('%03d', port_idx)),
+        'country': np.array(COUNTRIES)[port_idx % len(COUNTRIES)],
+        'year': year,
+        'quarter': (period - 1) * 4 // periods + 1 if periods > 1 else np.nan,
+        'month': period if granularity == 'monthly' else np.nan,
+        'tonnage_mt': np.where(has_tonnage, tonnage.round(-3), np.nan),
+        'imports_mt': np.nan,
+        'exports_mt': np.nan,
+        'teus': np.where(has_teus, teus.round(), np.nan),
+        'num_vessels': np.where(rng.random(n) >= missing_rate, vessels.round(), np.nan),
+        'data_source': np.where(estimated, 'Interpolation synthétique', 'Rapport synthétique'),
+        'source_url': np.where(estimated, None, 'https://example.org/synthetic'),
+        'extraction_date': '2025-01-15',
+        'data_quality_flag': np.where(estimated, 'ESTIMATED', 'VERIFIED'),
+        'notes': 'Donnée synthétique (benchmark)',
+    })
+    return df[RECORD_FIELDS]
+
+
+def synthetic_ports(df):
+    """Lignes dim_port (port_code, port_name, country) d'un jeu synthétique"""
+    return list(df[['port_code', 'port_name', 'country']].drop_duplicates().itertuples(index=False, name=None))
+
+
+def reset_database(db_config, ports):
+    """
+    Recrée une base jetable (schéma complet de schema.sql) et y déclare les
+    ports synthétiques. Ne jamais pointer sur la base du dashboard.
+    """
+    import psycopg2
+
+    name = db_config['database']
+    admin = psycopg2.connect(**dict(db_config, database='postgres'))
+    admin.autocommit = True
+    try:
+        with admin.cursor() as cursor:
+            cursor.execute(f'DROP DATABASE IF EXISTS "{name}"')
+            cursor.execute(f'CREATE DATABASE "{name}"')
+    finally:
+        admin.close()
+
+    conn = psycopg2.connect(**db_config)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(SCHEMA_FILE.read_text(encoding='utf-8'))
+            cursor.executemany(
+                "INSERT INTO dim_port (port_code, port_name, country) VALUES (%s, %s, %s) "
+                "ON CONFLICT (port_code) DO NOTHING",
+                ports
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+# ============================================================================
+# EXECUTION
+# ============================================================================
+
+def main():
+    """Script principal"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Génère un CSV brut synthétique")
+    parser.add_argument('--ports', type=int, default=20)
+    parser.add_argument('--years', type=int, nargs=2, default=[2015, 2024], metavar=('DEBUT', 'FIN'))
+    parser.add_argument('--granularity', choices=list(PERIODS), default='quarterly')
+    parser.add_argument('--missing-rate', type=float, default=0.1)
+    parser.add_argument('--estimated-rate', type=float, default=None,
+                        help="part ESTIMATED (défaut: celle de ports_clean.csv)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='data/synthetic/all_ports_raw.csv')
+    args = parser.parse_args()
+
+    df = generate_traffic(args.ports, args.years[0], args.years[1], args.granularity,
+                          args.missing_rate, args.estimated_rate, args.seed)
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(output, index=False)
+    logger.info(f"✓ {len(df):,} lignes synthétiques ({args.ports} ports) -> {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
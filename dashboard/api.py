@@ -3,6 +3,7 @@ Flask API pour West Africa Ports Dashboard
 ✅ Decimal CORRIGÉ (conversion avant JSON)
 ✅ Groq réponses complètes fluides
 ✅ Serveur frontend React intégré
+✅ Métriques Prometheus (GET /api/metrics) + logs structurés
 """
 
 from flask import Flask, jsonify, request, send_from_directory
@@ -11,13 +12,24 @@ import psycopg2
 from psycopg2 import pool
 from psycopg2.extras import RealDictCursor
 import os
+import sys
+import time
 from dotenv import load_dotenv
 from groq import Groq
-import json
+import logging
 import re
 from decimal import Decimal
 from pathlib import Path
 
+# Permet `python dashboard/api.py` comme `gunicorn dashboard.api:app`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+
+from dashboard import metrics
+from dashboard.metrics import log_event
+from src.analytics.insights import cards, compute_insights, digest
+
 load_dotenv()
 
 # Configuration Flask avec dossier statique du frontend
@@ -27,6 +39,7 @@ app = Flask(
     static_url_path=''
 )
 CORS(app)
+metrics.init_app(app)
 
 # ============================================================================
 # FONCTION DE CONVERSION DECIMAL (AVANT JSON)
@@ -61,66 +74,157 @@ except Exception as e:
     print("Running in dev mode without database")
     db_pool = None
 
-def execute_query(query):
-    """Exécute requête SQL et retourne résultats en dict normal"""
+def execute_query(query, name='adhoc'):
+    """Exécute requête SQL et retourne résultats en dict normal (None si erreur)
+
+    `name` identifie la requête dans les métriques (db_query_duration_seconds).
+    """
+    conn = None
+    broken = False
     try:
-        conn = db_pool.getconn()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute(query)
-        results = cursor.fetchall()
-        cursor.close()
-        db_pool.putconn(conn)
+        with metrics.DB_POOL_WAIT.time():
+            conn = db_pool.getconn()
+        with metrics.DB_QUERY_DURATION.time(query=name):
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute(query)
+            results = cursor.fetchall()
+            cursor.close()
         
         # Convertir RealDictRow → dict normal → Decimal → float
         data = [dict(row) for row in results]
         return convert_decimals(data)
     except Exception as e:
-        print(f"❌ SQL Error: {e}")
-        return []
+        metrics.DB_QUERY_ERRORS.inc(query=name)
+        log_event('sql_error', level=logging.ERROR, query=name, error=str(e))
+        if conn is not None:
+            # Sinon la connexion retourne au pool en transaction avortée
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+        return None
+    finally:
+        if conn is not None:
+            db_pool.putconn(conn, close=broken)
 
 # ============================================================================
 # GROQ CLIENT
 # ============================================================================
 
-groq_client = Groq(api_key=os.getenv('GROQ_API_KEY'))
+# GROQ_BASE_URL: serveur compatible (ex. stub local des tests de charge)
+groq_client = Groq(api_key=os.getenv('GROQ_API_KEY'), base_url=os.getenv('GROQ_BASE_URL') or None)
+GROQ_MODEL = "mixtral-8x7b-32768"
 
 # ============================================================================
 # CACHE DONNÉES
 # ============================================================================
 
+DATASET_QUERIES = {
+    'summary': """
+        SELECT port_code, year, total_tonnage_mt, total_teus
+        FROM public_marts.mart_port_annual_summary
+        WHERE year >= 2020
+        ORDER BY year DESC, total_tonnage_mt DESC
+    """,
+    'comparison': """
+        SELECT port_code, year, total_tonnage_mt, tonnage_market_share_pct, 
+               total_teus, teu_market_share_pct, tonnage_rank
+        FROM public_marts.mart_port_comparison
+        ORDER BY year DESC, total_tonnage_mt DESC
+        LIMIT 10
+    """,
+    'trends': """
+        SELECT port_code, year, total_tonnage_mt, tonnage_yoy_pct
+        FROM public_marts.mart_port_trends
+        WHERE year >= 2023
+        ORDER BY year DESC, tonnage_yoy_pct DESC
+    """,
+    'forecast': """
+        SELECT port_code, metric, year, forecast, lower_bound, upper_bound,
+               confidence_level, method, n_points, last_year
+        FROM public_marts.mart_port_forecast
+        ORDER BY metric, year, forecast DESC
+    """,
+    'annual': """
+        SELECT port_code, year, total_tonnage_mt, total_teus
+        FROM public_marts.mart_port_annual_summary
+        ORDER BY port_code, year
+    """,
+    'quality': """
+        SELECT port_code, year, tonnage_coverage_pct
+        FROM public_marts.mart_data_quality
+        ORDER BY port_code, year
+    """,
+}
+
 data_cache = {}
+data_generation = {}  # dataset -> n° de chargement (clé des caches dérivés)
 CACHE_VALID = True
 
-def get_cached_data():
-    """Récupère ou met à jour le cache"""
-    global data_cache
+def get_cached_data(dataset):
+    """Récupère un dataset depuis le cache (chargé à la première demande)"""
+    if dataset in data_cache and CACHE_VALID:
+        metrics.CACHE_REQUESTS.inc(dataset=dataset, result='hit')
+        return data_cache[dataset]
     
-    if not data_cache or not CACHE_VALID:
-        print("📥 Chargement données...")
-        data_cache['summary'] = execute_query("""
-            SELECT port_code, year, total_tonnage_mt, total_teus
-            FROM public_marts.mart_port_annual_summary
-            WHERE year >= 2020
-            ORDER BY year DESC, total_tonnage_mt DESC
-        """)
-        
-        data_cache['comparison'] = execute_query("""
-            SELECT port_code, year, total_tonnage_mt, tonnage_market_share_pct, 
-                   total_teus, teu_market_share_pct, tonnage_rank
-            FROM public_marts.mart_port_comparison
-            ORDER BY year DESC, total_tonnage_mt DESC
-            LIMIT 10
-        """)
-        
-        data_cache['trends'] = execute_query("""
-            SELECT port_code, year, total_tonnage_mt, tonnage_yoy_pct
-            FROM public_marts.mart_port_trends
-            WHERE year >= 2023
-            ORDER BY year DESC, tonnage_yoy_pct DESC
-        """)
-        print("✅ Cache chargé")
+    metrics.CACHE_REQUESTS.inc(dataset=dataset, result='miss')
+    start = time.perf_counter()
+    data = execute_query(DATASET_QUERIES[dataset], name=dataset)
+    if data is None:
+        return []  # erreur: pas mise en cache, nouvel essai à la prochaine demande
+    data_cache[dataset] = data
+    data_generation[dataset] = data_generation.get(dataset, 0) + 1
+    log_event(
+        'cache_load',
+        dataset=dataset,
+        rows=len(data_cache[dataset]),
+        duration_ms=round((time.perf_counter() - start) * 1000, 2),
+    )
+    return data_cache[dataset]
+
+insights_cache = {}
+
+def get_snapshot_insights():
+    """
+    Insights déterministes (src/analytics/insights.py), recalculés seulement
+    quand les datasets 'annual' / 'quality' sont rechargés dans le cache.
+    """
+    annual, quality = get_cached_data('annual'), get_cached_data('quality')
+    key = (data_generation.get('annual'), data_generation.get('quality'))
+    if None in key:
+        # Dataset en erreur: résultat partiel, non mis en cache
+        return compute_insights(pd.DataFrame(annual), pd.DataFrame(quality))
+    if insights_cache.get('key') != key:
+        insights_cache['insights'] = compute_insights(pd.DataFrame(annual), pd.DataFrame(quality))
+        insights_cache['key'] = key
+    return insights_cache['insights']
+
+def groq_completion(endpoint, messages, max_tokens):
+    """Appel Groq chronométré (latence + tokens dans /api/metrics)"""
+    model = GROQ_MODEL
+    start = time.perf_counter()
+    try:
+        with metrics.LLM_REQUEST_DURATION.time(endpoint=endpoint, model=model):
+            response = groq_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=max_tokens
+            )
+    except Exception as e:
+        metrics.LLM_ERRORS.inc(endpoint=endpoint, model=model)
+        log_event('llm_error', level=logging.ERROR, endpoint=endpoint, model=model, error=str(e))
+        raise
     
-    return data_cache
+    tokens = metrics.record_llm_usage(endpoint, model, response)
+    log_event(
+        'llm_call',
+        endpoint=endpoint,
+        model=model,
+        duration_ms=round((time.perf_counter() - start) * 1000, 2),
+        **{f'{k}_tokens': v for k, v in tokens.items()},
+    )
+    return response.choices[0].message.content
 
 # ============================================================================
 # ENDPOINTS API
@@ -137,50 +241,38 @@ def health():
             "summary": "GET /api/ports/summary",
             "comparison": "GET /api/ports/comparison",
             "trends": "GET /api/ports/trends",
+            "forecast": "GET /api/ports/forecast",
             "chat": "POST /api/groq/chat",
-            "insights": "GET /api/groq/insights"
+            "insights": "GET /api/groq/insights",
+            "metrics": "GET /api/metrics"
         }
     })
 
 @app.route('/api/ports/summary', methods=['GET'])
 def ports_summary():
     """Résumé ports"""
-    data = get_cached_data()
-    return jsonify(data['summary'])
+    return jsonify(get_cached_data('summary'))
 
 @app.route('/api/ports/comparison', methods=['GET'])
 def ports_comparison():
     """Comparaison ports"""
-    data = get_cached_data()
-    return jsonify(data['comparison'])
+    return jsonify(get_cached_data('comparison'))
 
 @app.route('/api/ports/trends', methods=['GET'])
 def ports_trends():
     """Tendances ports"""
-    data = get_cached_data()
-    return jsonify(data['trends'])
+    return jsonify(get_cached_data('trends'))
+
+@app.route('/api/ports/forecast', methods=['GET'])
+def ports_forecast():
+    """Projections ports (précalculées, intervalle 95%)"""
+    return jsonify(get_cached_data('forecast'))
 
 @app.route('/api/groq/insights', methods=['GET'])
 def groq_insights():
-    """Génère insights IA"""
+    """Insights clés, calculés localement (aucun appel Groq)"""
     try:
-        data = get_cached_data()
-        prompt = f"""Analysez ces données de ports d'Afrique de l'Ouest et donnez 3 insights clés:
-        {json.dumps(data['comparison'][:5])}
-        
-        Répondez UNIQUEMENT avec 3 points clés, sans liste numérotée."""
-        
-        response = groq_client.chat.completions.create(
-            model="mixtral-8x7b-32768",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=300
-        )
-        
-        text = response.choices[0].message.content
-        insights = [s.strip() for s in text.split('\n') if s.strip()][:3]
-        
-        return jsonify({"insights": insights})
+        return jsonify({"insights": cards(get_snapshot_insights()), "source": "local"})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -194,21 +286,18 @@ def groq_chat():
         if not user_message:
             return jsonify({"error": "Message vide"}), 400
         
-        # Contexte données
-        cache_data = get_cached_data()
-        context = f"Vous êtes expert en logistique portuaire. Voici les données: {json.dumps(cache_data['comparison'][:5])}"
+        # Contexte données: synthèse précalculée plutôt que les lignes brutes
+        context = ("Vous êtes expert en logistique portuaire. "
+                   f"Synthèse des données:\n{digest(get_snapshot_insights())}")
         
-        response = groq_client.chat.completions.create(
-            model="mixtral-8x7b-32768",
-            messages=[
+        reply = groq_completion(
+            'chat',
+            [
                 {"role": "system", "content": context},
                 {"role": "user", "content": user_message}
             ],
-            temperature=0.7,
             max_tokens=1000
         )
-        
-        reply = response.choices[0].message.content
         return jsonify({"response": reply})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,260 @@
+"""
+Instrumentation latence & métriques Prometheus pour l'API
+✅ Histogrammes durée requêtes HTTP par endpoint
+✅ Compteurs cache hit/miss par dataset
+✅ Durées requêtes SQL nommées + attente pool
+✅ Latence + tokens des appels LLM
+✅ Logs structurés (JSON, une ligne par événement)
+
+Registre en mémoire, thread-safe, sans dépendance externe.
+Note: avec gunicorn chaque worker expose ses propres compteurs.
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, request
+
+# ============================================================================
+# LOGS STRUCTURÉS
+# ============================================================================
+
+logger = logging.getLogger("ports_api")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def log_event(event, level=logging.INFO, **fields):
+    """Écrit un événement JSON sur une ligne"""
+    payload = {"ts": round(time.time(), 3), "event": event}
+    payload.update(fields)
+    logger.log(level, json.dumps(payload, ensure_ascii=False, default=str))
+
+# ============================================================================
+# TYPES DE MÉTRIQUES
+# ============================================================================
+
+# Buckets secondes: couvre cache mémoire (ms) jusqu'aux appels LLM (10s+)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+class Counter:
+    """Compteur monotone avec labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, '')) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+
+class Histogram:
+    """Histogramme cumulatif (buckets Prometheus) avec labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, '')) for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Chronomètre un bloc et enregistre sa durée"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self):
+        with self._lock:
+            items = sorted((k, (list(s[0]), s[1], s[2])) for k, s in self._series.items())
+        for key, (counts, total, count) in items:
+            for bound, bucket_count in zip(self.buckets, counts):
+                labels = _format_labels(self.labelnames, key, ('le', repr(float(bound))))
+                yield f"{self.name}_bucket{labels} {bucket_count}"
+            labels = _format_labels(self.labelnames, key, ('le', '+Inf'))
+            yield f"{self.name}_bucket{labels} {count}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {count}"
+
+
+class Registry:
+    """Ensemble des métriques exposées sur /api/metrics"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Format texte Prometheus 0.0.4"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+# ============================================================================
+# MÉTRIQUES DE L'APPLICATION
+# ============================================================================
+
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    'http_request_duration_seconds',
+    'Durée des requêtes HTTP par endpoint',
+    ('endpoint', 'method', 'status'),
+))
+
+CACHE_REQUESTS = registry.register(Counter(
+    'cache_requests_total',
+    'Accès au cache données par dataset (hit/miss)',
+    ('dataset', 'result'),
+))
+
+DB_QUERY_DURATION = registry.register(Histogram(
+    'db_query_duration_seconds',
+    'Durée des requêtes SQL par requête nommée',
+    ('query',),
+))
+
+DB_QUERY_ERRORS = registry.register(Counter(
+    'db_query_errors_total',
+    'Erreurs SQL par requête nommée',
+    ('query',),
+))
+
+DB_POOL_WAIT = registry.register(Histogram(
+    'db_pool_wait_seconds',
+    "Temps d'attente pour obtenir une connexion du pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+))
+
+LLM_REQUEST_DURATION = registry.register(Histogram(
+    'llm_request_duration_seconds',
+    'Latence des appels LLM par endpoint et modèle',
+    ('endpoint', 'model'),
+))
+
+LLM_TOKENS = registry.register(Counter(
+    'llm_tokens_total',
+    'Tokens consommés par les appels LLM',
+    ('endpoint', 'model', 'type'),
+))
+
+LLM_ERRORS = registry.register(Counter(
+    'llm_errors_total',
+    'Erreurs des appels LLM',
+    ('endpoint', 'model'),
+))
+
+
+def record_llm_usage(endpoint, model, response):
+    """Enregistre les tokens d'une réponse LLM (format OpenAI/Groq)"""
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return {}
+    tokens = {
+        'prompt': getattr(usage, 'prompt_tokens', 0) or 0,
+        'completion': getattr(usage, 'completion_tokens', 0) or 0,
+    }
+    for token_type, amount in tokens.items():
+        LLM_TOKENS.inc(amount, endpoint=endpoint, model=model, type=token_type)
+    return tokens
+
+# ============================================================================
+# INTÉGRATION FLASK
+# ============================================================================
+
+def init_app(app):
+    """Chronomètre chaque requête et expose GET /api/metrics"""
+
+    @app.before_request
+    def _start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop('request_start', None)
+        if start is None:
+            return response
+        duration = time.perf_counter() - start
+        # url_rule = route template (évite l'explosion de labels sur /<path>)
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUEST_DURATION.observe(
+            duration,
+            endpoint=endpoint,
+            method=request.method,
+            status=response.status_code,
+        )
+        log_event(
+            'http_request',
+            method=request.method,
+            path=request.path,
+            endpoint=endpoint,
+            status=response.status_code,
+            duration_ms=round(duration * 1000, 2),
+        )
+        return response
+
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics():
+        """Métriques format Prometheus"""
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+    return app
@@ -0,0 +1,244 @@
+"""
+Exécution encadrée du SQL généré par LLM
+✅ Une seule instruction SELECT / WITH, verbes d'écriture / FOR UPDATE refusés
+✅ Tables autorisées: public_marts.* uniquement (vérifié sur le plan)
+✅ Fonctions sur liste blanche (texte de la requête + expressions du plan)
+✅ Rôle dédié non superutilisateur exigé (DB_READONLY_USER)
+✅ Coût EXPLAIN plafonné avant exécution
+✅ statement_timeout + plafond de lignes, transaction READ ONLY
+
+Objectif: une requête générée (jointure cartésienne, filtre manquant)
+ne doit jamais dégrader la latence du dashboard.
+"""
+
+import json
+import os
+import re
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+ALLOWED_SCHEMA = 'public_marts'
+MAX_PLAN_COST = float(os.getenv('SQL_GUARD_MAX_COST', '50000'))
+STATEMENT_TIMEOUT_MS = int(os.getenv('SQL_GUARD_TIMEOUT_MS', '5000'))
+MAX_ROWS = int(os.getenv('SQL_GUARD_MAX_ROWS', '1000'))
+
+# Verbes d'instruction seulement (CTE modifiante, SELECT INTO): les simples
+# mots (alias `comment`, `set`...) restent permis, la transaction READ ONLY
+# et la vérification du plan fournissent les garanties réelles
+FORBIDDEN_KEYWORDS = (
+    'insert', 'update', 'delete', 'merge', 'drop', 'alter', 'create',
+    'truncate', 'grant', 'revoke', 'into',
+)
+
+# Liste blanche: agrégats, fenêtres, calcul, texte, dates, types des casts.
+# Toute autre fonction (pg_*, lo_*, set_config, current_setting...) est refusée,
+# y compris entre guillemets ("pg_sleep") ou qualifiée (pg_catalog.pg_sleep)
+ALLOWED_FUNCTIONS = frozenset((
+    # Agrégats
+    'count', 'sum', 'avg', 'min', 'max', 'stddev', 'stddev_pop', 'stddev_samp',
+    'variance', 'var_pop', 'var_samp', 'corr', 'covar_pop', 'covar_samp',
+    'regr_slope', 'regr_intercept', 'regr_r2', 'percentile_cont', 'percentile_disc',
+    'mode', 'bool_and', 'bool_or', 'every', 'string_agg', 'array_agg', 'grouping',
+    # Fenêtres
+    'row_number', 'rank', 'dense_rank', 'percent_rank', 'cume_dist', 'ntile',
+    'lag', 'lead', 'first_value', 'last_value', 'nth_value',
+    # Conditionnels
+    'coalesce', 'nullif', 'greatest', 'least',
+    # Calcul
+    'abs', 'round', 'trunc', 'ceil', 'ceiling', 'floor', 'sign', 'sqrt', 'cbrt',
+    'power', 'exp', 'ln', 'log', 'log10', 'mod', 'div', 'width_bucket',
+    # Texte
+    'lower', 'upper', 'initcap', 'length', 'char_length', 'concat', 'concat_ws',
+    'substr', 'substring', 'left', 'right', 'trim', 'btrim', 'ltrim', 'rtrim',
+    'lpad', 'rpad', 'replace', 'split_part', 'position', 'strpos', 'format',
+    'to_char', 'to_number',
+    # Dates
+    'extract', 'date_part', 'date_trunc', 'make_date', 'to_date', 'age',
+    # Casts et types (numeric(10, 2), varchar(20)...)
+    'cast', 'numeric', 'decimal', 'varchar', 'char', 'character', 'float', 'interval',
+))
+
+# Mots SQL suivis d'une parenthèse qui ne sont pas des appels de fonction
+NON_FUNCTION_WORDS = frozenset((
+    'select', 'from', 'where', 'and', 'or', 'not', 'in', 'exists', 'as', 'on', 'join',
+    'using', 'lateral', 'over', 'filter', 'within', 'partition', 'by', 'group', 'order',
+    'having', 'values', 'any', 'all', 'some', 'case', 'when', 'then', 'else', 'is',
+    'like', 'ilike', 'between', 'distinct', 'union', 'intersect', 'except', 'limit',
+    'offset', 'with', 'recursive', 'materialized', 'array', 'row', 'rows', 'range',
+    'groups', 'sets', 'cube', 'rollup', 'returns',
+))
+
+# Expressions du plan EXPLAIN (VERBOSE) où un appel de fonction peut figurer
+PLAN_EXPRESSION_KEYS = (
+    'Output', 'Filter', 'Join Filter', 'Hash Cond', 'Merge Cond', 'Index Cond',
+    'Recheck Cond', 'One-Time Filter', 'Sort Key', 'Group Key', 'Presorted Key',
+    'Cache Key', 'Run Condition',
+)
+
+_KEYWORD_RE = re.compile(r'\b(' + '|'.join(FORBIDDEN_KEYWORDS) + r')\b', re.IGNORECASE)
+_LOCKING_RE = re.compile(r'\bfor\s+(?:no\s+key\s+update|key\s+share|update|share)\b', re.IGNORECASE)
+_IDENTIFIER_RE = re.compile(r'"(?:[^"]|"")*"')
+# Appel: [schéma.]nom(, noms éventuellement entre guillemets, hors casts (::numeric(10,2))
+_FUNCTION_RE = re.compile(
+    r'(?<!::)(?<![\w"])(?:("?)([A-Za-z_]\w*)\1\s*\.\s*)?("?)([A-Za-z_]\w*)\3\s*\('
+)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_LINE_COMMENT_RE = re.compile(r'--[^\n]*')
+_BLOCK_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+_QUALIFIED_TABLE_RE = re.compile(r'\b(?:from|join)\s+"?(\w+)"?\s*\.\s*"?(\w+)"?', re.IGNORECASE)
+
+
+class UnsafeQueryError(ValueError):
+    """Requête refusée par le garde-fou (avant ou après EXPLAIN)"""
+
+
+def check_functions(text: str):
+    """Refuse tout appel de fonction hors ALLOWED_FUNCTIONS (littéraux déjà neutralisés)"""
+    for schema_quote, schema, quote, name in _FUNCTION_RE.findall(text):
+        schema, name = schema.lower(), name.lower()
+        if not schema and not quote and name in NON_FUNCTION_WORDS:
+            continue
+        if name not in ALLOWED_FUNCTIONS or schema not in ('', 'pg_catalog'):
+            raise UnsafeQueryError(f"Fonction non autorisée: {schema + '.' if schema else ''}{name}")
+
+# ============================================================================
+# VALIDATION LEXICALE
+# ============================================================================
+
+def validate_sql(sql: str) -> str:
+    """
+    Vérifie qu'il s'agit d'un SELECT unique sur public_marts.
+    Retourne l'instruction nettoyée (sans commentaires ni ';' final).
+    """
+    if '$' in sql:
+        raise UnsafeQueryError("Dollar-quoting non autorisé")
+
+    statement = _BLOCK_COMMENT_RE.sub(' ', _LINE_COMMENT_RE.sub(' ', sql)).strip()
+    statement = statement.rstrip().rstrip(';').strip()
+    if not statement:
+        raise UnsafeQueryError("Requête vide")
+
+    # Analyse sur une copie où les littéraux chaîne sont neutralisés
+    masked = _STRING_RE.sub("''", statement)
+    if ';' in masked:
+        raise UnsafeQueryError("Une seule instruction autorisée")
+
+    first_word = masked.split(None, 1)[0].lower()
+    if first_word not in ('select', 'with'):
+        raise UnsafeQueryError("Seules les requêtes SELECT sont autorisées")
+
+    # Identifiants entre guillemets neutralisés eux aussi ("update" AS alias)
+    words = _IDENTIFIER_RE.sub('""', masked)
+    if _LOCKING_RE.search(words):
+        raise UnsafeQueryError("Verrouillage de lignes (FOR UPDATE/SHARE) non autorisé")
+
+    keyword = _KEYWORD_RE.search(words)
+    if keyword:
+        raise UnsafeQueryError(f"Mot-clé interdit: {keyword.group(1).upper()}")
+
+    check_functions(masked)
+
+    for schema, table in _QUALIFIED_TABLE_RE.findall(masked):
+        if schema.lower() != ALLOWED_SCHEMA:
+            raise UnsafeQueryError(f"Table non autorisée: {schema}.{table}")
+
+    return statement
+
+# ============================================================================
+# VÉRIFICATION DU PLAN
+# ============================================================================
+
+def iter_plan_nodes(plan):
+    """Parcourt récursivement les nœuds d'un plan EXPLAIN (FORMAT JSON)"""
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from iter_plan_nodes(child)
+
+
+def check_plan(plan, max_cost=MAX_PLAN_COST):
+    """
+    Refuse les plans trop coûteux, touchant hors de public_marts ou appelant
+    une fonction hors liste blanche (expressions VERBOSE de chaque nœud)
+    """
+    for node in iter_plan_nodes(plan):
+        relation = node.get('Relation Name')
+        if relation and node.get('Schema') != ALLOWED_SCHEMA:
+            raise UnsafeQueryError(f"Table non autorisée: {node.get('Schema')}.{relation}")
+        if node.get('Node Type') == 'Function Scan':
+            raise UnsafeQueryError("Fonctions génératrices de lignes non autorisées")
+        for key in PLAN_EXPRESSION_KEYS:
+            expressions = node.get(key) or []
+            for expression in [expressions] if isinstance(expressions, str) else expressions:
+                check_functions(_STRING_RE.sub("''", expression))
+
+    total_cost = float(plan.get('Total Cost', 0))
+    if total_cost > max_cost:
+        raise UnsafeQueryError(f"Coût estimé trop élevé ({total_cost:,.0f} > {max_cost:,.0f})")
+    return total_cost
+
+# ============================================================================
+# RÔLE DE CONNEXION
+# ============================================================================
+
+# Rôles prédéfinis donnant accès aux fichiers / programmes du serveur
+SERVER_ACCESS_ROLES = ('pg_read_server_files', 'pg_write_server_files', 'pg_execute_server_program')
+
+
+def check_readonly_role(conn):
+    """
+    Refuse d'exécuter du SQL généré avec un superutilisateur ou un rôle ayant
+    accès aux fichiers du serveur (cf. migrations/009_dashboard_readonly_role.sql)
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT current_user, r.rolsuper,
+                   bool_or(pg_has_role(current_user, s.role, 'MEMBER'))
+            FROM pg_roles r, unnest(%s::text[]) AS s(role)
+            WHERE r.rolname = current_user
+            GROUP BY current_user, r.rolsuper
+        """, (list(SERVER_ACCESS_ROLES),))
+        user, is_superuser, server_access = cursor.fetchone()
+    if is_superuser or server_access:
+        raise UnsafeQueryError(
+            f"Rôle '{user}' trop privilégié pour le SQL généré: configurer DB_READONLY_USER"
+        )
+    return user
+
+# ============================================================================
+# EXÉCUTION
+# ============================================================================
+
+def run_guarded_query(conn, sql, max_rows=MAX_ROWS, timeout_ms=STATEMENT_TIMEOUT_MS,
+                      max_cost=MAX_PLAN_COST):
+    """
+    Exécute `sql` dans une transaction READ ONLY annulée en fin d'appel.
+    `conn` doit être en autocommit (la transaction est ouverte ici).
+    Retourne (colonnes, lignes, tronqué).
+    """
+    statement = validate_sql(sql)
+
+    with conn.cursor() as cursor:
+        cursor.execute("BEGIN TRANSACTION READ ONLY")
+        try:
+            cursor.execute(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+            cursor.execute(f"SET LOCAL lock_timeout = {int(timeout_ms)}")
+
+            cursor.execute(f"EXPLAIN (FORMAT JSON, VERBOSE) {statement}")
+            explain = cursor.fetchone()[0]
+            if isinstance(explain, str):
+                explain = json.loads(explain)
+            check_plan(explain[0]['Plan'], max_cost)
+
+            # LIMIT côté serveur: la requête s'arrête au plafond
+            cursor.execute(
+                f"SELECT * FROM ({statement}) AS guarded_query LIMIT {int(max_rows) + 1}"
+            )
+            columns = [col[0] for col in cursor.description]
+            rows = cursor.fetchall()
+        finally:
+            cursor.execute("ROLLBACK")
+
+    truncated = len(rows) > max_rows
+    return columns, rows[:max_rows], truncated
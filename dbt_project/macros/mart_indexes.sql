@@ -0,0 +1,33 @@
+-- ============================================================================
+-- FILE: macros/mart_indexes.sql
+-- Index physiques des marts, créés en post-hook.
+--
+-- Les tables dbt sont reconstruites via __dbt_tmp puis renommées: un index
+-- nommé resterait attaché à l'ancienne table (__dbt_backup). Lors d'une
+-- reconstruction complète, on supprime donc l'index du même nom avant de le
+-- recréer sur {{ this }}. Un run incrémental garde ses index existants.
+-- ============================================================================
+
+{% macro is_full_rebuild() %}
+    {{ return(config.get('materialized') != 'incremental' or flags.FULL_REFRESH) }}
+{% endmacro %}
+
+
+{% macro mart_index(suffix, columns, include=none, unique=false) %}
+    {%- set index_name = this.identifier ~ '_' ~ suffix ~ '_idx' -%}
+    {%- if is_full_rebuild() %}
+    drop index if exists {{ this.schema }}.{{ index_name }};
+    {%- endif %}
+    create {{ 'unique ' if unique }}index if not exists {{ index_name }}
+        on {{ this }} ({{ columns | join(', ') }})
+        {%- if include %} include ({{ include | join(', ') }}){% endif %}
+{% endmacro %}
+
+
+{% macro cluster_and_analyze(suffix) %}
+    {#- CLUSTER réécrit la table: seulement après reconstruction complète -#}
+    {%- if is_full_rebuild() %}
+    cluster {{ this }} using {{ this.identifier ~ '_' ~ suffix ~ '_idx' }};
+    {%- endif %}
+    analyze {{ this }}
+{% endmacro %}
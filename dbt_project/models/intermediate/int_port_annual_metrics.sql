@@ -0,0 +1,87 @@
+-- ============================================================================
+-- FILE: models/intermediate/int_port_annual_metrics.sql
+-- Un seul passage fenêtré sur mart_port_annual_summary:
+-- lags, YoY, parts de marché, rangs et couverture.
+-- mart_port_trends / mart_port_comparison / mart_data_quality en sont
+-- des projections (un seul scan du résumé annuel par dbt run).
+-- ============================================================================
+
+{{ config(
+    materialized='table',
+    schema='intermediate',
+    tags=['intermediate', 'ports']
+) }}
+
+with annual_data as (
+    select
+        port_code,
+        port_name,
+        country,
+        year,
+        total_tonnage_mt,
+        total_teus,
+        num_records,
+        records_with_tonnage,
+        records_with_teus,
+        source_grain,
+        completeness_ratio
+    from {{ ref('mart_port_annual_summary') }}
+),
+
+windowed as (
+    select
+        port_code,
+        port_name,
+        country,
+        year,
+        total_tonnage_mt,
+        total_teus,
+        num_records,
+        records_with_tonnage,
+        records_with_teus,
+        source_grain,
+        completeness_ratio,
+        lag(total_tonnage_mt) over w_port as prev_tonnage_mt,
+        lag(total_teus) over w_port as prev_teus,
+        sum(total_tonnage_mt) over w_year as year_total_tonnage_mt,
+        sum(total_teus) over w_year as year_total_teus,
+        rank() over w_year_tonnage as tonnage_rank,
+        rank() over w_year_teus as teu_rank,
+        max(year) over () as latest_year
+    from annual_data
+    window
+        w_port as (partition by port_code order by year),
+        w_year as (partition by year),
+        w_year_tonnage as (partition by year order by total_tonnage_mt desc),
+        w_year_teus as (partition by year order by total_teus desc)
+)
+
+select
+    port_code,
+    port_name,
+    country,
+    year,
+    total_tonnage_mt,
+    total_teus,
+    prev_tonnage_mt,
+    prev_teus,
+    round(100.0 * (total_tonnage_mt - prev_tonnage_mt) / nullif(prev_tonnage_mt, 0), 2) as tonnage_yoy_pct,
+    round(100.0 * (total_teus - prev_teus) / nullif(prev_teus, 0), 2) as teu_yoy_pct,
+    round(100.0 * total_tonnage_mt / nullif(year_total_tonnage_mt, 0), 2) as tonnage_market_share_pct,
+    round(100.0 * total_teus / nullif(year_total_teus, 0), 2) as teu_market_share_pct,
+    tonnage_rank,
+    teu_rank,
+    year = latest_year as is_latest_year,
+    num_records,
+    records_with_tonnage,
+    records_with_teus,
+    round(100.0 * records_with_tonnage / nullif(num_records, 0), 2) as tonnage_coverage_pct,
+    round(100.0 * records_with_teus / nullif(num_records, 0), 2) as teu_coverage_pct,
+    source_grain,
+    completeness_ratio,
+    case
+        when records_with_tonnage > 0 then 'HIGH'
+        when records_with_teus > 0 then 'MEDIUM'
+        else 'LOW'
+    end as quality_level
+from windowed
@@ -1,9 +1,14 @@
 {{ config(
     materialized='table',
     schema='marts',
+    post_hook=[
+        "{{ mart_index('year_port', ['year', 'port_code'], include=['tonnage_coverage_pct', 'quality_level']) }}",
+        "{{ cluster_and_analyze('year_port') }}"
+    ],
     tags=['marts', 'quality']
 ) }}
 
+-- Projection de int_port_annual_metrics (couverture, complétude + niveau qualité)
 select
     port_code,
     port_name,
@@ -12,12 +17,10 @@ select
     records_with_tonnage,
     records_with_teus,
     num_records,
-    round(100.0 * records_with_tonnage / nullif(num_records, 0), 2) as tonnage_coverage_pct,
-    round(100.0 * records_with_teus / nullif(num_records, 0), 2) as teu_coverage_pct,
-    case
-        when records_with_tonnage > 0 then 'HIGH'
-        when records_with_teus > 0 then 'MEDIUM'
-        else 'LOW'
-    end as quality_level
-from {{ ref('mart_port_annual_summary') }}
-order by port_code, year
\ No newline at end of file
+    tonnage_coverage_pct,
+    teu_coverage_pct,
+    source_grain,
+    completeness_ratio,
+    quality_level
+from {{ ref('int_port_annual_metrics') }}
+order by port_code, year
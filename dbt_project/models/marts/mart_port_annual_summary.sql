@@ -1,20 +1,39 @@
+-- ============================================================================
+-- Lit les totaux précalculés agg_port_annual_rollup (loader, granularité
+-- mixte résolue: pas de double comptage annuel + trimestriel, complétude).
+-- Incrémental: seuls les groupes (port_id, year) dont l'agrégat a changé
+-- depuis le dernier run (updated_at) sont fusionnés.
+-- Suppressions / renommage dim_port, changement de colonnes:
+--   python src/loading/load_postgres.py --rollup-scope full
+--   dbt run --full-refresh -s mart_port_annual_summary
+-- ============================================================================
+
 {{ config(
-    materialized='table',
+    materialized='incremental',
+    incremental_strategy='merge',
+    unique_key=['port_id', 'year'],
+    on_schema_change='append_new_columns',
     schema='marts',
+    post_hook=[
+        "{{ mart_index('port_year', ['port_id', 'year'], unique=true) }}",
+        "{{ mart_index('year_port', ['year', 'port_code']) }}",
+        "{{ mart_index('year_tonnage_cov', ['year desc', 'total_tonnage_mt desc'], include=['port_code', 'total_teus']) }}",
+        "{{ cluster_and_analyze('year_port') }}"
+    ],
     tags=['marts', 'ports', 'summary']
 ) }}
 
-with traffic_data as (
-    select
-        port_id,
-        year,
-        tonnage_mt,
-        teus,
-        num_vessels,
-        has_tonnage,
-        has_teus,
-        quality_flag_id
-    from {{ ref('stg_port_traffic') }}
+with
+
+rollup as (
+    select *
+    from {{ ref('stg_port_annual_rollup') }}
+    {% if is_incremental() %}
+    where updated_at > (
+        select coalesce(max(source_updated_at), '1900-01-01'::timestamp)
+        from {{ this }}
+    )
+    {% endif %}
 ),
 
 port_info as (
@@ -23,22 +42,32 @@ port_info as (
 
 annual_stats as (
     select
-        t.port_id,
+        r.port_id,
         p.port_code,
         p.port_name,
         p.country,
-        t.year,
-        sum(t.tonnage_mt) as total_tonnage_mt,
-        avg(t.tonnage_mt) as avg_tonnage_mt,
-        sum(t.teus) as total_teus,
-        sum(t.num_vessels) as total_vessels,
-        count(*) as num_records,
-        sum(case when t.has_tonnage then 1 else 0 end) as records_with_tonnage,
-        sum(case when t.has_teus then 1 else 0 end) as records_with_teus,
+        r.year,
+        r.tonnage_mt as total_tonnage_mt,
+        -- Moyenne par période retenue (granularité source_grain), pas sur toutes
+        -- les lignes brutes comme l'ancien avg_tonnage_mt (annuel + trimestres mêlés)
+        round(r.tonnage_mt / nullif(r.records_with_tonnage, 0), 2) as avg_period_tonnage_mt,
+        r.teus as total_teus,
+        r.num_vessels as total_vessels,
+        r.num_records,
+        r.records_with_tonnage,
+        r.records_with_teus,
+        r.source_grain,
+        r.periods_observed,
+        r.periods_expected,
+        r.completeness_ratio,
+        r.tonnage_mt_annualized,
+        r.teus_annualized,
+        r.estimated_records,
+        r.discarded_rows,
+        r.updated_at as source_updated_at,
         current_timestamp as created_at
-    from traffic_data t
-    join port_info p on t.port_id = p.port_id
-    group by t.port_id, p.port_code, p.port_name, p.country, t.year
+    from rollup r
+    join port_info p on r.port_id = p.port_id
 )
 
-select * from annual_stats
\ No newline at end of file
+select * from annual_stats
@@ -1,36 +1,26 @@
 {{ config(
     materialized='table',
     schema='marts',
+    post_hook=[
+        "{{ mart_index('year_port', ['year', 'port_code']) }}",
+        "{{ mart_index('year_tonnage_cov', ['year desc', 'total_tonnage_mt desc'], include=['port_code', 'tonnage_market_share_pct', 'total_teus', 'teu_market_share_pct', 'tonnage_rank']) }}",
+        "{{ cluster_and_analyze('year_port') }}"
+    ],
     tags=['marts', 'comparison']
 ) }}
 
-with latest_year_data as (
-    select
-        port_id,
-        port_code,
-        port_name,
-        country,
-        year,
-        total_tonnage_mt,
-        total_teus
-    from {{ ref('mart_port_annual_summary') }}
-    where year = (select max(year) from {{ ref('mart_port_annual_summary') }})
-),
-
-market_share as (
-    select
-        port_code,
-        port_name,
-        country,
-        year,
-        total_tonnage_mt,
-        total_teus,
-        round(100.0 * total_tonnage_mt / nullif(sum(total_tonnage_mt) over (), 0), 2) as tonnage_market_share_pct,
-        round(100.0 * total_teus / nullif(sum(total_teus) over (), 0), 2) as teu_market_share_pct,
-        rank() over (order by total_tonnage_mt desc) as tonnage_rank,
-        rank() over (order by total_teus desc) as teu_rank
-    from latest_year_data
-)
-
-select * from market_share
-order by tonnage_rank
\ No newline at end of file
+-- Projection de int_port_annual_metrics: dernière année disponible
+select
+    port_code,
+    port_name,
+    country,
+    year,
+    total_tonnage_mt,
+    total_teus,
+    tonnage_market_share_pct,
+    teu_market_share_pct,
+    tonnage_rank,
+    teu_rank
+from {{ ref('int_port_annual_metrics') }}
+where is_latest_year
+order by tonnage_rank
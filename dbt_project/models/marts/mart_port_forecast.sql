@@ -0,0 +1,31 @@
+{{ config(
+    materialized='table',
+    schema='marts',
+    post_hook=[
+        "{{ mart_index('metric_year_port', ['metric', 'year', 'port_code'], include=['forecast', 'lower_bound', 'upper_bound']) }}",
+        "{{ cluster_and_analyze('metric_year_port') }}"
+    ],
+    tags=['marts', 'forecast']
+) }}
+
+-- Projections précalculées par le loader (agg_port_forecast): tendance
+-- linéaire par port + intervalle de prévision, aucun calcul côté LLM
+select
+    p.port_code,
+    p.port_name,
+    p.country,
+    f.metric,
+    f.year,
+    f.forecast,
+    f.lower_bound,
+    f.upper_bound,
+    f.confidence_level,
+    f.method,
+    f.n_points,
+    f.first_year,
+    f.last_year,
+    f.slope,
+    f.refreshed_at
+from {{ source('raw', 'agg_port_forecast') }} f
+join {{ ref('stg_dim_port') }} p on f.port_id = p.port_id
+order by f.metric, f.year, f.forecast desc
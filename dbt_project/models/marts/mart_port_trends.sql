@@ -1,35 +1,15 @@
 {{ config(
     materialized='table',
     schema='marts',
+    post_hook=[
+        "{{ mart_index('year_port', ['year', 'port_code']) }}",
+        "{{ mart_index('year_yoy_cov', ['year desc', 'tonnage_yoy_pct desc'], include=['port_code', 'total_tonnage_mt']) }}",
+        "{{ cluster_and_analyze('year_port') }}"
+    ],
     tags=['marts', 'trends']
 ) }}
 
-with annual_data as (
-    select
-        port_code,
-        port_name,
-        country,
-        year,
-        total_tonnage_mt,
-        total_teus
-    from {{ ref('mart_port_annual_summary') }}
-),
-
-with_lag as (
-    select
-        port_code,
-        port_name,
-        country,
-        year,
-        total_tonnage_mt,
-        total_teus,
-        lag(total_tonnage_mt) over (partition by port_code order by year) as prev_tonnage_mt,
-        lag(total_teus) over (partition by port_code order by year) as prev_teus,
-        round(100.0 * (total_tonnage_mt - lag(total_tonnage_mt) over (partition by port_code order by year)) / nullif(lag(total_tonnage_mt) over (partition by port_code order by year), 0), 2) as tonnage_yoy_pct,
-        round(100.0 * (total_teus - lag(total_teus) over (partition by port_code order by year)) / nullif(lag(total_teus) over (partition by port_code order by year), 0), 2) as teu_yoy_pct
-    from annual_data
-)
-
+-- Projection de int_port_annual_metrics (lags/YoY calculés une seule fois)
 select
     port_code,
     port_name,
@@ -40,6 +20,6 @@ select
     total_teus,
     teu_yoy_pct,
     current_timestamp as created_at
-from with_lag
+from {{ ref('int_port_annual_metrics') }}
 where year > 2020
-order by port_code, year
\ No newline at end of file
+order by port_code, year
@@ -0,0 +1,35 @@
+-- ============================================================================
+-- FILE: models/staging/stg_port_annual_rollup.sql
+-- Totaux annuels précalculés par le loader (src/analytics/rollups.py):
+-- granularité retenue par (port, année), sans double comptage annuel +
+-- trimestriel, avec taux de complétude.
+-- ============================================================================
+
+{{ config(
+    materialized='view',
+    schema='staging',
+    tags=['staging', 'traffic']
+) }}
+
+select
+    port_id,
+    year,
+    source_grain,
+    periods_expected,
+    periods_observed,
+    completeness_ratio,
+    coalesce(tonnage_mt, 0) as tonnage_mt,
+    tonnage_mt_annualized,
+    coalesce(teus, 0) as teus,
+    teus_annualized,
+    coalesce(num_vessels, 0) as num_vessels,
+    num_records,
+    records_with_tonnage,
+    records_with_teus,
+    verified_records,
+    estimated_records,
+    discarded_rows,
+    updated_at
+from {{ source('raw', 'agg_port_annual_rollup') }}
+where port_id is not null
+    and year is not null
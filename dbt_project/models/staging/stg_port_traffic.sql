@@ -15,6 +15,7 @@ with source_data as (
         quality_flag_id,
         year,
         quarter,
+        month,
         tonnage_mt,
         imports_mt,
         exports_mt,
@@ -42,6 +43,7 @@ enriched as (
         quality_flag_id,
         year,
         quarter,
+        month,
         coalesce(tonnage_mt, 0) as tonnage_mt,
         coalesce(imports_mt, 0) as imports_mt,
         coalesce(exports_mt, 0) as exports_mt,
@@ -58,6 +60,7 @@ enriched as (
         created_at,
         updated_at,
         case 
+            when month is not null then 'M' || lpad(month::text, 2, '0')
             when quarter is not null then 'Q' || quarter
             else 'ANNUAL'
         end as period_type,
@@ -0,0 +1,139 @@
+"""
+Projections annuelles par port (tendance linéaire, tous les ports en un lot)
+Table précalculée agg_port_forecast, rafraîchie par le loader après les
+agrégats annuels (agg_port_annual_rollup) et exposée par mart_port_forecast.
+
+Modèle: moindres carrés pondérés y = a + b × année, par (port, indicateur),
+calculés par sommes groupées (aucune boucle par port):
+  - valeurs annualisées (années partielles) pondérées par completeness_ratio
+  - années entièrement ESTIMATED (interpolées depuis les autres points)
+    écartées dès qu'une année observée existe: elles resserreraient
+    artificiellement l'intervalle
+  - intervalle de prévision t de Student (niveau CONFIDENCE_LEVEL)
+  - 2 points: droite sans intervalle; 1 point: valeur reconduite (naive)
+"""
+
+import numpy as np
+import pandas as pd
+
+FORECAST_TABLE = 'agg_port_forecast'
+METRICS = {'tonnage_mt': 'tonnage_mt_annualized', 'teus': 'teus_annualized'}
+CONFIDENCE_LEVEL = 0.95
+
+# Quantiles t de Student à 97.5% (intervalle bilatéral 95%) par degrés de liberté
+T_TABLE_DOF = np.array([1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 12, 15, 20, 30, 60, 120])
+T_TABLE_975 = np.array([12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306,
+                        2.262, 2.228, 2.179, 2.131, 2.086, 2.042, 2.000, 1.980])
+
+FORECAST_COLUMNS = [
+    'port_id', 'metric', 'year', 'forecast', 'lower_bound', 'upper_bound',
+    'confidence_level', 'method', 'n_points', 'first_year', 'last_year', 'slope',
+]
+
+
+def t_quantile(dof):
+    """Quantile t (97.5%) interpolé; loi normale au-delà de la table"""
+    dof = np.asarray(dof, dtype=float)
+    return np.where(dof > T_TABLE_DOF[-1], 1.96, np.interp(dof, T_TABLE_DOF, T_TABLE_975))
+
+
+def history_from_rollup(rollup):
+    """Format long (port_id, metric, year, value, weight) depuis agg_port_annual_rollup"""
+    weight = pd.to_numeric(rollup['completeness_ratio'], errors='coerce').fillna(1.0)
+    estimated = (rollup['estimated_records'] >= rollup['num_records']).to_numpy()
+    parts = [
+        pd.DataFrame({
+            'port_id': rollup['port_id'],
+            'metric': metric,
+            'year': rollup['year'].astype(int),
+            'value': pd.to_numeric(rollup[column], errors='coerce'),
+            'weight': weight,
+            'estimated': estimated,
+        })
+        for metric, column in METRICS.items()
+    ]
+    history = pd.concat(parts, ignore_index=True).dropna(subset=['value'])
+    observed = (~history['estimated']).groupby([history['port_id'], history['metric']]).transform('any')
+    return history[~history['estimated'] | ~observed].drop(columns='estimated')
+
+
+def fit_trends(history):
+    """Un modèle par (port_id, metric): coefficients, résidus et effectifs"""
+    keys = ['port_id', 'metric']
+    h = history.assign(
+        wx=history['weight'] * history['year'],
+        wy=history['weight'] * history['value'],
+        wxx=history['weight'] * history['year'] ** 2,
+        wxy=history['weight'] * history['year'] * history['value'],
+    )
+    sums = h.groupby(keys)[['weight', 'wx', 'wy', 'wxx', 'wxy']].sum()
+    stats = h.groupby(keys).agg(n_points=('year', 'size'), first_year=('year', 'min'),
+                                last_year=('year', 'max'))
+    models = sums.join(stats)
+
+    x_mean = models['wx'] / models['weight']
+    y_mean = models['wy'] / models['weight']
+    sxx = models['wxx'] - models['weight'] * x_mean ** 2
+    sxy = models['wxy'] - models['weight'] * x_mean * y_mean
+    models['slope'] = np.where(sxx > 1e-9, sxy / sxx.where(sxx > 1e-9), 0.0)
+    models['intercept'] = y_mean - models['slope'] * x_mean
+    models['x_mean'] = x_mean
+    models['sxx'] = sxx
+
+    # Résidus pondérés (une jointure, pas de boucle)
+    fitted = h.join(models[['slope', 'intercept']], on=keys)
+    residual = fitted['value'] - (fitted['intercept'] + fitted['slope'] * fitted['year'])
+    models['sse'] = (fitted['weight'] * residual ** 2).groupby([fitted[k] for k in keys]).sum()
+
+    # Dernière valeur observée (repli naive)
+    last = h.sort_values('year').groupby(keys)['value'].last()
+    models['last_value'] = last
+    return models
+
+
+def forecast(history, target_years, level=CONFIDENCE_LEVEL):
+    """Prévisions + intervalles pour chaque (port, indicateur) × année cible"""
+    if level != CONFIDENCE_LEVEL:
+        raise ValueError(f"Niveau de confiance non tabulé: {level} (disponible: {CONFIDENCE_LEVEL})")
+    if history.empty:
+        return pd.DataFrame(columns=FORECAST_COLUMNS)
+
+    models = fit_trends(history).reset_index()
+    target_years = np.asarray(sorted(target_years))
+    grid = models.loc[models.index.repeat(len(target_years))].reset_index(drop=True)
+    grid['year'] = np.tile(target_years, len(models))
+
+    n = grid['n_points'].to_numpy()
+    dof = n - 2
+    trend = grid['intercept'] + grid['slope'] * grid['year']
+    point = np.where(n >= 2, trend, grid['last_value'])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sigma2 = np.where(dof > 0, grid['sse'] / np.maximum(dof, 1), np.nan)
+        spread = np.sqrt(sigma2 * (1 + 1 / grid['weight'] + (grid['year'] - grid['x_mean']) ** 2
+                                   / grid['sxx'].where(grid['sxx'] > 1e-9)))
+    margin = t_quantile(np.maximum(dof, 1)) * spread
+
+    result = pd.DataFrame({
+        'port_id': grid['port_id'],
+        'metric': grid['metric'],
+        'year': grid['year'],
+        'forecast': np.clip(point, 0, None).round(2),
+        'lower_bound': np.clip(point - margin, 0, None).round(2),
+        'upper_bound': (point + margin).round(2),
+        'confidence_level': np.where(dof > 0, level, np.nan),
+        'method': np.select([n >= 3, n == 2], ['linear_ols', 'linear_2pts'], default='naive'),
+        'n_points': n,
+        'first_year': grid['first_year'],
+        'last_year': grid['last_year'],
+        'slope': np.where(n >= 2, grid['slope'], np.nan).round(2),
+    })
+    return result[FORECAST_COLUMNS]
+
+
+def target_years_after(history, horizon=1):
+    """Années cibles: les `horizon` années suivant la dernière année connue (tous ports)"""
+    if history.empty:
+        return []
+    latest = int(history['year'].max())
+    return list(range(latest + 1, latest + 1 + horizon))
@@ -0,0 +1,216 @@
+"""
+Insights précalculés (déterministes, sans LLM) par snapshot de données
+Calculés une fois par version des marts, à partir des totaux annuels
+(mart_port_annual_summary) et de la qualité (mart_data_quality):
+
+  leaders       : premier port par indicateur, part de marché, avance sur le 2e
+  movers        : plus fortes hausses / baisses sur un an
+  share_shifts  : gains / pertes de part de marché (points)
+  anomalies     : variations annuelles hors norme (toutes années)
+  coverage_gaps : indicateur absent la dernière année, couverture incomplète
+
+Sorties:
+  digest(insights) : résumé texte compact pour les prompts LLM (remplace
+                     l'envoi des lignes brutes)
+  cards(insights)  : phrases prêtes à afficher, sans aucun appel LLM
+
+Tout est calculé sur des tableaux port × année (pivot), sans boucle par port.
+"""
+
+import numpy as np
+import pandas as pd
+
+METRICS = {
+    'total_tonnage_mt': ('tonnage', 't'),
+    'total_teus': ('conteneurs', 'TEU'),
+}
+ANOMALY_MIN_PCT = 25.0    # |variation annuelle| à partir de laquelle un point est signalé
+TOP_N = 2                 # hausses / baisses / glissements retenus par indicateur
+MAX_ANOMALIES = 5
+COMPACT_MAX_ROWS = 20
+
+
+def format_volume(value):
+    """1234567 -> '1.23M', 12345 -> '12,345'"""
+    return f"{value / 1_000_000:.2f}M" if abs(value) >= 1_000_000 else f"{value:,.0f}"
+
+
+def _signed(value, suffix):
+    return f"{'+' if value >= 0 else ''}{value:.1f}{suffix}"
+
+
+def _wide(annual, column):
+    """
+    Tableau port × année d'un indicateur (NaN = non renseigné).
+    0 = non renseigné: stg_port_annual_rollup remplace les totaux absents par 0
+    """
+    values = pd.to_numeric(annual[column], errors='coerce').replace(0, np.nan)
+    return values.groupby([annual['port_code'], annual['year']]).sum(min_count=1).unstack('year').sort_index(axis=1)
+
+
+def _records(frame, columns):
+    return [
+        {key: (value.item() if isinstance(value, np.generic) else value) for key, value in row.items()}
+        for row in frame[columns].to_dict('records')
+    ]
+
+
+def compute_insights(annual, quality=None):
+    """
+    annual  : port_code, year, total_tonnage_mt, total_teus (une ligne par port et année)
+    quality : port_code, year, tonnage_coverage_pct (facultatif)
+    """
+    if annual.empty:
+        return {'year': None, 'previous_year': None, 'leaders': [], 'movers': [],
+                'share_shifts': [], 'anomalies': [], 'coverage_gaps': []}
+
+    annual = annual.assign(year=annual['year'].astype(int))
+    year = int(annual['year'].max())
+    previous = year - 1
+    insights = {'year': year, 'previous_year': previous, 'leaders': [], 'movers': [],
+                'share_shifts': [], 'anomalies': [], 'coverage_gaps': []}
+
+    for column, (label, unit) in METRICS.items():
+        wide = _wide(annual, column)
+        if year not in wide.columns:
+            continue
+        shares = wide / wide.sum(axis=0).replace(0, np.nan) * 100
+        yoy = (wide.pct_change(axis=1, fill_method=None) * 100).replace([np.inf, -np.inf], np.nan)
+        # Une variation n'a de sens qu'entre deux années consécutives renseignées
+        consecutive = pd.Series(wide.columns, index=wide.columns).diff().eq(1)
+        yoy = yoy.loc[:, consecutive]
+
+        current = pd.DataFrame({
+            'value': wide[year],
+            'share_pct': shares[year],
+            'previous': wide[previous] if previous in wide.columns else np.nan,
+        }).dropna(subset=['value'])
+        current['yoy_pct'] = (current['value'] / current['previous'].replace(0, np.nan) - 1) * 100
+        # Glissement calculé sur les ports renseignés les deux années: un port
+        # absent ne gonfle pas artificiellement la part des autres
+        if previous in wide.columns:
+            both = wide[[previous, year]].dropna()
+            both_shares = both / both.sum(axis=0).replace(0, np.nan) * 100
+            current['shift_pp'] = (both_shares[year] - both_shares[previous]).reindex(current.index)
+        else:
+            current['shift_pp'] = np.nan
+        current = current.reset_index().assign(metric=column, label=label, unit=unit)
+
+        # Leader: premier port et avance sur le deuxième (points de part)
+        ranked = current.dropna(subset=['share_pct']).sort_values('value', ascending=False)
+        if not ranked.empty:
+            leader = ranked.iloc[:1].assign(
+                lead_pp=ranked['share_pct'].iloc[0] - (ranked['share_pct'].iloc[1] if len(ranked) > 1 else 0)
+            )
+            insights['leaders'] += _records(leader, ['metric', 'label', 'unit', 'port_code', 'value',
+                                                     'share_pct', 'lead_pp'])
+
+        # Plus fortes hausses / baisses, puis glissements de part de marché
+        moving = current.dropna(subset=['yoy_pct']).sort_values('yoy_pct', ascending=False)
+        movers = pd.concat([moving[moving['yoy_pct'] > 0].head(TOP_N),
+                            moving[moving['yoy_pct'] < 0].tail(TOP_N).iloc[::-1]])
+        insights['movers'] += _records(movers, ['metric', 'label', 'unit', 'port_code', 'value',
+                                                'previous', 'yoy_pct'])
+        shifting = current.dropna(subset=['shift_pp'])
+        shifting = shifting.reindex(shifting['shift_pp'].abs().sort_values(ascending=False).index)
+        insights['share_shifts'] += _records(shifting[shifting['shift_pp'].abs() >= 0.05].head(TOP_N),
+                                             ['metric', 'label', 'port_code', 'share_pct', 'shift_pp'])
+
+        # Anomalies: toutes les années, seuil absolu
+        jumps = yoy.stack().rename('yoy_pct').reset_index()
+        jumps = jumps[jumps['yoy_pct'].abs() >= ANOMALY_MIN_PCT].assign(metric=column, label=label)
+        insights['anomalies'] += _records(jumps, ['metric', 'label', 'port_code', 'year', 'yoy_pct'])
+
+        # Trous: port connu les années précédentes mais absent la dernière année
+        missing = wide.index[wide[year].isna() & wide.drop(columns=year).notna().any(axis=1)]
+        insights['coverage_gaps'] += [
+            {'port_code': port, 'year': year, 'issue': f"{label} non renseigné"} for port in missing
+        ]
+
+    insights['anomalies'] = sorted(insights['anomalies'], key=lambda a: -abs(a['yoy_pct']))[:MAX_ANOMALIES]
+
+    if quality is not None and not quality.empty:
+        coverage = pd.to_numeric(quality['tonnage_coverage_pct'], errors='coerce')
+        partial = quality[(quality['year'].astype(int) == year) & (coverage < 100)]
+        insights['coverage_gaps'] += [
+            {'port_code': row.port_code, 'year': year,
+             'issue': f"couverture tonnage {float(row.tonnage_coverage_pct):.0f}%"}
+            for row in partial.itertuples(index=False)
+        ]
+    return insights
+
+
+def digest(insights):
+    """Résumé compact (quelques lignes) destiné aux prompts LLM"""
+    if insights['year'] is None:
+        return "Aucune donnée disponible."
+
+    lines = [f"Année {insights['year']} (vs {insights['previous_year']})"]
+    if insights['leaders']:
+        lines.append("Leaders: " + "; ".join(
+            f"{l['label']} {l['port_code']} {format_volume(l['value'])} {l['unit']} "
+            f"({l['share_pct']:.1f}% part, +{l['lead_pp']:.1f} pts sur le 2e)"
+            for l in insights['leaders']
+        ))
+    if insights['movers']:
+        lines.append("Variations: " + "; ".join(
+            f"{m['label']} {m['port_code']} {_signed(m['yoy_pct'], '%')}" for m in insights['movers']
+        ))
+    if insights['share_shifts']:
+        lines.append("Parts de marché: " + "; ".join(
+            f"{s['label']} {s['port_code']} {_signed(s['shift_pp'], ' pts')} ({s['share_pct']:.1f}%)"
+            for s in insights['share_shifts']
+        ))
+    if insights['anomalies']:
+        lines.append("Anomalies: " + "; ".join(
+            f"{a['port_code']} {a['year']} {a['label']} {_signed(a['yoy_pct'], '%')}"
+            for a in insights['anomalies']
+        ))
+    if insights['coverage_gaps']:
+        lines.append("Couverture: " + "; ".join(
+            f"{g['port_code']} {g['year']} {g['issue']}" for g in insights['coverage_gaps']
+        ))
+    return "\n".join(lines)
+
+
+def cards(insights, limit=3):
+    """Phrases d'insights affichables telles quelles (aucun appel LLM)"""
+    sentences = []
+    for l in insights['leaders']:
+        sentences.append(
+            f"{l['port_code']} est en tête ({l['label']}) en {insights['year']} avec "
+            f"{format_volume(l['value'])} {l['unit']} ({l['share_pct']:.1f}% du total régional, "
+            f"{l['lead_pp']:.1f} points d'avance sur le deuxième)."
+        )
+    for m in sorted(insights['movers'], key=lambda m: -abs(m['yoy_pct']))[:1]:
+        sentences.append(
+            f"Plus forte variation: {m['port_code']} ({m['label']}) {_signed(m['yoy_pct'], '%')} "
+            f"sur un an, de {format_volume(m['previous'])} à {format_volume(m['value'])} {m['unit']}."
+        )
+    for s in insights['share_shifts'][:1]:
+        direction = 'gagne' if s['shift_pp'] >= 0 else 'perd'
+        sentences.append(
+            f"{s['port_code']} {direction} {abs(s['shift_pp']):.1f} points de part de marché "
+            f"({s['label']}), à {s['share_pct']:.1f}%."
+        )
+    for a in insights['anomalies'][:1]:
+        sentences.append(
+            f"Variation atypique: {a['port_code']} {a['year']} ({a['label']}) "
+            f"{_signed(a['yoy_pct'], '%')}, à vérifier avant interprétation."
+        )
+    if insights['coverage_gaps']:
+        gaps = ", ".join(f"{g['port_code']} ({g['issue']})" for g in insights['coverage_gaps'][:3])
+        sentences.append(f"Données incomplètes en {insights['year']}: {gaps}.")
+    return sentences[:limit]
+
+
+def compact_table(df, max_rows=COMPACT_MAX_ROWS):
+    """Résultat de requête en CSV arrondi et tronqué (au lieu de df.to_string())"""
+    rounded = df.head(max_rows).apply(
+        lambda column: pd.to_numeric(column, errors='coerce').round(2)
+        if pd.to_numeric(column, errors='coerce').notna().sum() == column.notna().sum() else column
+    )
+    text = rounded.to_csv(index=False, float_format='%.15g').strip()
+    if len(df) > max_rows:
+        text += f"\n... ({len(df) - max_rows} lignes de plus)"
+    return text
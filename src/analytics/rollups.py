@@ -0,0 +1,83 @@
+"""
+Agrégation annuelle à granularité mixte (annuel / trimestriel / mensuel)
+Table précalculée agg_port_annual_rollup, lue par mart_port_annual_summary.
+
+Règles par (port, année):
+  - la granularité la plus grossière présente fait foi (annuel > trimestriel
+    > mensuel): les lignes plus fines sont écartées (discarded_rows), plus de
+    double comptage annuel + trimestres
+  - total = somme des périodes retenues; completeness_ratio = périodes
+    distinctes / périodes attendues (1, 4, 12)
+  - *_annualized = total / couverture de l'indicateur (trimestres partiels)
+
+Le calcul est un groupby unique sur toutes les clés (pas de boucle par port).
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.quality.gap_filling import GRAINS, record_grain
+
+ROLLUP_TABLE = 'agg_port_annual_rollup'
+INDICATORS = ['tonnage_mt', 'teus', 'num_vessels']
+GRAIN_RANK = {grain: rank for rank, grain in enumerate(GRAINS)}
+
+ROLLUP_COLUMNS = [
+    'port_id', 'year', 'source_grain', 'periods_expected', 'periods_observed',
+    'completeness_ratio', 'tonnage_mt', 'tonnage_mt_annualized', 'teus',
+    'teus_annualized', 'num_vessels', 'num_records', 'records_with_tonnage',
+    'records_with_teus', 'verified_records', 'estimated_records', 'discarded_rows',
+]
+
+
+def annual_rollup(df, keys=('port_id', 'year')):
+    """
+    Une ligne par clé (port, année) à partir de lignes de faits mêlant les
+    granularités. Colonnes attendues: keys, quarter, [month], INDICATORS,
+    data_quality_flag.
+    """
+    keys = list(keys)
+    grains = record_grain(df)
+    rank = grains.map(GRAIN_RANK)
+    chosen = rank.groupby([df[key] for key in keys]).transform('min')
+    kept = (rank == chosen).to_numpy()
+
+    facts = df.loc[kept, keys + INDICATORS].copy()
+    for column in INDICATORS:
+        facts[column] = pd.to_numeric(facts[column], errors='coerce')
+    facts['grain'] = grains[kept].to_numpy()
+    facts['period'] = np.select(
+        [facts['grain'] == 'monthly', facts['grain'] == 'quarterly'],
+        [df.loc[kept, 'month'] if 'month' in df.columns else np.nan, df.loc[kept, 'quarter']],
+        default=1
+    )
+    flags = df.loc[kept, 'data_quality_flag'].to_numpy()
+    facts['verified'] = flags == 'VERIFIED'
+    facts['estimated'] = flags == 'ESTIMATED'
+
+    grouped = facts.groupby(keys, sort=True)
+    totals = grouped[INDICATORS].sum(min_count=1)
+    counts = grouped[INDICATORS].count()
+    rollup = pd.DataFrame({
+        'source_grain': grouped['grain'].first(),
+        'periods_observed': grouped['period'].nunique(),
+        'num_records': grouped.size(),
+        'verified_records': grouped['verified'].sum(),
+        'estimated_records': grouped['estimated'].sum(),
+    })
+    rollup['periods_expected'] = rollup['source_grain'].map(GRAINS)
+    rollup['completeness_ratio'] = (rollup['periods_observed'] / rollup['periods_expected']).clip(upper=1).round(4)
+    rollup[INDICATORS] = totals
+    rollup['records_with_tonnage'] = counts['tonnage_mt']
+    rollup['records_with_teus'] = counts['teus']
+
+    # Annualisation par indicateur: total × attendu / périodes renseignées
+    for column in ('tonnage_mt', 'teus'):
+        covered = counts[column].where(counts[column] > 0)
+        scale = (rollup['periods_expected'] / covered).clip(lower=1)
+        rollup[f'{column}_annualized'] = (totals[column] * scale).round(2)
+
+    discarded = pd.Series(~kept, index=df.index).groupby([df[key] for key in keys]).sum()
+    rollup['discarded_rows'] = discarded.reindex(rollup.index, fill_value=0)
+
+    return rollup.reset_index()[[*keys, *[c for c in ROLLUP_COLUMNS if c not in keys]]]
@@ -0,0 +1,150 @@
+-- ============================================================================
+-- MIGRATION 001: fact_port_traffic → table partitionnée par année
+--
+-- Prérequis: PostgreSQL 15+ (UNIQUE NULLS NOT DISTINCT)
+-- Exécution:
+--   psql -h localhost -U postgres -d ports_dashboard \
+--        -f src/database/migrations/001_partition_fact_port_traffic.sql
+-- Après migration: cd dbt_project && dbt run --full-refresh
+--   (les vues staging dbt pointaient sur l'ancienne table)
+-- ============================================================================
+
+BEGIN;
+
+-- Vues analytiques dépendantes (recréées plus bas)
+DROP VIEW IF EXISTS v_port_traffic_full;
+DROP VIEW IF EXISTS v_port_annual_summary;
+DROP VIEW IF EXISTS v_indicator_availability;
+
+-- 1. Ancienne table mise de côté
+ALTER TABLE fact_port_traffic RENAME TO fact_port_traffic_legacy;
+ALTER TABLE fact_port_traffic_legacy RENAME CONSTRAINT fact_port_traffic_pkey TO fact_port_traffic_legacy_pkey;
+ALTER TABLE fact_port_traffic_legacy RENAME CONSTRAINT unique_port_traffic TO unique_port_traffic_legacy;
+DROP TRIGGER IF EXISTS trg_fact_port_traffic_update ON fact_port_traffic_legacy;
+
+-- 2. Nouvelle table partitionnée (même définition que schema.sql)
+CREATE TABLE fact_port_traffic (
+    traffic_id SERIAL,
+    port_id INT NOT NULL REFERENCES dim_port(port_id),
+    quality_flag_id INT REFERENCES dim_quality_flag(flag_id),
+    year INT NOT NULL,
+    quarter INT,
+    tonnage_mt NUMERIC(15, 2),
+    imports_mt NUMERIC(15, 2),
+    exports_mt NUMERIC(15, 2),
+    teus INT,
+    num_vessels INT,
+    data_source VARCHAR(255),
+    source_url TEXT,
+    has_tonnage BOOLEAN DEFAULT FALSE,
+    has_teus BOOLEAN DEFAULT FALSE,
+    analysis_note VARCHAR(255),
+    extraction_date DATE NOT NULL,
+    data_notes TEXT,
+    clean_date DATE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (traffic_id, year),
+    CONSTRAINT unique_port_traffic UNIQUE NULLS NOT DISTINCT (port_id, year, quarter)
+) PARTITION BY RANGE (year);
+
+CREATE OR REPLACE FUNCTION ensure_fact_partition(p_year INT)
+RETURNS VOID AS $$
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF fact_port_traffic FOR VALUES FROM (%s) TO (%s)',
+        'fact_port_traffic_y' || p_year, p_year, p_year + 1
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partitions: années existantes + plage par défaut
+SELECT ensure_fact_partition(y)
+FROM (
+    SELECT DISTINCT year AS y FROM fact_port_traffic_legacy
+    UNION
+    SELECT generate_series(2019, 2025)
+) years;
+
+-- 3. Copie des données (doublons annuels quarter NULL: la ligne la plus récente gagne)
+INSERT INTO fact_port_traffic
+SELECT DISTINCT ON (port_id, year, quarter) *
+FROM fact_port_traffic_legacy
+ORDER BY port_id, year, quarter, updated_at DESC, traffic_id DESC;
+
+SELECT setval(
+    pg_get_serial_sequence('fact_port_traffic', 'traffic_id'),
+    GREATEST((SELECT MAX(traffic_id) FROM fact_port_traffic), 1)
+);
+
+-- 4. Index consolidés (idx_fact_port_id, idx_fact_year, idx_fact_year_quarter,
+--    idx_fact_port_year sont couverts par unique_port_traffic + pruning)
+DROP TABLE fact_port_traffic_legacy CASCADE;
+CREATE INDEX idx_fact_quality ON fact_port_traffic(quality_flag_id);
+CREATE INDEX idx_fact_updated_at ON fact_port_traffic(updated_at);
+
+CREATE TRIGGER trg_fact_port_traffic_update
+    BEFORE UPDATE ON fact_port_traffic
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at();
+
+-- 5. Vues analytiques (identiques à schema.sql)
+CREATE OR REPLACE VIEW v_port_traffic_full AS
+SELECT 
+    f.traffic_id,
+    p.port_code,
+    p.port_name,
+    p.country,
+    f.year,
+    f.quarter,
+    f.tonnage_mt,
+    f.imports_mt,
+    f.exports_mt,
+    f.teus,
+    f.num_vessels,
+    q.flag_name as quality_flag,
+    f.analysis_note,
+    f.data_source,
+    f.source_url,
+    f.has_tonnage,
+    f.has_teus,
+    f.extraction_date,
+    f.created_at
+FROM fact_port_traffic f
+JOIN dim_port p ON f.port_id = p.port_id
+LEFT JOIN dim_quality_flag q ON f.quality_flag_id = q.flag_id
+ORDER BY p.port_code, f.year, f.quarter;
+
+CREATE OR REPLACE VIEW v_port_annual_summary AS
+SELECT 
+    p.port_code,
+    p.port_name,
+    p.country,
+    f.year,
+    COUNT(*) as num_records,
+    SUM(f.tonnage_mt) as total_tonnage_mt,
+    AVG(f.tonnage_mt) as avg_tonnage_mt,
+    SUM(CASE WHEN f.teus IS NOT NULL THEN f.teus ELSE 0 END) as total_teus,
+    SUM(CASE WHEN q.flag_name = 'VERIFIED' THEN 1 ELSE 0 END) as verified_records,
+    SUM(CASE WHEN q.flag_name = 'ESTIMATED' THEN 1 ELSE 0 END) as estimated_records
+FROM fact_port_traffic f
+JOIN dim_port p ON f.port_id = p.port_id
+LEFT JOIN dim_quality_flag q ON f.quality_flag_id = q.flag_id
+GROUP BY p.port_code, p.port_name, p.country, f.year
+ORDER BY p.port_code, f.year;
+
+CREATE OR REPLACE VIEW v_indicator_availability AS
+SELECT 
+    p.port_code,
+    p.port_name,
+    f.year,
+    COUNT(*) as total_records,
+    SUM(CASE WHEN f.has_tonnage THEN 1 ELSE 0 END) as records_with_tonnage,
+    SUM(CASE WHEN f.has_teus THEN 1 ELSE 0 END) as records_with_teus,
+    SUM(CASE WHEN f.has_tonnage AND f.has_teus THEN 1 ELSE 0 END) as records_with_both
+FROM fact_port_traffic f
+JOIN dim_port p ON f.port_id = p.port_id
+GROUP BY p.port_code, p.port_name, f.year
+ORDER BY p.port_code, f.year;
+
+COMMIT;
@@ -0,0 +1,89 @@
+-- ============================================================================
+-- MIGRATION 002: vues analytiques v_* → vues matérialisées
+--
+-- Mêmes noms et colonnes (lecteurs inchangés), sans ORDER BY interne.
+-- Rafraîchies CONCURRENTLY par le loader (load_postgres.py) après chargement.
+-- Exécution:
+--   psql -h localhost -U postgres -d ports_dashboard \
+--        -f src/database/migrations/002_materialize_analytical_views.sql
+-- ============================================================================
+
+BEGIN;
+
+DROP VIEW IF EXISTS v_port_traffic_full;
+DROP VIEW IF EXISTS v_port_annual_summary;
+DROP VIEW IF EXISTS v_indicator_availability;
+
+-- Vue 1: Données complètes avec contexte
+CREATE MATERIALIZED VIEW IF NOT EXISTS v_port_traffic_full AS
+SELECT 
+    f.traffic_id,
+    p.port_code,
+    p.port_name,
+    p.country,
+    f.year,
+    f.quarter,
+    f.tonnage_mt,
+    f.imports_mt,
+    f.exports_mt,
+    f.teus,
+    f.num_vessels,
+    q.flag_name as quality_flag,
+    f.analysis_note,
+    f.data_source,
+    f.source_url,
+    f.has_tonnage,
+    f.has_teus,
+    f.extraction_date,
+    f.created_at
+FROM fact_port_traffic f
+JOIN dim_port p ON f.port_id = p.port_id
+LEFT JOIN dim_quality_flag q ON f.quality_flag_id = q.flag_id;
+
+-- Tri (port_code, year, quarter) servi par index plutôt que dans la vue
+CREATE UNIQUE INDEX IF NOT EXISTS uq_v_port_traffic_full ON v_port_traffic_full(traffic_id);
+CREATE INDEX IF NOT EXISTS idx_v_port_traffic_full_port_year ON v_port_traffic_full(port_code, year, quarter);
+
+COMMENT ON MATERIALIZED VIEW v_port_traffic_full IS 'Vue consolidée - Données avec contexte complet';
+
+-- Vue 2: Résumé annuel par port
+CREATE MATERIALIZED VIEW IF NOT EXISTS v_port_annual_summary AS
+SELECT 
+    p.port_code,
+    p.port_name,
+    p.country,
+    f.year,
+    COUNT(*) as num_records,
+    SUM(f.tonnage_mt) as total_tonnage_mt,
+    AVG(f.tonnage_mt) as avg_tonnage_mt,
+    SUM(CASE WHEN f.teus IS NOT NULL THEN f.teus ELSE 0 END) as total_teus,
+    SUM(CASE WHEN q.flag_name = 'VERIFIED' THEN 1 ELSE 0 END) as verified_records,
+    SUM(CASE WHEN q.flag_name = 'ESTIMATED' THEN 1 ELSE 0 END) as estimated_records
+FROM fact_port_traffic f
+JOIN dim_port p ON f.port_id = p.port_id
+LEFT JOIN dim_quality_flag q ON f.quality_flag_id = q.flag_id
+GROUP BY p.port_code, p.port_name, p.country, f.year;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_v_port_annual_summary ON v_port_annual_summary(port_code, year);
+
+COMMENT ON MATERIALIZED VIEW v_port_annual_summary IS 'Vue annuelle - Résumés par port et année';
+
+-- Vue 3: Disponibilité des indicateurs
+CREATE MATERIALIZED VIEW IF NOT EXISTS v_indicator_availability AS
+SELECT 
+    p.port_code,
+    p.port_name,
+    f.year,
+    COUNT(*) as total_records,
+    SUM(CASE WHEN f.has_tonnage THEN 1 ELSE 0 END) as records_with_tonnage,
+    SUM(CASE WHEN f.has_teus THEN 1 ELSE 0 END) as records_with_teus,
+    SUM(CASE WHEN f.has_tonnage AND f.has_teus THEN 1 ELSE 0 END) as records_with_both
+FROM fact_port_traffic f
+JOIN dim_port p ON f.port_id = p.port_id
+GROUP BY p.port_code, p.port_name, f.year;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_v_indicator_availability ON v_indicator_availability(port_code, year);
+
+COMMENT ON MATERIALIZED VIEW v_indicator_availability IS 'Vue disponibilité - Quels ports ont quels indicateurs';
+
+COMMIT;
@@ -0,0 +1,6 @@
+-- ============================================================================
+-- MIGRATION 003: durée des étapes dans etl_load_history
+-- Utilisée par src/pipeline/run_pipeline.py (une ligne par étape)
+-- ============================================================================
+
+ALTER TABLE etl_load_history ADD COLUMN IF NOT EXISTS duration_ms INT;
@@ -0,0 +1,6 @@
+-- ============================================================================
+-- MIGRATION 004: résultat structuré des validations dans etl_load_history
+-- Utilisée par PostgreSQLDataLoader.validate_load (action 'validate_load')
+-- ============================================================================
+
+ALTER TABLE etl_load_history ADD COLUMN IF NOT EXISTS details JSONB;
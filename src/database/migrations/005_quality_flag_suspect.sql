@@ -0,0 +1,8 @@
+-- ============================================================================
+-- MIGRATION 005: flag SUSPECT attribué par le moteur de règles qualité
+-- (src/quality/rules.py: plages, sauts annuels)
+-- ============================================================================
+
+INSERT INTO dim_quality_flag (flag_name, flag_description, severity) VALUES
+    ('SUSPECT', 'Valeur hors plage ou saut annuel anormal (règles qualité)', 3)
+ON CONFLICT (flag_name) DO NOTHING;
@@ -0,0 +1,36 @@
+-- ============================================================================
+-- MIGRATION 006: agrégats annuels précalculés (granularité mixte)
+-- Rafraîchie par PostgreSQLDataLoader.refresh_rollups, lue par
+-- mart_port_annual_summary (au lieu de sommer fact_port_traffic)
+-- Après application (remplissage initial + mart reconstruit):
+--   python src/loading/load_postgres.py --rollup-scope full
+--   dbt run --full-refresh -s mart_port_annual_summary+
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS agg_port_annual_rollup (
+    port_id INT NOT NULL REFERENCES dim_port(port_id),
+    year INT NOT NULL,
+    source_grain VARCHAR(10) NOT NULL, -- 'annual', 'quarterly', 'monthly'
+    periods_expected SMALLINT NOT NULL,
+    periods_observed SMALLINT NOT NULL,
+    completeness_ratio NUMERIC(5, 4) NOT NULL,
+    tonnage_mt NUMERIC(15, 2),
+    tonnage_mt_annualized NUMERIC(15, 2),
+    teus NUMERIC(15, 0),
+    teus_annualized NUMERIC(15, 0),
+    num_vessels NUMERIC(10, 0),
+    num_records INT NOT NULL,
+    records_with_tonnage INT NOT NULL,
+    records_with_teus INT NOT NULL,
+    verified_records INT NOT NULL,
+    estimated_records INT NOT NULL,
+    discarded_rows INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (port_id, year)
+);
+
+COMMENT ON TABLE agg_port_annual_rollup IS 'Totaux annuels par port (granularité mixte résolue, src/analytics/rollups.py)';
+COMMENT ON COLUMN agg_port_annual_rollup.completeness_ratio IS 'Périodes distinctes / périodes attendues (1, 4 ou 12)';
+COMMENT ON COLUMN agg_port_annual_rollup.discarded_rows IS 'Lignes plus fines écartées car une granularité plus grossière existe';
+
+CREATE INDEX IF NOT EXISTS idx_rollup_updated_at ON agg_port_annual_rollup(updated_at);
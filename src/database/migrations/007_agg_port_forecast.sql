@@ -0,0 +1,25 @@
+-- ============================================================================
+-- MIGRATION 007: projections précalculées (question "Projections 2025")
+-- Rafraîchie par PostgreSQLDataLoader.refresh_forecasts après les agrégats
+-- annuels, exposée par le mart mart_port_forecast
+-- Remplissage initial: python src/loading/load_postgres.py --rollup-scope full
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS agg_port_forecast (
+    port_id INT NOT NULL REFERENCES dim_port(port_id),
+    metric VARCHAR(20) NOT NULL, -- 'tonnage_mt', 'teus'
+    year INT NOT NULL,
+    forecast NUMERIC(15, 2) NOT NULL,
+    lower_bound NUMERIC(15, 2),
+    upper_bound NUMERIC(15, 2),
+    confidence_level NUMERIC(3, 2),
+    method VARCHAR(20) NOT NULL, -- 'linear_ols', 'linear_2pts', 'naive'
+    n_points SMALLINT NOT NULL,
+    first_year INT NOT NULL,
+    last_year INT NOT NULL,
+    slope NUMERIC(15, 2),
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (port_id, metric, year)
+);
+
+COMMENT ON TABLE agg_port_forecast IS 'Projections annuelles par port avec intervalle de prévision (src/analytics/forecasting.py)';
@@ -0,0 +1,29 @@
+-- ============================================================================
+-- MIGRATION 008: granularité mensuelle dans fact_port_traffic
+--
+-- Colonne month + clé d'unicité (port_id, year, quarter, month): les lignes
+-- mensuelles (extracteurs, gap filling, benchmarks) ne sont plus fusionnées
+-- en une ligne par trimestre par l'upsert du loader.
+-- Exécution:
+--   psql -h localhost -U postgres -d ports_dashboard \
+--        -f src/database/migrations/008_fact_port_traffic_month.sql
+-- Après migration (les mois déjà écrasés ne sont pas récupérables):
+--   python src/loading/load_postgres.py --rollup-scope full
+-- ============================================================================
+
+BEGIN;
+
+ALTER TABLE fact_port_traffic ADD COLUMN IF NOT EXISTS month INT;
+
+ALTER TABLE fact_port_traffic DROP CONSTRAINT IF EXISTS fact_port_traffic_month_check;
+ALTER TABLE fact_port_traffic ADD CONSTRAINT fact_port_traffic_month_check
+    CHECK (month IS NULL OR (month BETWEEN 1 AND 12 AND quarter = (month - 1) / 3 + 1));
+
+-- NULLS NOT DISTINCT: une seule ligne annuelle / trimestrielle (month NULL) par clé
+ALTER TABLE fact_port_traffic DROP CONSTRAINT unique_port_traffic;
+ALTER TABLE fact_port_traffic ADD CONSTRAINT unique_port_traffic
+    UNIQUE NULLS NOT DISTINCT (port_id, year, quarter, month);
+
+COMMENT ON COLUMN fact_port_traffic.month IS 'Mois (1-12) des lignes mensuelles, NULL sinon';
+
+COMMIT;
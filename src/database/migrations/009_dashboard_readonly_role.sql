@@ -0,0 +1,34 @@
+-- ============================================================================
+-- MIGRATION 009: rôle lecture seule du SQL généré (chat, dashboard/sql_guard.py)
+--
+-- LOGIN sans superutilisateur ni rôle pg_*_server_*: SELECT sur public_marts
+-- uniquement (tables existantes + tables recréées par dbt).
+-- Exécution (en tant que propriétaire des marts, celui de dbt):
+--   psql -h localhost -U postgres -d ports_dashboard \
+--        -v readonly_password=... \
+--        -f src/database/migrations/009_dashboard_readonly_role.sql
+-- Puis dans .env: DB_READONLY_USER=dashboard_readonly, DB_READONLY_PASSWORD=...
+-- ============================================================================
+
+BEGIN;
+
+SELECT 'CREATE ROLE dashboard_readonly LOGIN NOSUPERUSER NOCREATEDB NOCREATEROLE NOINHERIT'
+WHERE NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'dashboard_readonly')
+\gexec
+
+ALTER ROLE dashboard_readonly PASSWORD :'readonly_password';
+ALTER ROLE dashboard_readonly SET default_transaction_read_only = on;
+ALTER ROLE dashboard_readonly SET statement_timeout = '5s';
+
+GRANT CONNECT ON DATABASE ports_dashboard TO dashboard_readonly;
+CREATE SCHEMA IF NOT EXISTS public_marts;
+GRANT USAGE ON SCHEMA public_marts TO dashboard_readonly;
+GRANT SELECT ON ALL TABLES IN SCHEMA public_marts TO dashboard_readonly;
+
+-- Les marts materialized='table' sont recréés à chaque dbt run
+ALTER DEFAULT PRIVILEGES IN SCHEMA public_marts GRANT SELECT ON TABLES TO dashboard_readonly;
+
+-- Aucune lecture des tables brutes (fact_port_traffic, agg_*...)
+REVOKE ALL ON ALL TABLES IN SCHEMA public FROM dashboard_readonly;
+
+COMMIT;
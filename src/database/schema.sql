@@ -34,8 +34,10 @@ COMMENT ON TABLE dim_quality_flag IS 'Dimension qualité - Classification donné
 -- ============================================================================
 
 -- Fact: Port Traffic Data (étoile simple)
+-- Partitionnée par année (RANGE): les marts annuels et les runs dbt
+-- incrémentaux ne lisent que les partitions concernées.
 CREATE TABLE IF NOT EXISTS fact_port_traffic (
-    traffic_id SERIAL PRIMARY KEY,
+    traffic_id SERIAL,
     
     -- Clés étrangères
     port_id INT NOT NULL REFERENCES dim_port(port_id),
@@ -44,6 +46,8 @@ CREATE TABLE IF NOT EXISTS fact_port_traffic (
     -- Dimensions temporelles
     year INT NOT NULL,
     quarter INT,
+    month INT CONSTRAINT fact_port_traffic_month_check
+        CHECK (month IS NULL OR (month BETWEEN 1 AND 12 AND quarter = (month - 1) / 3 + 1)),
     
     -- Indicateurs de trafic (peuvent être NULL)
     tonnage_mt NUMERIC(15, 2),
@@ -68,16 +72,91 @@ CREATE TABLE IF NOT EXISTS fact_port_traffic (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
+    -- Clé primaire: doit inclure la clé de partition
+    PRIMARY KEY (traffic_id, year),
+    
     -- Contrainte unicité (évite duplicatas)
-    CONSTRAINT unique_port_traffic UNIQUE (port_id, year, quarter)
-);
+    -- NULLS NOT DISTINCT: une seule ligne annuelle (quarter NULL) par port/année,
+    -- une seule ligne trimestrielle (month NULL) par trimestre
+    CONSTRAINT unique_port_traffic UNIQUE NULLS NOT DISTINCT (port_id, year, quarter, month)
+) PARTITION BY RANGE (year);
 
 COMMENT ON TABLE fact_port_traffic IS 'Fait principal - Trafic portuaire';
 COMMENT ON COLUMN fact_port_traffic.tonnage_mt IS 'Tonnage total (imports + exports) en tonnes métriques';
 COMMENT ON COLUMN fact_port_traffic.teus IS 'Conteneurs (Twenty-foot Equivalent Units)';
+COMMENT ON COLUMN fact_port_traffic.month IS 'Mois (1-12) des lignes mensuelles, NULL sinon';
 COMMENT ON COLUMN fact_port_traffic.has_tonnage IS 'TRUE si donnée tonnage_mt disponible';
 COMMENT ON COLUMN fact_port_traffic.has_teus IS 'TRUE si donnée teus disponible';
 
+-- ============================================================================
+-- PARTITIONS ANNUELLES
+-- ============================================================================
+
+-- Fonction: crée la partition d'une année si absente (appelée par le loader)
+CREATE OR REPLACE FUNCTION ensure_fact_partition(p_year INT)
+RETURNS VOID AS $$
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF fact_port_traffic FOR VALUES FROM (%s) TO (%s)',
+        'fact_port_traffic_y' || p_year, p_year, p_year + 1
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_fact_partition(y) FROM generate_series(2019, 2025) AS y;
+
+-- ============================================================================
+-- AGRÉGATS ANNUELS ET PROJECTIONS PRÉCALCULÉS (rafraîchis par le loader)
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS agg_port_annual_rollup (
+    port_id INT NOT NULL REFERENCES dim_port(port_id),
+    year INT NOT NULL,
+    source_grain VARCHAR(10) NOT NULL, -- 'annual', 'quarterly', 'monthly'
+    periods_expected SMALLINT NOT NULL,
+    periods_observed SMALLINT NOT NULL,
+    completeness_ratio NUMERIC(5, 4) NOT NULL,
+    tonnage_mt NUMERIC(15, 2),
+    tonnage_mt_annualized NUMERIC(15, 2),
+    teus NUMERIC(15, 0),
+    teus_annualized NUMERIC(15, 0),
+    num_vessels NUMERIC(10, 0),
+    num_records INT NOT NULL,
+    records_with_tonnage INT NOT NULL,
+    records_with_teus INT NOT NULL,
+    verified_records INT NOT NULL,
+    estimated_records INT NOT NULL,
+    discarded_rows INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (port_id, year)
+);
+
+COMMENT ON TABLE agg_port_annual_rollup IS 'Totaux annuels par port (granularité mixte résolue, src/analytics/rollups.py)';
+COMMENT ON COLUMN agg_port_annual_rollup.completeness_ratio IS 'Périodes distinctes / périodes attendues (1, 4 ou 12)';
+COMMENT ON COLUMN agg_port_annual_rollup.discarded_rows IS 'Lignes plus fines écartées car une granularité plus grossière existe';
+
+-- Détection des lignes modifiées (mart_port_annual_summary incrémental)
+CREATE INDEX IF NOT EXISTS idx_rollup_updated_at ON agg_port_annual_rollup(updated_at);
+
+CREATE TABLE IF NOT EXISTS agg_port_forecast (
+    port_id INT NOT NULL REFERENCES dim_port(port_id),
+    metric VARCHAR(20) NOT NULL, -- 'tonnage_mt', 'teus'
+    year INT NOT NULL,
+    forecast NUMERIC(15, 2) NOT NULL,
+    lower_bound NUMERIC(15, 2),
+    upper_bound NUMERIC(15, 2),
+    confidence_level NUMERIC(3, 2),
+    method VARCHAR(20) NOT NULL, -- 'linear_ols', 'linear_2pts', 'naive'
+    n_points SMALLINT NOT NULL,
+    first_year INT NOT NULL,
+    last_year INT NOT NULL,
+    slope NUMERIC(15, 2),
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (port_id, metric, year)
+);
+
+COMMENT ON TABLE agg_port_forecast IS 'Projections annuelles par port avec intervalle de prévision (src/analytics/forecasting.py)';
+
 -- ============================================================================
 -- TABLE LOGS ETL
 -- ============================================================================
@@ -89,6 +168,8 @@ CREATE TABLE IF NOT EXISTS etl_load_history (
     num_records INT,
     status VARCHAR(50), -- 'SUCCESS', 'PARTIAL', 'FAILED'
     error_message TEXT,
+    duration_ms INT, -- durée de l'étape (pipeline runner)
+    details JSONB, -- résultat structuré (validate_load)
     load_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -98,11 +179,12 @@ COMMENT ON TABLE etl_load_history IS 'Logs ETL - Traçabilité des opérations';
 -- INDEXES POUR PERFORMANCE
 -- ============================================================================
 
-CREATE INDEX idx_fact_port_id ON fact_port_traffic(port_id);
-CREATE INDEX idx_fact_year ON fact_port_traffic(year);
-CREATE INDEX idx_fact_year_quarter ON fact_port_traffic(year, quarter);
+-- unique_port_traffic (port_id, year, quarter, month) couvre les recherches par port
+-- et par (port, année); le filtre sur l'année est résolu par pruning des
+-- partitions. Seuls les index non couverts sont conservés.
 CREATE INDEX idx_fact_quality ON fact_port_traffic(quality_flag_id);
-CREATE INDEX idx_fact_port_year ON fact_port_traffic(port_id, year);
+-- Détection des lignes modifiées (mart_port_annual_summary incrémental)
+CREATE INDEX idx_fact_updated_at ON fact_port_traffic(updated_at);
 
 -- ============================================================================
 -- DONNÉES DE RÉFÉRENCE
@@ -120,15 +202,19 @@ ON CONFLICT (port_code) DO NOTHING;
 INSERT INTO dim_quality_flag (flag_name, flag_description, severity) VALUES
     ('VERIFIED', 'Donnée vérifiée de source officielle', 1),
     ('ESTIMATED', 'Donnée estimée par interpolation', 2),
-    ('PARTIAL', 'Donnée partielle ou incomplète', 2)
+    ('PARTIAL', 'Donnée partielle ou incomplète', 2),
+    ('SUSPECT', 'Valeur hors plage ou saut annuel anormal (règles qualité)', 3)
 ON CONFLICT (flag_name) DO NOTHING;
 
 -- ============================================================================
--- VUES ANALYTIQUES
+-- VUES ANALYTIQUES (MATÉRIALISÉES)
 -- ============================================================================
+-- Jointures + agrégations calculées une fois par chargement.
+-- Rafraîchies CONCURRENTLY par le loader après commit: les lecteurs ne
+-- sont jamais bloqués. Chaque vue a un index UNIQUE (requis pour CONCURRENTLY).
 
 -- Vue 1: Données complètes avec contexte
-CREATE OR REPLACE VIEW v_port_traffic_full AS
+CREATE MATERIALIZED VIEW IF NOT EXISTS v_port_traffic_full AS
 SELECT 
     f.traffic_id,
     p.port_code,
@@ -151,13 +237,16 @@ SELECT
     f.created_at
 FROM fact_port_traffic f
 JOIN dim_port p ON f.port_id = p.port_id
-LEFT JOIN dim_quality_flag q ON f.quality_flag_id = q.flag_id
-ORDER BY p.port_code, f.year, f.quarter;
+LEFT JOIN dim_quality_flag q ON f.quality_flag_id = q.flag_id;
 
-COMMENT ON VIEW v_port_traffic_full IS 'Vue consolidée - Données avec contexte complet';
+-- Tri (port_code, year, quarter) servi par index plutôt que dans la vue
+CREATE UNIQUE INDEX IF NOT EXISTS uq_v_port_traffic_full ON v_port_traffic_full(traffic_id);
+CREATE INDEX IF NOT EXISTS idx_v_port_traffic_full_port_year ON v_port_traffic_full(port_code, year, quarter);
+
+COMMENT ON MATERIALIZED VIEW v_port_traffic_full IS 'Vue consolidée - Données avec contexte complet';
 
 -- Vue 2: Résumé annuel par port
-CREATE OR REPLACE VIEW v_port_annual_summary AS
+CREATE MATERIALIZED VIEW IF NOT EXISTS v_port_annual_summary AS
 SELECT 
     p.port_code,
     p.port_name,
@@ -172,13 +261,14 @@ SELECT
 FROM fact_port_traffic f
 JOIN dim_port p ON f.port_id = p.port_id
 LEFT JOIN dim_quality_flag q ON f.quality_flag_id = q.flag_id
-GROUP BY p.port_code, p.port_name, p.country, f.year
-ORDER BY p.port_code, f.year;
+GROUP BY p.port_code, p.port_name, p.country, f.year;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_v_port_annual_summary ON v_port_annual_summary(port_code, year);
 
-COMMENT ON VIEW v_port_annual_summary IS 'Vue annuelle - Résumés par port et année';
+COMMENT ON MATERIALIZED VIEW v_port_annual_summary IS 'Vue annuelle - Résumés par port et année';
 
 -- Vue 3: Disponibilité des indicateurs
-CREATE OR REPLACE VIEW v_indicator_availability AS
+CREATE MATERIALIZED VIEW IF NOT EXISTS v_indicator_availability AS
 SELECT 
     p.port_code,
     p.port_name,
@@ -189,10 +279,11 @@ SELECT
     SUM(CASE WHEN f.has_tonnage AND f.has_teus THEN 1 ELSE 0 END) as records_with_both
 FROM fact_port_traffic f
 JOIN dim_port p ON f.port_id = p.port_id
-GROUP BY p.port_code, p.port_name, f.year
-ORDER BY p.port_code, f.year;
+GROUP BY p.port_code, p.port_name, f.year;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_v_indicator_availability ON v_indicator_availability(port_code, year);
 
-COMMENT ON VIEW v_indicator_availability IS 'Vue disponibilité - Quels ports ont quels indicateurs';
+COMMENT ON MATERIALIZED VIEW v_indicator_availability IS 'Vue disponibilité - Quels ports ont quels indicateurs';
 
 -- ============================================================================
 -- FONCTIONS UTILITAIRES
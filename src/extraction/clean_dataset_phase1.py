@@ -4,17 +4,30 @@ Prépare les données brutes pour Phase 2 (PostgreSQL)
 
 Actions:
 1. Supprimer Lagos (qualité insuffisante)
-2. Garder PAC 2024 Q3 seulement (filtrer 2019, 2023)
-3. Ajouter métadonnées d'analyse
-4. Générer rapport de nettoyage
+2. Garder PAC 2024 Q3 seulement (filtrer 2019)
+3. Résoudre les doublons entre sources (une ligne par clé)
+4. Interpoler les périodes manquantes (ESTIMATED)
+5. Ajouter métadonnées d'analyse
+6. Règles qualité (src/quality/rules.json) -> violations + flags
+7. Générer rapport de nettoyage
 """
 
 import pandas as pd
+import argparse
 import json
 import logging
+import sys
 from pathlib import Path
 from datetime import datetime
 
+# Imports absolus depuis la racine du projet (src.pipeline.*)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.pipeline.profiling import NULL_PROFILER, StepProfiler, add_profile_arguments
+from src.quality.gap_filling import GapFiller
+from src.quality.resolution import ConflictResolver
+from src.quality.rules import QualityRuleEngine
+
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
@@ -44,10 +57,19 @@ PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 class DatasetCleaner:
     """Nettoyage et enrichissement du dataset portuaire"""
     
-    def __init__(self, raw_file):
+    def __init__(self, raw_file, clean_file=CLEAN_FILE, report_file=REPORT_FILE, profiler=NULL_PROFILER,
+                 rule_engine=None, resolver=None, gap_filler=None):
         self.raw_file = raw_file
+        self.profiler = profiler
+        self.clean_file = Path(clean_file)
+        self.report_file = Path(report_file)
+        self.violations_file = self.clean_file.with_name('quality_violations.csv')
+        self.rule_engine = rule_engine or QualityRuleEngine.from_file()
+        self.resolver = resolver or ConflictResolver.from_file()
+        self.gap_filler = gap_filler or GapFiller.from_file()
         self.df_raw = None
         self.df_clean = None
+        self.violations = None
         self.report = {
             'timestamp': datetime.now().isoformat(),
             'actions': [],
@@ -93,7 +115,7 @@ class DatasetCleaner:
     
     def remove_lagos(self):
         """Supprime Lagos (qualité insuffisante)"""
-        logger.info("\n[1/4] Suppression Lagos...")
+        logger.info("\n[1/6] Suppression Lagos...")
         
         initial_count = len(self.df_raw)
         self.df_raw = self.df_raw[self.df_raw['port_code'] != 'LAGOS']
@@ -108,7 +130,7 @@ class DatasetCleaner:
     
     def clean_pac_temporal(self):
         """Garde PAC 2024 Q3 seulement"""
-        logger.info("\n[2/4] Nettoyage temporel PAC...")
+        logger.info("\n[2/6] Nettoyage temporel PAC...")
         
         pac_initial = len(self.df_raw[self.df_raw['port_code'] == 'PAC'])
         
@@ -121,42 +143,62 @@ class DatasetCleaner:
         self.df_raw = self.df_raw[~pac_mask]
         
         logger.info(f"✓ PAC nettoyé: {pac_initial} → {len(self.df_raw[self.df_raw['port_code'] == 'PAC'])} lignes")
-        logger.info(f"  Supprimé: années 2019 (baseline) et 2023 (estimée, gap énorme)")
+        logger.info(f"  Supprimé: année 2019 (baseline, gap énorme)")
         
         self.report['actions'].append({
             'action': 'clean_pac_temporal',
             'rows_removed': removed_count,
-            'reason': 'GAP temporel énorme (2019, 2023 supprimées). Garder 2024 Q3 VERIFIED',
+            'reason': 'GAP temporel énorme (2019 supprimée). Garder 2024 Q3 VERIFIED',
             'pac_kept': '2024 Q3 (VERIFIED)',
-            'pac_removed': '2019 (baseline), 2023 (interpolée, trop éloignée)'
+            'pac_removed': '2019 (baseline)'
         })
     
-    def check_duplicates(self):
-        """Vérifie les duplicatas"""
-        logger.info("\n[3/4] Vérification duplicatas...")
-        
-        # Grouper par port, year, quarter pour détecter duplicatas
-        duplicates = self.df_raw.groupby(
-            ['port_code', 'year', 'quarter', 'data_source']
-        ).size()
+    def resolve_duplicates(self):
+        """Résout les doublons: une ligne gagnante par clé (cf. src/quality/resolution.py)"""
+        logger.info("\n[3/6] Résolution duplicatas...")
         
-        has_duplicates = (duplicates > 1).any()
+        self.df_raw, discarded = self.resolver.resolve(self.df_raw)
+        conflict_keys = discarded[self.resolver.keys].drop_duplicates()
         
-        if has_duplicates:
-            logger.warning(f"⚠ Duplicatas détectés:")
-            logger.warning(duplicates[duplicates > 1])
+        if len(discarded):
+            logger.warning(f"⚠ Duplicatas résolus: {len(conflict_keys)} clés, {len(discarded)} lignes écartées")
+            for row in discarded.head(10).itertuples(index=False):
+                logger.warning(f"    {row.port_code} {row.year} Q{row.quarter}: écarté {row.data_source} ({row.data_quality_flag})")
         else:
             logger.info(f"✓ Pas de duplicatas")
         
         self.report['actions'].append({
-            'action': 'check_duplicates',
-            'has_duplicates': has_duplicates,
-            'duplicate_count': int((duplicates > 1).sum()) if has_duplicates else 0
+            'action': 'resolve_duplicates',
+            'has_duplicates': bool(len(discarded)),
+            'duplicate_count': len(conflict_keys),
+            'rows_removed': len(discarded),
+            'reason': 'Une ligne par (port, année, trimestre, mois): flag le moins sévère, puis source prioritaire',
+        })
+    
+    def fill_gaps(self):
+        """Interpole les périodes manquantes (lignes ESTIMATED, cf. src/quality/gap_filling.py)"""
+        logger.info("\n[4/6] Comblement des trous...")
+        
+        self.df_raw, created = self.gap_filler.fill(self.df_raw)
+        
+        if len(created):
+            logger.info(f"✓ {len(created)} périodes interpolées (ESTIMATED)")
+            for row in created.head(10).itertuples(index=False):
+                logger.info(f"    {row.port_code} {row.year}: {row.notes}")
+        else:
+            logger.info(f"✓ Aucun trou à combler")
+        
+        self.report['actions'].append({
+            'action': 'fill_gaps',
+            'rows_added': len(created),
+            'by_port': created['port_code'].value_counts().to_dict(),
+            'by_method': created['estimation_method'].value_counts().to_dict(),
+            'reason': 'Trous intérieurs interpolés (linéaire en annuel, saisonnier en infra-annuel)',
         })
     
     def enrich_metadata(self):
         """Ajoute métadonnées d'analyse"""
-        logger.info("\n[4/4] Enrichissement métadonnées...")
+        logger.info("\n[5/6] Enrichissement métadonnées...")
         
         # Colonne: included in analysis
         self.df_raw['included_in_analysis'] = True
@@ -208,6 +250,34 @@ class DatasetCleaner:
         
         return "; ".join(notes) if notes else "COMPLETE"
     
+    def apply_quality_rules(self):
+        """Règles qualité déclaratives: table des violations + flag recalculé"""
+        logger.info("\n[6/6] Règles qualité...")
+        
+        self.df_raw = self.df_raw.reset_index(drop=True)
+        self.violations = self.rule_engine.evaluate(self.df_raw)
+        
+        source_flags = self.df_raw['data_quality_flag']
+        self.df_raw['data_quality_flag'] = self.rule_engine.assign_flags(self.df_raw, self.violations)
+        self.df_raw['quality_rules'] = self.rule_engine.rules_per_row(self.violations, len(self.df_raw))
+        changed = int((self.df_raw['data_quality_flag'] != source_flags).sum())
+        
+        by_rule = self.rule_engine.summarize(self.violations)
+        if by_rule:
+            logger.warning(f"⚠ {len(self.violations)} violations ({changed} flags modifiés):")
+            for rule_id, count in by_rule.items():
+                logger.warning(f"    {rule_id}: {count}")
+        else:
+            logger.info(f"✓ Aucune violation ({len(self.rule_engine.rules)} règles)")
+        
+        self.report['actions'].append({
+            'action': 'quality_rules',
+            'violations': len(self.violations),
+            'violations_by_rule': by_rule,
+            'flags_changed': changed,
+            'violations_file': str(self.violations_file),
+        })
+    
     def validate_cleaning(self):
         """Valide le nettoyage"""
         logger.info("\n" + "="*70)
@@ -271,14 +341,19 @@ class DatasetCleaner:
         
         try:
             # Sauvegarde CSV
-            self.df_raw.to_csv(CLEAN_FILE, index=False)
-            logger.info(f"✓ CSV nettoyé: {CLEAN_FILE}")
+            self.df_raw.to_csv(self.clean_file, index=False)
+            logger.info(f"✓ CSV nettoyé: {self.clean_file}")
             logger.info(f"  Taille: {len(self.df_raw)} lignes, {len(self.df_raw.columns)} colonnes")
             
+            # Sauvegarde violations (table compacte, une ligne par règle violée)
+            if self.violations is not None:
+                self.violations.to_csv(self.violations_file, index=False)
+                logger.info(f"✓ Violations qualité: {self.violations_file} ({len(self.violations)})")
+            
             # Sauvegarde rapport JSON
-            with open(REPORT_FILE, 'w', encoding='utf-8') as f:
+            with open(self.report_file, 'w', encoding='utf-8') as f:
                 json.dump(self.report, f, indent=2, ensure_ascii=False, default=str)
-            logger.info(f"✓ Rapport JSON: {REPORT_FILE}")
+            logger.info(f"✓ Rapport JSON: {self.report_file}")
             
             return True
         except Exception as e:
@@ -313,30 +388,48 @@ class DatasetCleaner:
             logger.info(f"  [{i}] {action['action']}")
             if 'rows_removed' in action:
                 logger.info(f"      → Lignes supprimées: {action['rows_removed']}")
-            logger.info(f"      → Raison: {action['reason']}")
+            if 'rows_added' in action:
+                logger.info(f"      → Lignes ajoutées: {action['rows_added']}")
+            if 'reason' in action:
+                logger.info(f"      → Raison: {action['reason']}")
         
         logger.info("\n✓ PHASE 1 NETTOYAGE COMPLÈTE")
         logger.info("="*70)
     
     def run(self):
-        """Exécution complète"""
+        """Exécution complète (chaque étape chronométrée si --profile)"""
+        step = self.profiler.step
         
         # 1. Chargement
-        if not self.load_raw_data():
+        with step('load'):
+            loaded = self.load_raw_data()
+        if not loaded:
             return False
         
         # 2. Nettoyage
-        self.remove_lagos()
-        self.clean_pac_temporal()
-        self.check_duplicates()
-        self.enrich_metadata()
+        with step('remove_lagos'):
+            self.remove_lagos()
+        with step('clean_pac_temporal'):
+            self.clean_pac_temporal()
+        with step('resolve_duplicates'):
+            self.resolve_duplicates()
+        with step('fill_gaps'):
+            self.fill_gaps()
+        with step('enrich_metadata'):
+            self.enrich_metadata()
+        with step('quality_rules'):
+            self.apply_quality_rules()
         
         # 3. Validation
-        if not self.validate_cleaning():
+        with step('validate'):
+            validated = self.validate_cleaning()
+        if not validated:
             return False
         
         # 4. Sauvegarde
-        if not self.save_clean_data():
+        with step('save'):
+            saved = self.save_clean_data()
+        if not saved:
             return False
         
         # 5. Résumé
@@ -351,8 +444,14 @@ class DatasetCleaner:
 
 def main():
     """Script principal"""
-    cleaner = DatasetCleaner(RAW_FILE)
+    parser = argparse.ArgumentParser(description="Phase 1: nettoyage du dataset brut")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
+    profiler = StepProfiler.from_args('cleaner', args)
+    cleaner = DatasetCleaner(RAW_FILE, profiler=profiler)
     success = cleaner.run()
+    profiler.write_report()
     return 0 if success else 1
 
 
@@ -4,19 +4,29 @@ Sources: Articles presse, PDFs téléchargeables, données structurées publique
 Données extraites: 2023-2024, tonnage + conteneurs (EVP/TEU)
 
 IMPORTANT: Pas de simulation. Si données manquent -> N/A documenté
-Approche: Scraping simple (BeautifulSoup) + téléchargement direct
+Approche: Téléchargement direct + parsing par règles ciblées (cf. parsing.py)
+Accès HTTP: session partagée + cache disque revalidé (cf. fetch.py)
+Ports et sources déclarés dans src/extraction/sources/ports.json (cf. registry.py)
 """
 
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-import re
 import json
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import random
+import threading
 import time
+import sys
+
+# Imports absolus depuis la racine du projet (src.extraction.*)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.extraction.fetch import CACHE_DIR, FETCH_MODE, FETCH_MODES, REQUEST_TIMEOUT, Fetcher, set_fetcher
+from src.extraction.parsing import get_parser
+from src.extraction.registry import RECORD_FIELDS, SOURCES_FILE, load_extractors
 
 # ============================================================================
 # CONFIGURATION
@@ -32,460 +42,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Headers pour respecter les sites
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-}
-
 OUTPUT_DIR = Path('data/raw')
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-# ============================================================================
-# 1. EXTRACTION COTONOU (Bénin) - Sources: AgenceEcofin + Twitter/X
-# ============================================================================
-
-class CotornouExtractor:
-    """Extraction Port Autonome de Cotonou"""
-    
-    @staticmethod
-    def extract():
-        """
-        Sources principales:
-        - Q3 2024: Twitter @PortdeCotonou (198 navires, +19.9% vs Q2, 2.51M tonnes trim)
-        - 2019: Discours Patrice Talon (11M tonnes/an)
-        - Articles AganceEcofin
-        """
-        
-        logger.info("\n" + "="*70)
-        logger.info("EXTRACTION: Port Autonome de Cotonou (PAC)")
-        logger.info("="*70)
-        
-        data = []
-        
-        # Source 1: Q3 2024 - Twitter officiel (données publiées)
-        data.append({
-            'port_code': 'PAC',
-            'port_name': 'Port Autonome de Cotonou',
-            'country': 'Benin',
-            'year': 2024,
-            'quarter': 3,
-            'month': None,
-            'tonnage_mt': 2_510_000,  # Trimestrial
-            'imports_mt': None,
-            'exports_mt': None,
-            'teus': None,
-            'num_vessels': 198,
-            'data_source': 'Twitter @PortdeCotonou',
-            'source_url': 'https://twitter.com/PortdeCotonou',
-            'extraction_date': '2025-01-15',
-            'data_quality_flag': 'VERIFIED',
-            'notes': 'Q3 2024 officiel, trimestrial. +19.9% vs Q2. Source: tweet officiel PAC'
-        })
-        
-        # Source 2: 2019 - Tonnage annuel de référence
-        data.append({
-            'port_code': 'PAC',
-            'port_name': 'Port Autonome de Cotonou',
-            'country': 'Benin',
-            'year': 2019,
-            'quarter': None,
-            'month': None,
-            'tonnage_mt': 11_000_000,  # Annuel
-            'imports_mt': None,
-            'exports_mt': None,
-            'teus': None,
-            'num_vessels': None,
-            'data_source': 'Patrice Talon (Président Bénin)',
-            'source_url': 'https://portdecotonou.bj/',
-            'extraction_date': '2025-01-15',
-            'data_quality_flag': 'VERIFIED',
-            'notes': '2019 baseline. Mentionné discours officiel Talon. Avant COVID'
-        })
-        
-        # Source 3: 2023 - Estimation conservatrice (interpolation 2019-2024)
-        # Tendance: 11M (2019) → 2.51M trimestrial ≈ 10.04M annuel (2024)
-        # Croissance estimée 2019-2024: ~-0.8% annuel (COVID + récupération)
-        # 2023 estimé: 10.5M (interpolation linéaire documentée)
-        data.append({
-            'port_code': 'PAC',
-            'port_name': 'Port Autonome de Cotonou',
-            'country': 'Benin',
-            'year': 2023,
-            'quarter': None,
-            'month': None,
-            'tonnage_mt': 10_500_000,  # Estimé
-            'imports_mt': None,
-            'exports_mt': None,
-            'teus': None,
-            'num_vessels': None,
-            'data_source': 'Interpolation linéaire',
-            'source_url': 'N/A',
-            'extraction_date': '2025-01-15',
-            'data_quality_flag': 'ESTIMATED',
-            'notes': '2023 manquant. Interpolation 2019 (11M) + Q3 2024 (2.51M trim) = ~10.5M estimé'
-        })
-        
-        logger.info(f"✓ Cotonou: {len(data)} points de données extraits")
-        return pd.DataFrame(data)
-
-
-# ============================================================================
-# 2. EXTRACTION TEMA (Ghana) - Source: GPHA téléchargeable
-# ============================================================================
-
-class TemaExtractor:
-    """Extraction Port of Tema via données officielles GPHA"""
-    
-    @staticmethod
-    def extract():
-        """
-        GPHA (Ghana Ports and Harbors Authority) publie XLS téléchargeable:
-        https://www.ghanaports.gov.gh/media/publications
-        
-        Données publiques trouvées:
-        - 2024: 1,668,688 TEU (Citi Newsroom)
-        - Série 2014-2024 disponible en XLS
-        
-        Approche: Scraper les données de Wikipedia + articles vérifiés
-        (XLS téléchargement manuel - trop complexe en scraping)
-        """
-        
-        logger.info("\n" + "="*70)
-        logger.info("EXTRACTION: Port of Tema (Ghana)")
-        logger.info("="*70)
-        
-        data = []
-        
-        # Source 1: 2024 TEU - Citi Newsroom (officiel)
-        data.append({
-            'port_code': 'TEMA',
-            'port_name': 'Port of Tema',
-            'country': 'Ghana',
-            'year': 2024,
-            'quarter': None,
-            'month': None,
-            'tonnage_mt': None,  # Pas trouvé en tonnage
-            'imports_mt': None,
-            'exports_mt': None,
-            'teus': 1_668_688,  # Officiel 2024
-            'num_vessels': None,
-            'data_source': 'Citi Newsroom + GPHA',
-            'source_url': 'https://citinewsroom.com/',
-            'extraction_date': '2025-01-15',
-            'data_quality_flag': 'VERIFIED',
-            'notes': '2024 TEU record: 1.67M. +95% du trafic conteneurs Ghana'
-        })
-        
-        # Source 2: 2022 - Série historique accessible
-        # Wikipedia + Statista aperçu: ~1.2M TEU 2022
-        data.append({
-            'port_code': 'TEMA',
-            'port_name': 'Port of Tema',
-            'country': 'Ghana',
-            'year': 2022,
-            'quarter': None,
-            'month': None,
-            'tonnage_mt': None,
-            'imports_mt': None,
-            'exports_mt': None,
-            'teus': 1_200_000,  # Estimé Statista
-            'num_vessels': 1700,  # Statista 2022
-            'data_source': 'Statista (aperçu gratuit)',
-            'source_url': 'https://www.statista.com/statistics/1380527/',
-            'extraction_date': '2025-01-15',
-            'data_quality_flag': 'VERIFIED',
-            'notes': 'Statista aperçu 2022: 1.2M TEU, ~1700 navires. Paywall complet'
-        })
-        
-        # Source 3: 2023 - Interpolation 2022-2024
-        # Croissance: 1.2M (2022) → 1.67M (2024) = +39% sur 2 ans
-        # Linéaire: 2023 ≈ 1.43M
-        data.append({
-            'port_code': 'TEMA',
-            'port_name': 'Port of Tema',
-            'country': 'Ghana',
-            'year': 2023,
-            'quarter': None,
-            'month': None,
-            'tonnage_mt': None,
-            'imports_mt': None,
-            'exports_mt': None,
-            'teus': 1_430_000,  # Interpolation
-            'num_vessels': None,
-            'data_source': 'Interpolation 2022-2024',
-            'source_url': 'N/A',
-            'extraction_date': '2025-01-15',
-            'data_quality_flag': 'ESTIMATED',
-            'notes': '2023 manquant. Interpolation linéaire: (1.2M + 1.67M) / 2 ≈ 1.43M'
-        })
-        
-        logger.info(f"✓ Tema: {len(data)} points de données extraits")
-        return pd.DataFrame(data)
-
-
-# ============================================================================
-# 3. EXTRACTION LOME (Togo) - Source: AgenceEcofin + Articles
-# ============================================================================
-
-class LomeExtractor:
-    """Extraction Port Autonome de Lomé"""
-    
-    @staticmethod
-    def extract():
-        """
-        Sources très bonnes pour Lomé:
-        - 2024: 30.64M tonnes (AganceEcofin + AtlanticInfos)
-        - 2024: 2M EVP, 1440 navires (AtlanticInfos)
-        - Série 2020-2023 complète dans articles
-        """
-        
-        logger.info("\n" + "="*70)
-        logger.info("EXTRACTION: Port Autonome de Lomé (Togo)")
-        logger.info("="*70)
-        
-        data = []
-        
-        # Source 1: 2024 - Consolidé AganceEcofin + AtlanticInfos (consensus)
-        data.append({
-            'port_code': 'LOME',
-            'port_name': 'Port Autonome de Lomé',
-            'country': 'Togo',
-            'year': 2024,
-            'quarter': None,
-            'month': None,
-            'tonnage_mt': 30_641_830,  # 30.64M tonnes
-            'imports_mt': None,
-            'exports_mt': None,
-            'teus': 2_000_000,  # 2M EVP
-            'num_vessels': 1440,
-            'data_source': 'AganceEcofin + AtlanticInfos',
-            'source_url': 'https://www.agenceecofin.com/ + https://atlanticinfos.com/',
-            'extraction_date': '2025-01-15',
-            'data_quality_flag': 'VERIFIED',
-            'notes': '2024: 30.64M tonnes (+1.85% vs 2023), 2M EVP, 1440 navires (2 sources concordantes)'
-        })
-        
-        # Source 2: 2023 - Articles
-        data.append({
-            'port_code': 'LOME',
-            'port_name': 'Port Autonome de Lomé',
-            'country': 'Togo',
-            'year': 2023,
-            'quarter': None,
-            'month': None,
-            'tonnage_mt': 30_090_000,  # 30.09M tonnes
-            'imports_mt': None,
-            'exports_mt': None,
-            'teus': None,
-            'num_vessels': None,
-            'data_source': 'AganceEcofin',
-            'source_url': 'https://www.agenceecofin.com/',
-            'extraction_date': '2025-01-15',
-            'data_quality_flag': 'VERIFIED',
-            'notes': '2023: 30.09M tonnes (+0.4% vs 2022). Déduit de 2024 (-1.85%)'
-        })
-        
-        # Source 3: 2022 - Articles
-        data.append({
-            'port_code': 'LOME',
-            'port_name': 'Port Autonome de Lomé',
-            'country': 'Togo',
-            'year': 2022,
-            'quarter': None,
-            'month': None,
-            'tonnage_mt': 29_700_000,  # 29.7M tonnes
-            'imports_mt': None,
-            'exports_mt': None,
-            'teus': None,
-            'num_vessels': None,
-            'data_source': 'Articles sectoriels',
-            'source_url': 'https://www.togo-port.net/statistiques-pal/',
-            'extraction_date': '2025-01-15',
-            'data_quality_flag': 'VERIFIED',
-            'notes': '2022: 29.7M tonnes. Base pour déduction 2023'
-        })
-        
-        logger.info(f"✓ Lomé: {len(data)} points de données extraits")
-        return pd.DataFrame(data)
-
+# Extraction concurrente: durée totale ≈ source la plus lente
+MAX_WORKERS = 8
+EXTRACTOR_TIMEOUT = 60      # secondes par tentative
+MAX_RETRIES = 3             # tentatives par extracteur
+BACKOFF_BASE = 1.0          # secondes, doublé à chaque échec (+ jitter)
+CANCEL_GRACE = REQUEST_TIMEOUT + 5  # secondes laissées à une tentative annulée pour s'arrêter
 
-# ============================================================================
-# 4. EXTRACTION ABIDJAN (Côte d'Ivoire) - Source: Articles + The Business Year
-# ============================================================================
 
-class AbidjanExtractor:
-    """Extraction Port Autonome d'Abidjan"""
-    
-    @staticmethod
-    def extract():
-        """
-        Abidjan = PLUS GROS PORT région
-        Sources excellentes:
-        - 2023: 34.8M tonnes (+21% YoY) - The Business Year
-        - 2022: 28.6M tonnes (déduit de +21%)
-        - 2020: 25M tonnes (COVID)
-        - 2019: 25M tonnes
-        """
-        
-        logger.info("\n" + "="*70)
-        logger.info("EXTRACTION: Port Autonome d'Abidjan (Côte d'Ivoire)")
-        logger.info("="*70)
-        
-        data = []
-        
-        # Source 1: 2023 - The Business Year (data excellente)
-        data.append({
-            'port_code': 'ABIDJAN',
-            'port_name': 'Port Autonome d\'Abidjan',
-            'country': 'Côte d\'Ivoire',
-            'year': 2023,
-            'quarter': None,
-            'month': None,
-            'tonnage_mt': 34_800_000,  # 34.8M tonnes
-            'imports_mt': None,
-            'exports_mt': None,
-            'teus': 1_000_000,  # Approx, données partielles
-            'num_vessels': None,
-            'data_source': 'The Business Year',
-            'source_url': 'https://thebusinessyear.com/article/port-series-abidjan',
-            'extraction_date': '2025-01-15',
-            'data_quality_flag': 'VERIFIED',
-            'notes': '2023: 34.8M tonnes (+21% YoY). PLUS GRAND PORT RÉGION'
-        })
-        
-        # Source 2: 2022 - Déduit de 2023
-        # 2023 = 34.8M (+21%) → 2022 = 34.8 / 1.21 = 28.76M ≈ 28.6M
-        data.append({
-            'port_code': 'ABIDJAN',
-            'port_name': 'Port Autonome d\'Abidjan',
-            'country': 'Côte d\'Ivoire',
-            'year': 2022,
-            'quarter': None,
-            'month': None,
-            'tonnage_mt': 28_600_000,  # Déduit (-21%)
-            'imports_mt': None,
-            'exports_mt': None,
-            'teus': None,
-            'num_vessels': None,
-            'data_source': 'Déduction de 2023 (+21%)',
-            'source_url': 'N/A',
-            'extraction_date': '2025-01-15',
-            'data_quality_flag': 'ESTIMATED',
-            'notes': '2022 déduit: 34.8M / 1.21 = 28.76M (arrondi 28.6M)'
-        })
-        
-        # Source 3: 2020 - COVID reference
-        data.append({
-            'port_code': 'ABIDJAN',
-            'port_name': 'Port Autonome d\'Abidjan',
-            'country': 'Côte d\'Ivoire',
-            'year': 2020,
-            'quarter': None,
-            'month': None,
-            'tonnage_mt': 25_000_000,  # 25M tonnes
-            'imports_mt': None,
-            'exports_mt': None,
-            'teus': None,
-            'num_vessels': None,
-            'data_source': 'Rapport PAA 2020 (COVID)',
-            'source_url': 'https://www.portabidjan.ci/fr/dossier/2020',
-            'extraction_date': '2025-01-15',
-            'data_quality_flag': 'VERIFIED',
-            'notes': '2020: 25M tonnes (pic COVID). Référence pré-croissance'
-        })
-        
-        logger.info(f"✓ Abidjan: {len(data)} points de données extraits")
-        return pd.DataFrame(data)
+class ExtractionTimeout(Exception):
+    """Extracteur n'ayant pas répondu dans EXTRACTOR_TIMEOUT"""
 
 
-# ============================================================================
-# 5. EXTRACTION LAGOS (Nigeria) - Sources limitées (problématique)
-# ============================================================================
-
-class LagosExtractor:
-    """Extraction Lagos Port Complex - DONNÉES FRAGMENTAIRES"""
-    
-    @staticmethod
-    def extract():
-        """
-        PROBLÈME: NPA (Nigerian Ports Authority) n'a pas de stats publiques
-        Solutions:
-        - Wikipedia: Données capacité + historique (2012-2013: ~21M tonnes)
-        - Articles rares
-        - LIMITATION: Données incomplètes, documenter clairement
-        """
-        
-        logger.info("\n" + "="*70)
-        logger.info("EXTRACTION: Lagos Port Complex (Nigeria)")
-        logger.info("="*70)
-        logger.warning("⚠ ATTENTION: Lagos manque données publiques. NPA n'expose pas stats.")
-        
-        data = []
-        
-        # Source 1: 2024 - Estimation via capacité + ratios régionaux
-        # Apapa: TEU > 1M (Wikipedia), Lagoon terminals ajoutés
-        # Lagos = ~25-30% du trafic West Africa (Abidjan 35%, Lomé 30%, Lagos ~25%)
-        # Si Abidjan 34.8M (2023), Lagos proxy: 34.8M * 0.72 ≈ 25M
-        data.append({
-            'port_code': 'LAGOS',
-            'port_name': 'Lagos Port Complex (Apapa)',
-            'country': 'Nigeria',
-            'year': 2024,
-            'quarter': None,
-            'month': None,
-            'tonnage_mt': 25_000_000,  # ESTIMATION
-            'imports_mt': None,
-            'exports_mt': None,
-            'teus': 1_000_000,  # Apapa seul
-            'num_vessels': None,
-            'data_source': 'Proxy Abidjan + Wikipedia capacity',
-            'source_url': 'https://en.wikipedia.org/wiki/Apapa_Port_Complex',
-            'extraction_date': '2025-01-15',
-            'data_quality_flag': 'ESTIMATED',
-            'notes': '2024 ESTIMÉ. NPA pas de stats officielles. Proxy: 72% Abidjan 2023 (25M tonnes). TEU >1M Apapa per Wikipedia'
-        })
-        
-        # Source 2: 2023 - Même estimation
-        data.append({
-            'port_code': 'LAGOS',
-            'port_name': 'Lagos Port Complex (Apapa)',
-            'country': 'Nigeria',
-            'year': 2023,
-            'quarter': None,
-            'month': None,
-            'tonnage_mt': 25_000_000,  # ESTIMATION
-            'imports_mt': None,
-            'exports_mt': None,
-            'teus': 1_000_000,
-            'num_vessels': None,
-            'data_source': 'Proxy Abidjan 2023',
-            'source_url': 'https://en.wikipedia.org/wiki/Apapa_Port_Complex',
-            'extraction_date': '2025-01-15',
-            'data_quality_flag': 'ESTIMATED',
-            'notes': '2023 ESTIMÉ même logique. Aucune donnée officielle accessible'
-        })
-        
-        logger.warning("✗ Lagos: Données manquantes. Seulement estimations par proxy.")
-        logger.info(f"✓ Lagos: {len(data)} points extraits (ESTIMATIONS SEULEMENT)")
-        
-        return pd.DataFrame(data)
-
+class ExtractionStuck(ExtractionTimeout):
+    """Tentative expirée toujours active après annulation: pas de nouvel essai"""
 
 # ============================================================================
 # ORCHESTRATION PRINCIPALE
 # ============================================================================
 
 class PortDataExtractorPhase1:
-    """Orchestrateur extraction Phase 1"""
+    """Orchestrateur extraction Phase 1 (ports déclarés dans sources/ports.json)"""
     
-    def __init__(self):
-        self.extractors = [
-            ('PAC', CotornouExtractor),
-            ('TEMA', TemaExtractor),
-            ('LOME', LomeExtractor),
-            ('ABIDJAN', AbidjanExtractor),
-            ('LAGOS', LagosExtractor),
-        ]
+    def __init__(self, spec_file=SOURCES_FILE, fetcher=None):
+        self.fetcher = set_fetcher(fetcher or Fetcher())
+        self.extractors = load_extractors(spec_file, self.fetcher)
         self.all_data = []
     
     def run(self):
@@ -497,16 +81,29 @@ class PortDataExtractorPhase1:
         logger.info("Période: 2023-2024")
         logger.info("="*70)
         
-        for port_code, extractor_class in self.extractors:
-            try:
-                df = extractor_class.extract()
-                self.all_data.append(df)
-                time.sleep(1)  # Respecter les serveurs
-            except Exception as e:
-                logger.error(f"✗ Erreur extraction {port_code}: {e}")
-        
-        # Consolidation
-        combined_df = pd.concat(self.all_data, ignore_index=True)
+        # Un thread par extracteur; résultats remis dans l'ordre déclaré
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(self.extractors))) as pool:
+            futures = [
+                (extractor.port_code, pool.submit(self.extract_with_retries, extractor))
+                for extractor in self.extractors
+            ]
+            for port_code, future in futures:
+                try:
+                    self.all_data.append((port_code, future.result()))
+                except Exception as e:
+                    logger.error(f"✗ Erreur extraction {port_code}: {e}")
+        
+        self.fetcher.close()
+        parser = get_parser()
+        parser.close()
+        logger.info(f"\n✓ HTTP ({self.fetcher.mode}): {self.fetcher.stats}")
+        logger.info(f"✓ Parsing: {parser.stats}")
+        
+        # Consolidation: un seul DataFrame construit depuis les tuples typés
+        combined_df = pd.DataFrame.from_records(
+            [record for _, records in self.all_data for record in records],
+            columns=RECORD_FIELDS
+        )
         
         # Sauvegarde brute
         raw_file = OUTPUT_DIR / 'all_ports_raw.csv'
@@ -521,21 +118,72 @@ class PortDataExtractorPhase1:
         
         return combined_df
     
+    @staticmethod
+    def _extract_once(extractor):
+        """
+        Une tentative, annulée après EXTRACTOR_TIMEOUT. Le nouvel essai n'a
+        lieu qu'une fois la tentative précédente arrêtée: jamais deux run()
+        simultanés sur le même extracteur (fetcher, cache, rate limiter).
+        """
+        outcome = {}
+        cancel_event = threading.Event()
+        
+        def target():
+            try:
+                outcome['records'] = extractor.run(cancel_event)
+            except Exception as e:
+                outcome['error'] = e
+        
+        # Thread daemon: un extracteur bloqué ne retient ni le pool ni le process
+        worker = threading.Thread(target=target, daemon=True)
+        worker.start()
+        worker.join(EXTRACTOR_TIMEOUT)
+        if worker.is_alive():
+            cancel_event.set()
+            worker.join(CANCEL_GRACE)
+            if worker.is_alive():
+                raise ExtractionStuck(
+                    f"pas de réponse après {EXTRACTOR_TIMEOUT}s, toujours actif après annulation"
+                )
+            raise ExtractionTimeout(f"pas de réponse après {EXTRACTOR_TIMEOUT}s (tentative annulée)")
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['records']
+    
+    def extract_with_retries(self, extractor):
+        """Tentatives avec backoff exponentiel + jitter"""
+        port_code = extractor.port_code
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                return self._extract_once(extractor)
+            except ExtractionStuck:
+                raise
+            except Exception as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                delay = BACKOFF_BASE * 2 ** (attempt - 1) + random.uniform(0, BACKOFF_BASE)
+                logger.warning(
+                    f"⚠ {port_code}: tentative {attempt}/{MAX_RETRIES} échouée ({e}), "
+                    f"nouvel essai dans {delay:.1f}s"
+                )
+                time.sleep(delay)
+    
     def save_metadata(self):
         """Sauvegarde métadonnées extraction"""
+        sources = {
+            record.data_source
+            for _, records in self.all_data for record in records
+            if record.data_source
+        }
         metadata = {
             'extraction_date': datetime.now().isoformat(),
             'phase': 'Phase 1 - Real Data Collection',
-            'sources_count': 15,  # Nombre de sources uniques
-            'ports_count': 5,
-            'data_points': {port: len([x for x in self.all_data if hasattr(x, '__len__')]) 
-                           for port, _ in self.extractors},
+            'sources_count': len(sources),  # Nombre de sources uniques
+            'ports_count': len(self.extractors),
+            'data_points': {port_code: len(records) for port_code, records in self.all_data},
             'coverage': {
-                'PAC': '2019, 2023, 2024 (Q3) - INCOMPLETE',
-                'TEMA': '2022, 2023 (est.), 2024 - GOOD',
-                'LOME': '2020, 2022, 2023, 2024 - EXCELLENT',
-                'ABIDJAN': '2020, 2022 (est.), 2023 - GOOD',
-                'LAGOS': '2023, 2024 (est.) - POOR (no official data)',
+                extractor.port_code: extractor.coverage
+                for extractor in self.extractors if extractor.coverage
             }
         }
         
@@ -550,10 +198,11 @@ class PortDataExtractorPhase1:
         logger.info("VALIDATION DONNÉES")
         logger.info("="*70)
         
-        logger.info(f"\n✓ Nombre de ports: {df['port_code'].nunique()} / 5")
+        port_codes = [extractor.port_code for extractor in self.extractors]
+        logger.info(f"\n✓ Nombre de ports: {df['port_code'].nunique()} / {len(port_codes)}")
         logger.info(f"✓ Nombre de points temporels: {len(df)} (cible min: 10)")
         
-        for port in ['PAC', 'TEMA', 'LOME', 'ABIDJAN', 'LAGOS']:
+        for port in port_codes:
             port_data = df[df['port_code'] == port]
             logger.info(f"\n  {port}:")
             logger.info(f"    - Enregistrements: {len(port_data)}")
@@ -576,7 +225,17 @@ class PortDataExtractorPhase1:
 def main():
     """Script principal"""
     
-    extractor = PortDataExtractorPhase1()
+    parser = argparse.ArgumentParser(description="Phase 1: extraction des données portuaires")
+    parser.add_argument('--offline', action='store_true',
+                        help="rejoue uniquement le cache HTTP (aucun accès réseau)")
+    parser.add_argument('--fetch-mode', choices=FETCH_MODES, default=FETCH_MODE,
+                        help="online (GET conditionnel), offline (cache seul), refresh (ignore le cache)")
+    parser.add_argument('--cache-dir', default=str(CACHE_DIR),
+                        help="répertoire du cache HTTP (ou de fixtures enregistrées)")
+    args = parser.parse_args()
+    
+    mode = 'offline' if args.offline else args.fetch_mode
+    extractor = PortDataExtractorPhase1(fetcher=Fetcher(mode=mode, cache_dir=args.cache_dir))
     df = extractor.run()
     
     logger.info("\n" + "="*70)
@@ -0,0 +1,268 @@
+"""
+Couche HTTP commune aux extracteurs
+✅ Session requests partagée (keep-alive, pool de connexions par hôte)
+✅ Cache disque par URL, revalidé par ETag / Last-Modified (GET conditionnel)
+✅ Mode offline: rejoue uniquement le cache (fixtures enregistrées, sans réseau)
+✅ Intervalle minimal par hôte sur les accès réseau réels
+
+Modes (FETCH_MODE ou --offline):
+  online  : GET conditionnel, 304 -> corps servi depuis le cache
+  offline : aucun accès réseau, une URL absente du cache lève CacheMiss
+  refresh : ignore le cache en lecture, réécrit les entrées
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Headers pour respecter les sites
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+CACHE_DIR = Path(os.getenv('HTTP_CACHE_DIR', 'data/http_cache'))
+FETCH_MODE = os.getenv('FETCH_MODE', 'online')
+FETCH_MODES = ('online', 'offline', 'refresh')
+
+REQUEST_TIMEOUT = 30        # secondes par requête HTTP
+REQUEST_INTERVAL = 1.0      # secondes minimum entre 2 accès au même hôte
+POOL_CONNECTIONS = 8        # hôtes gardés en keep-alive
+POOL_MAXSIZE = 8            # connexions simultanées par hôte
+
+_CHARSET_RE = re.compile(r'charset=([\w-]+)', re.IGNORECASE)
+
+
+class CacheMiss(Exception):
+    """URL absente du cache en mode offline"""
+
+
+class HostRateLimiter:
+    """Respecter les serveurs: intervalle minimal par hôte (remplace le sleep global)"""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url_or_host):
+        """Bloque jusqu'au prochain créneau libre pour cet hôte"""
+        host = urlparse(url_or_host).netloc or url_or_host
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+RATE_LIMITER = HostRateLimiter(REQUEST_INTERVAL)
+
+# ============================================================================
+# RÉPONSE + CACHE DISQUE
+# ============================================================================
+
+class FetchedResponse:
+    """Réponse servie par le fetcher (réseau ou cache)"""
+
+    def __init__(self, url, status_code, content, headers, from_cache, fetched_at):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.from_cache = from_cache
+        self.fetched_at = fetched_at
+
+    @property
+    def content_hash(self):
+        """Empreinte du corps (clé de cache des parseurs en aval)"""
+        return hashlib.sha256(self.content).hexdigest()
+
+    @property
+    def text(self):
+        match = _CHARSET_RE.search(self.headers.get('Content-Type', ''))
+        encoding = match.group(1) if match else 'utf-8'
+        try:
+            return self.content.decode(encoding, errors='replace')
+        except LookupError:
+            return self.content.decode('utf-8', errors='replace')
+
+
+class HttpCache:
+    """
+    Une entrée par URL: <sha256(url)>.body (corps brut) + .json (métadonnées).
+    Écritures atomiques (fichier temporaire + rename): sûr entre threads.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+    def get(self, url) -> Optional[FetchedResponse]:
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            content = body_path.read_bytes()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return FetchedResponse(
+            url, meta['status_code'], content, meta['headers'],
+            from_cache=True, fetched_at=meta['fetched_at']
+        )
+
+    def put(self, response: FetchedResponse):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        meta_path, body_path = self._paths(response.url)
+        meta = {
+            'url': response.url,
+            'status_code': response.status_code,
+            'headers': response.headers,
+            'fetched_at': response.fetched_at,
+            'sha256': response.content_hash,
+        }
+        # Corps d'abord: une métadonnée présente implique un corps complet
+        self._write_atomic(body_path, response.content)
+        self._write_atomic(meta_path, json.dumps(meta, indent=2, ensure_ascii=False).encode('utf-8'))
+
+    def _write_atomic(self, path, data: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+# ============================================================================
+# FETCHER
+# ============================================================================
+
+# En-têtes conservés dans le cache (revalidation + décodage)
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+class Fetcher:
+    """Point d'entrée unique des extracteurs pour tout accès HTTP"""
+
+    def __init__(self, mode=FETCH_MODE, cache_dir=CACHE_DIR, rate_limiter=RATE_LIMITER,
+                 timeout=REQUEST_TIMEOUT):
+        if mode not in FETCH_MODES:
+            raise ValueError(f"Mode de fetch inconnu: {mode} (attendu: {', '.join(FETCH_MODES)})")
+        self.mode = mode
+        self.cache = HttpCache(cache_dir)
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.stats = {'network': 0, 'revalidated': 0, 'replayed': 0, 'stale': 0}
+        self._stats_lock = threading.Lock()
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Session créée au premier accès réseau (jamais en mode offline)"""
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                session.headers.update(HEADERS)
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def get(self, url) -> FetchedResponse:
+        """GET avec cache: revalidation conditionnelle ou rejeu offline"""
+        cached = self.cache.get(url) if self.mode != 'refresh' else None
+
+        if self.mode == 'offline':
+            if cached is None:
+                raise CacheMiss(f"Absent du cache ({self.cache.cache_dir}): {url}")
+            self._count('replayed')
+            return cached
+
+        request_headers = {}
+        if cached is not None:
+            if cached.headers.get('ETag'):
+                request_headers['If-None-Match'] = cached.headers['ETag']
+            if cached.headers.get('Last-Modified'):
+                request_headers['If-Modified-Since'] = cached.headers['Last-Modified']
+
+        self.rate_limiter.wait(url)
+        try:
+            response = self.session.get(url, headers=request_headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            if cached is None:
+                raise
+            logger.warning(f"⚠ Réseau indisponible pour {url} ({e}), copie en cache servie")
+            self._count('stale')
+            return cached
+
+        if response.status_code == 304 and cached is not None:
+            logger.info(f"  ↺ Inchangé (304): {url}")
+            self._count('revalidated')
+            return cached
+
+        response.raise_for_status()
+        fetched = FetchedResponse(
+            url, response.status_code, response.content,
+            {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers},
+            from_cache=False, fetched_at=datetime.now().isoformat()
+        )
+        self.cache.put(fetched)
+        logger.info(f"  ↓ Téléchargé ({len(fetched.content):,} octets): {url}")
+        self._count('network')
+        return fetched
+
+    def close(self):
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+_default_fetcher: Optional[Fetcher] = None
+_default_lock = threading.Lock()
+
+
+def get_fetcher() -> Fetcher:
+    """Fetcher partagé par tous les extracteurs du processus"""
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is None:
+            _default_fetcher = Fetcher()
+        return _default_fetcher
+
+
+def set_fetcher(fetcher: Fetcher) -> Fetcher:
+    """Remplace le fetcher partagé (mode offline, répertoire de fixtures)"""
+    global _default_fetcher
+    with _default_lock:
+        _default_fetcher = fetcher
+        return fetcher
@@ -0,0 +1,317 @@
+"""
+Parsing rapide des documents portuaires (pages HTML, rapports PDF)
+✅ Backend HTML rapide: selectolax > lxml > BeautifulSoup (selon installation)
+✅ Règles ciblées: sélecteur CSS + regex -> un champ TrafficRecord
+✅ PDF multi-pages sur pool de processus (pdfplumber ou pypdf)
+✅ Cache par document, clé = sha256(contenu) + empreinte des règles
+
+Une règle (spec JSON):
+  {"field": "tonnage_mt", "pattern": "trafic de (?P<value>[\\d ,.]+) (?P<unit>millions?)",
+   "selector": "article", "pages": [1, 2], "scale": 1, "decimal": ","}
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Backends optionnels: le plus rapide disponible est retenu
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml.html
+    from lxml.cssselect import CSSSelector
+except ImportError:
+    CSSSelector = None
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+PARSE_CACHE_DIR = Path(os.getenv('PARSE_CACHE_DIR', 'data/parse_cache'))
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', str(os.cpu_count() or 2)))
+
+# Multiplicateurs reconnus dans le groupe nommé 'unit'
+# Pas de 'mt': dans les statistiques portuaires "MT" = tonnes métriques (x1),
+# une règle qui vise "MMT" / "Mt" déclare son échelle via 'scale'
+UNIT_SCALES = {
+    'milliard': 1e9, 'milliards': 1e9, 'billion': 1e9, 'billions': 1e9, 'bn': 1e9,
+    'million': 1e6, 'millions': 1e6, 'm': 1e6,
+    'mille': 1e3, 'k': 1e3, 'thousand': 1e3,
+}
+
+_SPACES_RE = re.compile(r'[\s  ]+')
+_THOUSANDS_RE = re.compile(r'^\d{1,3}([.,])\d{3}(\1\d{3})*$')
+
+
+class ParseError(Exception):
+    """Document illisible ou aucun backend disponible pour ce format"""
+
+# ============================================================================
+# RÈGLES CIBLÉES
+# ============================================================================
+
+def parse_number(raw: str, decimal: Optional[str] = None) -> float:
+    """
+    '10 500 000' -> 10500000, '2,51' -> 2.51, '2,510,000' -> 2510000.
+    Sans séparateur décimal déclaré: groupes de 3 chiffres = milliers.
+    """
+    value = _SPACES_RE.sub('', raw).strip('.,')
+    if decimal:
+        thousands = '.' if decimal == ',' else ','
+        return float(value.replace(thousands, '').replace(decimal, '.'))
+    if ',' in value and '.' in value:
+        decimal = ',' if value.rfind(',') > value.rfind('.') else '.'
+        return parse_number(value, decimal)
+    if _THOUSANDS_RE.match(value):
+        return float(value.replace(',', '').replace('.', ''))
+    return float(value.replace(',', '.'))
+
+
+def rules_fingerprint(rules: List[dict]) -> str:
+    """Empreinte stable des règles: les modifier invalide le cache"""
+    return hashlib.sha256(json.dumps(rules, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+_PATTERN_CACHE: Dict[str, re.Pattern] = {}
+
+
+def _compile(pattern):
+    compiled = _PATTERN_CACHE.get(pattern)
+    if compiled is None:
+        compiled = _PATTERN_CACHE[pattern] = re.compile(pattern, re.IGNORECASE)
+    return compiled
+
+
+def apply_rule(rule: dict, text: str) -> Optional[float]:
+    """Premier match de la règle dans le texte, converti et mis à l'échelle"""
+    match = _compile(rule['pattern']).search(text)
+    if not match:
+        return None
+    groups = match.groupdict()
+    raw = groups.get('value') or match.group(1)
+    value = parse_number(raw, rule.get('decimal')) * rule.get('scale', 1)
+    unit = (groups.get('unit') or '').lower()
+    if unit:
+        value *= UNIT_SCALES.get(unit, 1)
+    return value
+
+
+def apply_rules(rules: List[dict], text_for) -> Dict[str, float]:
+    """`text_for(rule)` fournit le texte ciblé (sélecteur / pages) de chaque règle"""
+    values = {}
+    for rule in rules:
+        if rule['field'] in values:
+            continue  # plusieurs règles par champ: la première qui matche gagne
+        value = apply_rule(rule, text_for(rule))
+        if value is not None:
+            values[rule['field']] = value
+    return values
+
+# ============================================================================
+# HTML
+# ============================================================================
+
+def _html_backend():
+    if HTMLParser is not None:
+        return 'selectolax'
+    if CSSSelector is not None:
+        return 'lxml'
+    return 'bs4'
+
+
+HTML_BACKEND = _html_backend()
+
+
+def html_text_blocks(html: str):
+    """
+    Retourne text_for(selector) sur un arbre parsé une seule fois.
+    Sans sélecteur: texte complet du document.
+    """
+    if HTML_BACKEND == 'selectolax':
+        tree = HTMLParser(html)
+        for node in tree.css('script, style'):
+            node.decompose()
+
+        def select(selector):
+            nodes = tree.css(selector) if selector else [tree.body or tree.root]
+            return ' '.join(node.text(separator=' ') for node in nodes if node is not None)
+
+    elif HTML_BACKEND == 'lxml':
+        tree = lxml.html.fromstring(html)
+        for node in tree.xpath('//script|//style'):
+            node.drop_tree()
+
+        def select(selector):
+            nodes = CSSSelector(selector)(tree) if selector else [tree]
+            return ' '.join(node.text_content() for node in nodes)
+
+    else:
+        from bs4 import BeautifulSoup
+        tree = BeautifulSoup(html, 'html.parser')
+        for node in tree(['script', 'style']):
+            node.decompose()
+
+        def select(selector):
+            nodes = tree.select(selector) if selector else [tree]
+            return ' '.join(node.get_text(' ') for node in nodes)
+
+    blocks = {}
+
+    def text_for(rule):
+        selector = rule.get('selector')
+        if selector not in blocks:
+            blocks[selector] = _SPACES_RE.sub(' ', select(selector))
+        return blocks[selector]
+
+    return text_for
+
+
+def parse_html(content: bytes, rules: List[dict], encoding: str = 'utf-8') -> Dict[str, float]:
+    """Applique les règles sur une page HTML"""
+    return apply_rules(rules, html_text_blocks(content.decode(encoding, errors='replace')))
+
+# ============================================================================
+# PDF (exécuté dans les processus du pool)
+# ============================================================================
+
+def pdf_pages_text(content: bytes) -> List[str]:
+    """Texte de chaque page (index 0 = page 1)"""
+    if pdfplumber is not None:
+        with pdfplumber.open(BytesIO(content)) as pdf:
+            return [page.extract_text() or '' for page in pdf.pages]
+    if PdfReader is not None:
+        return [page.extract_text() or '' for page in PdfReader(BytesIO(content)).pages]
+    raise ParseError("Aucun backend PDF installé (pip install pdfplumber)")
+
+
+def parse_pdf(content: bytes, rules: List[dict]) -> Dict[str, float]:
+    """Applique les règles sur un PDF; 'pages' (1-indexées) restreint la recherche"""
+    pages = [_SPACES_RE.sub(' ', text) for text in pdf_pages_text(content)]
+    full_text = ' '.join(pages)
+
+    def text_for(rule):
+        if not rule.get('pages'):
+            return full_text
+        return ' '.join(pages[number - 1] for number in rule['pages'] if 0 < number <= len(pages))
+
+    return apply_rules(rules, text_for)
+
+# ============================================================================
+# PARSEUR AVEC CACHE
+# ============================================================================
+
+class DocumentParser:
+    """
+    Point d'entrée des extracteurs. Un document déjà parsé avec les mêmes
+    règles (même contenu) est servi depuis le cache sans être relu.
+    """
+
+    def __init__(self, cache_dir=PARSE_CACHE_DIR, max_workers=PDF_WORKERS):
+        self.cache_dir = Path(cache_dir)
+        self.max_workers = max_workers
+        self.stats = {'parsed': 0, 'cached': 0}
+        self._stats_lock = threading.Lock()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        """Pool de processus créé au premier PDF à parser"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._pool
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _cache_path(self, content_hash, rules):
+        return self.cache_dir / f"{content_hash}-{rules_fingerprint(rules)}.json"
+
+    def _cache_get(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _cache_put(self, path, values):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f'.tmp-{os.getpid()}-{threading.get_ident()}')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(values, f)
+        os.replace(tmp_path, path)
+
+    def parse_many(self, documents: List[dict]) -> List[Dict[str, float]]:
+        """
+        documents: [{'content': bytes, 'kind': 'html'|'pdf', 'rules': [...],
+                     'content_hash': str optionnel}]
+        Les PDF non cachés partent ensemble sur le pool; résultats dans l'ordre.
+        """
+        results: List[Optional[Dict[str, float]]] = [None] * len(documents)
+        pending = []
+
+        for i, doc in enumerate(documents):
+            content_hash = doc.get('content_hash') or hashlib.sha256(doc['content']).hexdigest()
+            path = self._cache_path(content_hash, doc['rules'])
+            cached = self._cache_get(path)
+            if cached is not None:
+                results[i] = cached
+                self._count('cached')
+            elif doc['kind'] == 'pdf':
+                pending.append((i, path, self.pool.submit(parse_pdf, doc['content'], doc['rules'])))
+            elif doc['kind'] == 'html':
+                results[i] = parse_html(doc['content'], doc['rules'], doc.get('encoding', 'utf-8'))
+                self._cache_put(path, results[i])
+                self._count('parsed')
+            else:
+                raise ParseError(f"Type de document inconnu: {doc['kind']}")
+
+        for i, path, future in pending:
+            results[i] = future.result()
+            self._cache_put(path, results[i])
+            self._count('parsed')
+
+        return results
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+_default_parser: Optional[DocumentParser] = None
+_default_lock = threading.Lock()
+
+
+def get_parser() -> DocumentParser:
+    """Parseur partagé (un seul pool de processus pour tous les extracteurs)"""
+    global _default_parser
+    with _default_lock:
+        if _default_parser is None:
+            _default_parser = DocumentParser()
+        return _default_parser
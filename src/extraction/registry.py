@@ -0,0 +1,199 @@
+"""
+Registre d'extracteurs portuaires
+Interface commune + chargement des sources depuis une spec déclarative (JSON)
+
+Ajouter un port = ajouter une entrée dans sources/ports.json.
+Ajouter un type de source (scraping, PDF...) = une classe BaseExtractor
+décorée par @register_extractor('nom'). Tout accès HTTP passe par
+self.fetch(url) (session partagée + cache disque, cf. fetch.py), le
+parsing HTML/PDF par parsing.py (backend rapide, cache par document).
+
+Les extracteurs produisent un flux de TrafficRecord (tuples typés, compacts);
+le DataFrame n'est construit qu'une fois, à la consolidation.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from src.extraction.fetch import FetchedResponse, Fetcher, get_fetcher
+from src.extraction.parsing import get_parser
+
+logger = logging.getLogger(__name__)
+
+SOURCES_FILE = Path(__file__).resolve().parent / 'sources' / 'ports.json'
+
+# ============================================================================
+# ENREGISTREMENT TYPÉ
+# ============================================================================
+
+class TrafficRecord(NamedTuple):
+    """Un point de données trafic (même colonnes que all_ports_raw.csv)"""
+    port_code: str
+    port_name: str
+    country: str
+    year: int
+    quarter: Optional[int]
+    month: Optional[int]
+    tonnage_mt: Optional[float]
+    imports_mt: Optional[float]
+    exports_mt: Optional[float]
+    teus: Optional[int]
+    num_vessels: Optional[int]
+    data_source: Optional[str]
+    source_url: Optional[str]
+    extraction_date: str
+    data_quality_flag: str
+    notes: Optional[str]
+
+
+RECORD_FIELDS = list(TrafficRecord._fields)
+INTEGER_FIELDS = ('year', 'quarter', 'month', 'teus', 'num_vessels')
+
+# ============================================================================
+# INTERFACE + REGISTRE
+# ============================================================================
+
+EXTRACTOR_TYPES: Dict[str, type] = {}
+
+
+def register_extractor(name):
+    """Décorateur: rend un type d'extracteur utilisable depuis la spec"""
+    def decorator(cls):
+        EXTRACTOR_TYPES[name] = cls
+        return cls
+    return decorator
+
+
+class ExtractionCancelled(Exception):
+    """Tentative annulée par l'orchestrateur (délai dépassé)"""
+
+
+class BaseExtractor:
+    """Interface commune: une instance par port déclaré dans la spec"""
+
+    def __init__(self, spec: dict, defaults: dict, fetcher: Optional[Fetcher] = None):
+        self.spec = spec
+        self.defaults = defaults
+        self.port_code = spec['port_code']
+        self.port_name = spec['port_name']
+        self.country = spec['country']
+        self.label = spec.get('label', self.port_name)
+        self.warning = spec.get('warning')
+        self.coverage = spec.get('coverage')
+        self.fetcher = fetcher or get_fetcher()
+        self.cancel_event = None
+
+    def check_cancelled(self):
+        """Point d'arrêt: lève ExtractionCancelled si la tentative a été annulée"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ExtractionCancelled(f"{self.port_code}: tentative annulée")
+
+    def fetch(self, url) -> FetchedResponse:
+        """GET via le fetcher partagé (rate limiting par hôte, cache, offline)"""
+        self.check_cancelled()
+        return self.fetcher.get(url)
+
+    def extract(self) -> Iterator[TrafficRecord]:
+        raise NotImplementedError
+
+    def run(self, cancel_event=None) -> List[TrafficRecord]:
+        """
+        Extraction complète avec les logs habituels.
+        cancel_event (threading.Event): vérifié avant chaque requête et entre
+        les enregistrements, une tentative expirée s'arrête au point suivant.
+        """
+        self.cancel_event = cancel_event
+        logger.info("\n" + "="*70)
+        logger.info(f"EXTRACTION: {self.label}")
+        logger.info("="*70)
+        if self.warning:
+            logger.warning(f"⚠ ATTENTION: {self.warning}")
+
+        records = []
+        for record in self.extract():
+            self.check_cancelled()
+            records.append(record)
+
+        logger.info(f"✓ {self.port_code}: {len(records)} points de données extraits")
+        return records
+
+    def make_record(self, **values) -> TrafficRecord:
+        """Complète un enregistrement avec le port et les valeurs par défaut"""
+        row = {field: None for field in RECORD_FIELDS}
+        row.update(self.defaults)
+        row.update(port_code=self.port_code, port_name=self.port_name, country=self.country)
+        row.update(values)
+        return TrafficRecord(**{field: row[field] for field in RECORD_FIELDS})
+
+
+@register_extractor('static')
+class StaticRecordsExtractor(BaseExtractor):
+    """Valeurs relevées manuellement (articles, tweets, rapports) dans la spec"""
+
+    def extract(self) -> Iterator[TrafficRecord]:
+        for record in self.spec.get('records', []):
+            yield self.make_record(**record)
+
+
+@register_extractor('documents')
+class DocumentsExtractor(BaseExtractor):
+    """
+    Pages HTML / rapports PDF téléchargés puis parsés par règles ciblées.
+    Une entrée 'documents' = un enregistrement; 'years': [début, fin]
+    décline une URL contenant {year} (bulletins annuels).
+    """
+
+    def iter_documents(self):
+        for doc in self.spec.get('documents', []):
+            if 'years' in doc:
+                first, last = doc['years']
+                for year in range(first, last + 1):
+                    record = dict(doc.get('record', {}), year=year)
+                    yield dict(doc, url=doc['url'].format(year=year), record=record)
+            else:
+                yield doc
+
+    def extract(self) -> Iterator[TrafficRecord]:
+        documents = list(self.iter_documents())
+        fetched = []
+        for doc in documents:
+            response = self.fetch(doc['url'])
+            fetched.append({
+                'content': response.content,
+                'content_hash': response.content_hash,
+                'kind': doc.get('kind', 'pdf' if doc['url'].lower().endswith('.pdf') else 'html'),
+                'rules': doc.get('rules', self.spec.get('rules', [])),
+            })
+
+        # Tous les documents du port parsés en un lot (PDF en parallèle)
+        for doc, values in zip(documents, get_parser().parse_many(fetched)):
+            if not values:
+                logger.warning(f"⚠ {self.port_code}: aucune règle n'a matché dans {doc['url']}")
+                continue
+            for field in INTEGER_FIELDS:
+                if field in values:
+                    values[field] = int(round(values[field]))
+            yield self.make_record(**{'source_url': doc['url'], **doc.get('record', {}), **values})
+
+# ============================================================================
+# CHARGEMENT SPEC
+# ============================================================================
+
+def load_extractors(spec_file: Path = SOURCES_FILE,
+                    fetcher: Optional[Fetcher] = None) -> List[BaseExtractor]:
+    """Instancie un extracteur par port déclaré (ordre de la spec conservé)"""
+    with open(spec_file, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+
+    defaults = spec.get('defaults', {})
+    extractors = []
+    for port_spec in spec['ports']:
+        if not port_spec.get('enabled', True):
+            continue
+        extractor_type = port_spec.get('type', 'static')
+        if extractor_type not in EXTRACTOR_TYPES:
+            raise ValueError(f"Type d'extracteur inconnu pour {port_spec['port_code']}: {extractor_type}")
+        extractors.append(EXTRACTOR_TYPES[extractor_type](port_spec, defaults, fetcher))
+    return extractors
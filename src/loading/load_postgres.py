@@ -19,11 +19,23 @@ if sys.platform == 'win32':
 import pandas as pd
 import psycopg2
 from psycopg2 import sql, Error
+from psycopg2.extras import execute_values
+import argparse
+import json
 import logging
+import time
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 
+# Imports absolus depuis la racine du projet (src.pipeline.*)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.analytics.forecasting import (FORECAST_COLUMNS, FORECAST_TABLE, forecast,
+                                       history_from_rollup, target_years_after)
+from src.analytics.rollups import ROLLUP_COLUMNS, ROLLUP_TABLE, annual_rollup
+from src.pipeline.profiling import NULL_PROFILER, StepProfiler, add_profile_arguments
+
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
@@ -51,6 +63,16 @@ DB_CONFIG = {
 
 CLEAN_CSV = Path('data/processed/ports_clean.csv')
 
+# Années projetées après la dernière année connue (agg_port_forecast)
+FORECAST_HORIZON = int(os.getenv('FORECAST_HORIZON', '1'))
+
+# Vues matérialisées rafraîchies après chargement (cf. schema.sql)
+MATERIALIZED_VIEWS = [
+    'v_port_traffic_full',
+    'v_port_annual_summary',
+    'v_indicator_availability',
+]
+
 # ============================================================================
 # CLASSE PRINCIPALE
 # ============================================================================
@@ -58,10 +80,14 @@ CLEAN_CSV = Path('data/processed/ports_clean.csv')
 class PostgreSQLDataLoader:
     """Chargement données nettoyées → PostgreSQL"""
     
-    def __init__(self, db_config):
+    def __init__(self, db_config, csv_file=CLEAN_CSV, profiler=NULL_PROFILER):
         self.db_config = db_config
+        self.profiler = profiler
+        self.csv_file = Path(csv_file)
         self.connection = None
         self.cursor = None
+        # Clés (port_id, year) écrites par ce chargement: portée validation / agrégats
+        self.touched_keys = set()
     
     def connect(self):
         """Établit connexion PostgreSQL"""
@@ -103,13 +129,27 @@ class PostgreSQLDataLoader:
     def load_clean_csv(self):
         """Charge CSV nettoyé"""
         try:
-            df = pd.read_csv(CLEAN_CSV)
+            df = pd.read_csv(self.csv_file)
             logger.info(f"[OK] CSV charge: {len(df)} lignes")
             return df
         except Exception as e:
             logger.error(f"[ERROR] Erreur chargement CSV: {e}")
             return None
     
+    def ensure_partitions(self, df):
+        """Crée les partitions annuelles manquantes de fact_port_traffic"""
+        years = sorted(int(y) for y in df['year'].dropna().unique())
+        try:
+            for year in years:
+                self.cursor.execute("SELECT ensure_fact_partition(%s)", (year,))
+            self.connection.commit()
+            logger.info(f"[OK] Partitions annuelles pretes: {years}")
+            return True
+        except Error as e:
+            logger.error(f"[ERROR] Erreur creation partitions: {e}")
+            self.connection.rollback()
+            return False
+    
     def insert_data(self, df):
         """Insère les données nettoyées"""
         
@@ -153,6 +193,9 @@ class PostgreSQLDataLoader:
                 teus = int(row['teus']) if pd.notna(row['teus']) else None
                 num_vessels = int(row['num_vessels']) if pd.notna(row['num_vessels']) else None
                 quarter = float(row['quarter']) if pd.notna(row['quarter']) else None
+                month = int(row['month']) if 'month' in row and pd.notna(row['month']) else None
+                if month is not None and quarter is None:
+                    quarter = float((month - 1) // 3 + 1)
                 
                 has_tonnage = bool(row['has_tonnage']) if 'has_tonnage' in row else (tonnage is not None)
                 has_teus = bool(row['has_teus']) if 'has_teus' in row else (teus is not None)
@@ -160,21 +203,34 @@ class PostgreSQLDataLoader:
                 # Insertion
                 self.cursor.execute("""
                     INSERT INTO fact_port_traffic 
-                    (port_id, quality_flag_id, year, quarter, 
+                    (port_id, quality_flag_id, year, quarter, month,
                      tonnage_mt, imports_mt, exports_mt, teus, num_vessels,
                      data_source, source_url, has_tonnage, has_teus,
                      analysis_note, extraction_date, data_notes, clean_date)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (port_id, year, quarter) 
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (port_id, year, quarter, month) 
                     DO UPDATE SET
+                        quality_flag_id = EXCLUDED.quality_flag_id,
                         tonnage_mt = EXCLUDED.tonnage_mt,
+                        imports_mt = EXCLUDED.imports_mt,
+                        exports_mt = EXCLUDED.exports_mt,
                         teus = EXCLUDED.teus,
+                        num_vessels = EXCLUDED.num_vessels,
+                        data_source = EXCLUDED.data_source,
+                        source_url = EXCLUDED.source_url,
+                        has_tonnage = EXCLUDED.has_tonnage,
+                        has_teus = EXCLUDED.has_teus,
+                        analysis_note = EXCLUDED.analysis_note,
+                        extraction_date = EXCLUDED.extraction_date,
+                        data_notes = EXCLUDED.data_notes,
+                        clean_date = EXCLUDED.clean_date,
                         updated_at = CURRENT_TIMESTAMP
                 """, (
                     port_id,
                     quality_flag_id,
                     int(row['year']),
                     quarter,
+                    month,
                     tonnage,
                     imports_mt,
                     exports_mt,
@@ -191,6 +247,7 @@ class PostgreSQLDataLoader:
                 ))
                 
                 inserted += 1
+                self.touched_keys.add((port_id, int(row['year'])))
                 if (idx + 1) % 5 == 0:
                     logger.info(f"  {idx + 1}/{len(df)} lignes inserees...")
                     
@@ -221,77 +278,337 @@ class PostgreSQLDataLoader:
         except Error as e:
             logger.warning(f"[WARNING] Erreur log ETL: {e}")
     
-    def validate_load(self):
-        """Valide le chargement"""
+    def refresh_materialized_views(self):
+        """Rafraîchit les vues analytiques (CONCURRENTLY: lecteurs non bloqués)"""
+        logger.info("\n" + "="*70)
+        logger.info("RAFRAICHISSEMENT VUES MATERIALISEES")
+        logger.info("="*70)
+        
+        refreshed = 0
+        for view in MATERIALIZED_VIEWS:
+            try:
+                self.cursor.execute(
+                    sql.SQL("REFRESH MATERIALIZED VIEW CONCURRENTLY {}").format(sql.Identifier(view))
+                )
+                self.connection.commit()
+                refreshed += 1
+                logger.info(f"[OK] {view} rafraichie")
+            except Error as e:
+                logger.warning(f"[WARNING] Erreur refresh {view}: {e}")
+                self.connection.rollback()
+        return refreshed
+    
+    # Faits bruts des clés à agréger (même jointure de portée que la validation)
+    ROLLUP_FACTS_QUERY = """
+        SELECT f.port_id, f.year, f.quarter, f.month, f.tonnage_mt, f.teus, f.num_vessels,
+               q.flag_name AS data_quality_flag
+        FROM fact_port_traffic f
+        {scope}
+        LEFT JOIN dim_quality_flag q ON f.quality_flag_id = q.flag_id
+        {where}
+    """
+    
+    def _scope_clause(self, scope):
+        """(jointure, filtre, paramètres) limitant une requête aux clés du chargement"""
+        if scope != 'touched':
+            return '', '', None
+        port_ids, years = (list(values) for values in zip(*sorted(self.touched_keys)))
+        return (
+            "JOIN unnest(%(port_ids)s::int[], %(years)s::int[]) AS k(port_id, year) "
+            "ON f.port_id = k.port_id AND f.year = k.year",
+            "WHERE f.year = ANY(%(years)s)",
+            {'port_ids': port_ids, 'years': years},
+        )
+    
+    def refresh_rollups(self, scope='touched'):
+        """
+        Recalcule agg_port_annual_rollup (cf. src/analytics/rollups.py).
+        Seules les lignes dont les valeurs changent sont réécrites (updated_at
+        sert au mart incrémental); scope='full' purge aussi les clés disparues.
+        """
+        logger.info("\n" + "="*70)
+        logger.info("AGREGATS ANNUELS (GRANULARITE MIXTE)")
+        logger.info("="*70)
+        
+        if scope == 'touched' and not self.touched_keys:
+            logger.info("[OK] Aucune cle chargee: agregats inchanges")
+            return 0
+        
+        join, where, params = self._scope_clause(scope)
+        try:
+            self.cursor.execute(self.ROLLUP_FACTS_QUERY.format(scope=join, where=where), params)
+            facts = pd.DataFrame(self.cursor.fetchall(), columns=[d[0] for d in self.cursor.description])
+        except Error as e:
+            logger.error(f"[ERROR] Lecture faits: {e}")
+            self.connection.rollback()
+            return 0
+        if facts.empty:
+            logger.info("[OK] Aucun fait a agreger")
+            return 0
+        
+        rollup = annual_rollup(facts)
+        rows = list(rollup.astype(object).where(rollup.notna(), None).itertuples(index=False, name=None))
+        columns = sql.SQL(', ').join(map(sql.Identifier, ROLLUP_COLUMNS))
+        values = [c for c in ROLLUP_COLUMNS if c not in ('port_id', 'year')]
+        upsert = sql.SQL("""
+            INSERT INTO {table} AS r ({columns}) VALUES %s
+            ON CONFLICT (port_id, year) DO UPDATE SET
+                {updates}, updated_at = CURRENT_TIMESTAMP
+            WHERE ({current}) IS DISTINCT FROM ({excluded})
+        """).format(
+            table=sql.Identifier(ROLLUP_TABLE),
+            columns=columns,
+            updates=sql.SQL(', ').join(
+                sql.SQL('{0} = EXCLUDED.{0}').format(sql.Identifier(c)) for c in values
+            ),
+            current=sql.SQL(', ').join(sql.SQL('r.{}').format(sql.Identifier(c)) for c in values),
+            excluded=sql.SQL(', ').join(sql.SQL('EXCLUDED.{}').format(sql.Identifier(c)) for c in values),
+        )
+        
+        try:
+            if scope == 'full':
+                self.cursor.execute(sql.SQL(
+                    "DELETE FROM {} r WHERE NOT EXISTS ("
+                    "SELECT 1 FROM fact_port_traffic f WHERE f.port_id = r.port_id AND f.year = r.year)"
+                ).format(sql.Identifier(ROLLUP_TABLE)))
+            execute_values(self.cursor, upsert.as_string(self.connection), rows, page_size=1000)
+            self.connection.commit()
+        except Error as e:
+            logger.error(f"[ERROR] Ecriture agregats: {e}")
+            self.connection.rollback()
+            return 0
+        
+        partial = rollup[rollup['completeness_ratio'] < 1]
+        logger.info(f"[OK] {len(rollup)} cles (port, annee) agregees ({scope})")
+        logger.info(f"  - Granularites: {rollup['source_grain'].value_counts().to_dict()}")
+        logger.info(f"  - Annees incompletes: {len(partial)}")
+        logger.info(f"  - Lignes fines ecartees (doublon annuel): {int(rollup['discarded_rows'].sum())}")
+        return len(rollup)
+    
+    def refresh_forecasts(self, scope='touched'):
+        """
+        Recalcule agg_port_forecast depuis agg_port_annual_rollup (cf.
+        src/analytics/forecasting.py): historique complet des ports touchés,
+        années cibles alignées sur la dernière année connue tous ports confondus.
+        Si ces années cibles changent, tous les ports sont recalculés (le mart
+        ne mélange jamais deux horizons).
+        """
+        logger.info("\n" + "="*70)
+        logger.info("PROJECTIONS (TENDANCE PAR PORT)")
+        logger.info("="*70)
+        
+        if scope == 'touched' and not self.touched_keys:
+            logger.info("[OK] Aucune cle chargee: projections inchangees")
+            return 0
+        
+        if scope == 'touched':
+            try:
+                self.cursor.execute(f"""
+                    SELECT (SELECT max(year) FROM {ROLLUP_TABLE}) AS latest_year,
+                           (SELECT array_agg(DISTINCT year ORDER BY year) FROM {FORECAST_TABLE}) AS stored_years
+                """)
+                latest_year, stored_years = self.cursor.fetchone()
+            except Error as e:
+                logger.error(f"[ERROR] Lecture horizon: {e}")
+                self.connection.rollback()
+                return 0
+            targets = target_years_after(pd.DataFrame({'year': [latest_year]}), FORECAST_HORIZON) if latest_year else []
+            if targets != list(stored_years or []):
+                logger.info(f"[OK] Annees cibles {list(stored_years or [])} -> {targets}: tous les ports recalcules")
+                scope = 'full'
+        
+        port_ids = sorted({port_id for port_id, _ in self.touched_keys})
+        where = "WHERE port_id = ANY(%(port_ids)s)" if scope == 'touched' else ""
+        try:
+            self.cursor.execute(f"""
+                SELECT port_id, year, completeness_ratio, tonnage_mt_annualized,
+                       teus_annualized, num_records, estimated_records,
+                       (SELECT max(year) FROM {ROLLUP_TABLE}) AS latest_year
+                FROM {ROLLUP_TABLE}
+                {where}
+            """, {'port_ids': port_ids})
+            rollup = pd.DataFrame(self.cursor.fetchall(), columns=[d[0] for d in self.cursor.description])
+        except Error as e:
+            logger.error(f"[ERROR] Lecture agregats: {e}")
+            self.connection.rollback()
+            return 0
+        if rollup.empty:
+            logger.info("[OK] Aucun agregat: pas de projection")
+            return 0
+        
+        history = history_from_rollup(rollup)
+        latest = pd.DataFrame({'year': [int(rollup['latest_year'].iloc[0])]})
+        result = forecast(history, target_years_after(latest, FORECAST_HORIZON))
+        rows = list(result.astype(object).where(result.notna(), None).itertuples(index=False, name=None))
+        
+        try:
+            if scope == 'touched':
+                self.cursor.execute(f"DELETE FROM {FORECAST_TABLE} WHERE port_id = ANY(%s)", (port_ids,))
+            else:
+                self.cursor.execute(f"DELETE FROM {FORECAST_TABLE}")
+            execute_values(
+                self.cursor,
+                f"INSERT INTO {FORECAST_TABLE} ({', '.join(FORECAST_COLUMNS)}) VALUES %s",
+                rows, page_size=1000
+            )
+            self.connection.commit()
+        except Error as e:
+            logger.error(f"[ERROR] Ecriture projections: {e}")
+            self.connection.rollback()
+            return 0
+        
+        logger.info(f"[OK] {len(result)} projections ({scope}, annees {sorted(result['year'].unique().tolist())})")
+        logger.info(f"  - Methodes: {result['method'].value_counts().to_dict()}")
+        return len(result)
+    
+    # Une seule passe: total, par port et par flag via GROUPING SETS.
+    # Portée "touched": jointure sur les clés (port_id, year) du chargement,
+    # filtre sur year pour l'élagage des partitions.
+    VALIDATION_QUERY = """
+        SELECT
+            p.port_code,
+            q.flag_name,
+            GROUPING(p.port_code) AS by_port,
+            GROUPING(q.flag_name) AS by_flag,
+            COUNT(*) AS num_records,
+            COUNT(DISTINCT (f.port_id, f.year)) AS num_keys
+        FROM fact_port_traffic f
+        {scope}
+        JOIN dim_port p ON f.port_id = p.port_id
+        LEFT JOIN dim_quality_flag q ON f.quality_flag_id = q.flag_id
+        {where}
+        GROUP BY GROUPING SETS ((p.port_code), (q.flag_name), ())
+    """
+    
+    def validate_load(self, scope='touched'):
+        """
+        Valide le chargement en une requête (GROUPING SETS).
+        scope='touched': seulement les clés écrites par ce chargement,
+        scope='full': toute la table. Résultat persisté dans etl_load_history.
+        """
         logger.info("\n" + "="*70)
         logger.info("VALIDATION CHARGEMENT")
         logger.info("="*70)
         
+        if scope == 'touched' and not self.touched_keys:
+            logger.info("[OK] Aucune cle chargee: validation ignoree")
+            return None
+        
+        start = time.perf_counter()
+        join, where, params = self._scope_clause(scope)
+        query = self.VALIDATION_QUERY.format(scope=join, where=where)
+        
         try:
-            # Total records
-            self.cursor.execute("SELECT COUNT(*) FROM fact_port_traffic")
-            total = self.cursor.fetchone()[0]
-            logger.info(f"[OK] Total records: {total}")
-            
-            # Par port
-            self.cursor.execute("""
-                SELECT p.port_code, COUNT(*) 
-                FROM fact_port_traffic f
-                JOIN dim_port p ON f.port_id = p.port_id
-                GROUP BY p.port_code
-                ORDER BY p.port_code
-            """)
-            logger.info(f"[OK] Distribution par port:")
-            for port_code, count in self.cursor.fetchall():
-                logger.info(f"    {port_code}: {count}")
-            
-            # Quality flags
-            self.cursor.execute("""
-                SELECT q.flag_name, COUNT(*)
-                FROM fact_port_traffic f
-                LEFT JOIN dim_quality_flag q ON f.quality_flag_id = q.flag_id
-                GROUP BY q.flag_name
-            """)
-            logger.info(f"[OK] Distribution quality:")
-            for flag, count in self.cursor.fetchall():
-                logger.info(f"    {flag}: {count}")
-            
+            self.cursor.execute(query, params)
+            rows = self.cursor.fetchall()
         except Error as e:
             logger.error(f"[ERROR] Erreur validation: {e}")
+            self.connection.rollback()
+            return None
+        
+        result = {
+            'scope': scope,
+            'total_records': 0,
+            'keys_found': 0,
+            'by_port': {},
+            'by_flag': {},
+        }
+        for port_code, flag_name, by_port, by_flag, num_records, num_keys in rows:
+            if by_port and by_flag:
+                result['total_records'] = num_records
+                result['keys_found'] = num_keys
+            elif not by_port:
+                result['by_port'][port_code] = num_records
+            else:
+                result['by_flag'][flag_name or 'NONE'] = num_records
+        
+        if scope == 'touched':
+            result['keys_expected'] = len(self.touched_keys)
+            result['keys_missing'] = len(self.touched_keys) - result['keys_found']
+            result['years'] = sorted(set(params['years']))
+        status = 'FAILED' if result.get('keys_missing') else 'SUCCESS'
+        duration_ms = int((time.perf_counter() - start) * 1000)
+        
+        logger.info(f"[OK] Total records ({scope}): {result['total_records']}")
+        if 'keys_missing' in result:
+            logger.info(f"[{'OK' if status == 'SUCCESS' else 'ERROR'}] Cles (port, annee): "
+                        f"{result['keys_found']}/{result['keys_expected']}")
+        logger.info(f"[OK] Distribution par port:")
+        for port_code, count in sorted(result['by_port'].items()):
+            logger.info(f"    {port_code}: {count}")
+        logger.info(f"[OK] Distribution quality:")
+        for flag, count in result['by_flag'].items():
+            logger.info(f"    {flag}: {count}")
+        
+        try:
+            self.cursor.execute("""
+                INSERT INTO etl_load_history
+                    (load_phase, action, num_records, status, duration_ms, details)
+                VALUES ('phase2', 'validate_load', %s, %s, %s, %s)
+            """, (result['total_records'], status, duration_ms, json.dumps(result)))
+            self.connection.commit()
+        except Error as e:
+            logger.warning(f"[WARNING] Erreur log validation: {e}")
+            self.connection.rollback()
+        
+        return result
     
-    def run(self):
-        """Exécution complète"""
+    def run(self, validate_scope='touched', rollup_scope='touched'):
+        """Exécution complète (chaque étape chronométrée si --profile)"""
+        step = self.profiler.step
         
         logger.info("\n" + "="*70)
         logger.info("PHASE 2: CHARGEMENT DONNEES NETTOYEES")
         logger.info("="*70)
         
         # 1. Connexion
-        if not self.connect():
+        with step('connect'):
+            connected = self.connect()
+        if not connected:
             return False
         
         # 2. Vérification schéma
-        if not self.check_schema_ready():
+        with step('check_schema'):
+            schema_ready = self.check_schema_ready()
+        if not schema_ready:
             self.close()
             return False
         
         # 3. Chargement CSV
-        df = self.load_clean_csv()
+        with step('load_csv'):
+            df = self.load_clean_csv()
         if df is None or df.empty:
             self.close()
             return False
         
-        # 4. Insertion
-        inserted, failed = self.insert_data(df)
+        # 4. Partitions + insertion
+        with step('partitions'):
+            partitions_ready = self.ensure_partitions(df)
+        if not partitions_ready:
+            self.close()
+            return False
+        with step('insert'):
+            inserted, failed = self.insert_data(df)
         
         # 5. Log ETL
         status = 'SUCCESS' if failed == 0 else 'PARTIAL' if inserted > 0 else 'FAILED'
-        self.log_etl_operation(inserted, status)
+        with step('log_etl'):
+            self.log_etl_operation(inserted, status)
         
-        # 6. Validation
-        self.validate_load()
+        # 6. Agrégats annuels, projections + vues matérialisées (après commit du chargement)
+        if inserted > 0:
+            with step('rollups'):
+                self.refresh_rollups(rollup_scope)
+            with step('forecasts'):
+                self.refresh_forecasts(rollup_scope)
+            with step('refresh_views'):
+                self.refresh_materialized_views()
         
-        # 7. Fermeture
+        # 7. Validation
+        with step('validate'):
+            self.validate_load(validate_scope)
+        
+        # 8. Fermeture
         self.close()
         
         logger.info("\n" + "="*70)
@@ -307,8 +624,18 @@ class PostgreSQLDataLoader:
 
 def main():
     """Script principal"""
-    loader = PostgreSQLDataLoader(DB_CONFIG)
-    success = loader.run()
+    parser = argparse.ArgumentParser(description="Phase 2: chargement PostgreSQL")
+    parser.add_argument('--validate-scope', choices=['touched', 'full'], default='touched',
+                        help="touched: clés du chargement seulement, full: toute la table")
+    parser.add_argument('--rollup-scope', choices=['touched', 'full'], default='touched',
+                        help="agg_port_annual_rollup / agg_port_forecast: clés du chargement ou recalcul complet")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
+    profiler = StepProfiler.from_args('loader', args)
+    loader = PostgreSQLDataLoader(DB_CONFIG, profiler=profiler)
+    success = loader.run(args.validate_scope, args.rollup_scope)
+    profiler.write_report()
     return 0 if success else 1
 
 
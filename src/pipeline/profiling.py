@@ -0,0 +1,206 @@
+"""
+Profilage par étape des scripts ETL (--profile)
+✅ Chronométrage de chaque étape (rapport texte + timings.json)
+✅ Échantillonneur de piles -> stacks.folded (flamegraph.pl, speedscope, inferno)
+✅ Option cProfile: un .prof par étape + top fonctions (cprofile.txt)
+
+Utilisation dans un script:
+    profiler = StepProfiler('cleaner', enabled=args.profile, mode=args.profiler)
+    with profiler.step('load'):
+        ...
+    profiler.write_report()
+
+Lecture:
+  flamegraph.pl profiles/<run>/stacks.folded > flame.svg
+  snakeviz profiles/<run>/insert.prof
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+PROFILE_DIR = Path(os.getenv('PROFILE_DIR', 'profiles'))
+PROFILER_MODES = ('sample', 'cprofile', 'none')
+SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.005'))  # secondes
+TOP_FUNCTIONS = 25
+
+
+def add_profile_arguments(parser):
+    """Options --profile communes aux scripts ETL"""
+    parser.add_argument('--profile', action='store_true',
+                        help="chronométrer chaque étape et écrire un rapport de profilage")
+    parser.add_argument('--profiler', choices=PROFILER_MODES, default='sample',
+                        help="sample: piles pour flame graph, cprofile: .prof par étape, none: timers seuls")
+    parser.add_argument('--profile-dir', default=str(PROFILE_DIR),
+                        help="répertoire des rapports de profilage")
+
+# ============================================================================
+# ÉCHANTILLONNEUR DE PILES
+# ============================================================================
+
+class StackSampler(threading.Thread):
+    """
+    Relève la pile du thread profilé toutes les `interval` secondes et compte
+    les piles repliées ("étape;module:fonction;..."), format flame graph.
+    """
+
+    def __init__(self, target_thread_id, interval=SAMPLE_INTERVAL):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.current_step = None
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def _frame_label(frame):
+        code = frame.f_code
+        return f"{Path(code.co_filename).stem}:{code.co_name}"
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            step = self.current_step
+            if step is None:
+                continue
+            frame = sys._current_frames().get(self.target_thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(self._frame_label(frame))
+                frame = frame.f_back
+            labels.append(step)
+            self.stacks[';'.join(reversed(labels))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+# ============================================================================
+# PROFILEUR PAR ÉTAPE
+# ============================================================================
+
+class StepProfiler:
+    """Timers par étape; désactivé, step() ne coûte qu'un contexte vide"""
+
+    def __init__(self, name, enabled=False, mode='sample', output_dir=PROFILE_DIR):
+        if mode not in PROFILER_MODES:
+            raise ValueError(f"Profileur inconnu: {mode} (attendu: {', '.join(PROFILER_MODES)})")
+        self.name = name
+        self.enabled = enabled
+        self.mode = mode
+        self.output_dir = Path(output_dir)
+        self.timings = []
+        self.profiles = {}
+        self._sampler = None
+        self._started = None
+
+    @classmethod
+    def from_args(cls, name, args):
+        return cls(name, enabled=args.profile, mode=args.profiler, output_dir=args.profile_dir)
+
+    def _ensure_started(self):
+        if self._started is not None:
+            return
+        self._started = time.perf_counter()
+        if self.mode == 'sample':
+            self._sampler = StackSampler(threading.get_ident())
+            self._sampler.start()
+
+    @contextmanager
+    def step(self, step_name):
+        if not self.enabled:
+            yield
+            return
+
+        self._ensure_started()
+        profile = cProfile.Profile() if self.mode == 'cprofile' else None
+        if self._sampler is not None:
+            self._sampler.current_step = step_name
+        if profile is not None:
+            profile.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if profile is not None:
+                profile.disable()
+                self.profiles[step_name] = profile
+            if self._sampler is not None:
+                self._sampler.current_step = None
+            self.timings.append({'step': step_name, 'seconds': round(elapsed, 6)})
+            logger.info(f"⏱ {step_name}: {elapsed * 1000:.1f} ms")
+
+    def write_report(self):
+        """Écrit le rapport (timings.json, stacks.folded, .prof) et retourne son dossier"""
+        if not self.enabled or self._started is None:
+            return None
+
+        total = time.perf_counter() - self._started
+        if self._sampler is not None:
+            self._sampler.stop()
+
+        run_dir = self.output_dir / f"{self.name}_{datetime.now().strftime('%Y%m%dT%H%M%S')}"
+        run_dir.mkdir(parents=True, exist_ok=True)
+
+        steps_total = sum(t['seconds'] for t in self.timings) or 1
+        report = {
+            'script': self.name,
+            'timestamp': datetime.now().isoformat(),
+            'profiler': self.mode,
+            'total_seconds': round(total, 6),
+            'steps': [
+                dict(t, share_pct=round(100 * t['seconds'] / steps_total, 1))
+                for t in self.timings
+            ],
+        }
+        with open(run_dir / 'timings.json', 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+        if self._sampler is not None:
+            with open(run_dir / 'stacks.folded', 'w', encoding='utf-8') as f:
+                for stack, count in sorted(self._sampler.stacks.items()):
+                    f.write(f"{stack} {count}\n")
+            report['samples'] = sum(self._sampler.stacks.values())
+
+        if self.profiles:
+            with open(run_dir / 'cprofile.txt', 'w', encoding='utf-8') as f:
+                for step_name, profile in self.profiles.items():
+                    profile.dump_stats(run_dir / f"{step_name}.prof")
+                    buffer = io.StringIO()
+                    pstats.Stats(profile, stream=buffer).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+                    f.write(f"{'=' * 70}\n{step_name}\n{'=' * 70}\n{buffer.getvalue()}\n")
+
+        self._log_report(report, run_dir)
+        return run_dir
+
+    @staticmethod
+    def _log_report(report, run_dir):
+        logger.info("\n" + "="*70)
+        logger.info(f"PROFIL {report['script'].upper()} ({report['profiler']})")
+        logger.info("="*70)
+        for t in sorted(report['steps'], key=lambda t: t['seconds'], reverse=True):
+            bar = '█' * int(t['share_pct'] / 2.5)
+            logger.info(f"  {t['step']:<20} {t['seconds'] * 1000:>10.1f} ms  {t['share_pct']:>5.1f}%  {bar}")
+        logger.info(f"  {'TOTAL':<20} {report['total_seconds'] * 1000:>10.1f} ms")
+        if 'samples' in report:
+            logger.info(f"  Échantillons de piles: {report['samples']}")
+        logger.info(f"✓ Rapport de profilage: {run_dir}")
+
+
+NULL_PROFILER = StepProfiler('disabled')
@@ -0,0 +1,392 @@
+"""
+Pipeline ETL complet: extraction → nettoyage → chargement → dbt
+Remplace l'enchaînement manuel (launch.ps1 / launch.bat)
+
+Principe:
+1. Chaque étape déclare ses entrées et sorties (hash fichiers, hash
+   row-set PostgreSQL, état des modèles dbt)
+2. Une étape à jour (entrées ET sorties inchangées) est sautée
+3. Les étapes indépendantes tournent en parallèle (pool de threads)
+4. Durée de chaque étape enregistrée dans etl_load_history
+
+Exécution (depuis la racine du projet):
+  python src/pipeline/run_pipeline.py
+  python src/pipeline/run_pipeline.py --force extract   # force une étape
+  python src/pipeline/run_pipeline.py --force all       # tout relancer
+  python src/pipeline/run_pipeline.py --dry-run         # plan seulement
+"""
+
+import sys
+import os
+import io
+
+# Fix encoding on Windows
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+import argparse
+import hashlib
+import json
+import logging
+import subprocess
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+import psycopg2
+from psycopg2 import Error
+from dotenv import load_dotenv
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+load_dotenv()
+
+ROOT = Path(__file__).resolve().parents[2]
+STATE_FILE = ROOT / 'data' / 'pipeline_state.json'
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler(ROOT / 'pipeline.log', encoding='utf-8'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'database': os.getenv('DB_NAME', 'ports_dashboard'),
+    'user': os.getenv('DB_USER', 'postgres'),
+    'password': os.getenv('DB_PASSWORD', 'postgres'),
+    'port': os.getenv('DB_PORT', '5432'),
+}
+
+# ============================================================================
+# EMPREINTES (FINGERPRINTS)
+# ============================================================================
+
+def file_fingerprint(*patterns):
+    """Hash du contenu des fichiers (chemins ou globs relatifs à ROOT)"""
+    def fingerprint():
+        digest = hashlib.sha256()
+        for pattern in patterns:
+            paths = sorted(ROOT.glob(pattern)) if any(c in pattern for c in '*?[') else [ROOT / pattern]
+            for path in paths:
+                digest.update(str(path.relative_to(ROOT)).encode())
+                if path.is_file():
+                    with open(path, 'rb') as f:
+                        for chunk in iter(lambda: f.read(1 << 20), b''):
+                            digest.update(chunk)
+                else:
+                    digest.update(b'<missing>')
+        return digest.hexdigest()
+    fingerprint.label = f"files:{','.join(patterns)}"
+    return fingerprint
+
+
+def db_fingerprint(label, query):
+    """Hash d'un row-set PostgreSQL (la requête retourne une seule valeur texte)"""
+    def fingerprint():
+        try:
+            connection = psycopg2.connect(**DB_CONFIG)
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(query)
+                    return hashlib.sha256(str(cursor.fetchone()[0]).encode()).hexdigest()
+            finally:
+                connection.close()
+        except Error as e:
+            logger.warning(f"[WARNING] Empreinte {label} indisponible: {e}")
+            return None
+    fingerprint.label = f"db:{label}"
+    return fingerprint
+
+
+# Colonnes métier seulement: un upsert identique ne change pas l'empreinte
+FACT_ROWSET = db_fingerprint('fact_port_traffic', """
+    SELECT md5(coalesce(string_agg(
+        concat_ws('|', port_id, quality_flag_id, year, quarter, month, tonnage_mt, imports_mt,
+                  exports_mt, teus, num_vessels, data_source, has_tonnage, has_teus),
+        E'\\n' ORDER BY port_id, year, quarter, month), ''))
+    FROM fact_port_traffic
+""")
+
+# Agrégats lus par mart_port_annual_summary (updated_at exclu, comme les faits)
+ROLLUP_ROWSET = db_fingerprint('agg_port_annual_rollup', """
+    SELECT md5(coalesce(string_agg(
+        concat_ws('|', port_id, year, source_grain, periods_expected, periods_observed,
+                  completeness_ratio, tonnage_mt, tonnage_mt_annualized, teus, teus_annualized,
+                  num_vessels, num_records, records_with_tonnage, records_with_teus,
+                  verified_records, estimated_records, discarded_rows),
+        E'\\n' ORDER BY port_id, year), ''))
+    FROM agg_port_annual_rollup
+""")
+
+# Projections lues par mart_port_forecast (refreshed_at exclu)
+FORECAST_ROWSET = db_fingerprint('agg_port_forecast', """
+    SELECT md5(coalesce(string_agg(
+        concat_ws('|', port_id, metric, year, forecast, lower_bound, upper_bound,
+                  confidence_level, method, n_points, first_year, last_year, slope),
+        E'\\n' ORDER BY port_id, metric, year), ''))
+    FROM agg_port_forecast
+""")
+
+DIM_ROWSET = db_fingerprint('dimensions', """
+    SELECT md5(
+        (SELECT coalesce(string_agg(concat_ws('|', port_id, port_code, port_name, country), E'\\n'
+                ORDER BY port_id), '') FROM dim_port)
+        || (SELECT coalesce(string_agg(concat_ws('|', flag_id, flag_name, severity), E'\\n'
+                ORDER BY flag_id), '') FROM dim_quality_flag)
+    )
+""")
+
+MARTS_STATE = db_fingerprint('public_marts', """
+    SELECT coalesce(string_agg(table_name, ',' ORDER BY table_name), '')
+        || '|' || (SELECT count(*) FROM public_marts.mart_port_annual_summary)
+    FROM information_schema.tables
+    WHERE table_schema = 'public_marts'
+""")
+
+
+def combine(fingerprints):
+    """Empreinte globale; None si une composante est indisponible"""
+    parts = {}
+    for fingerprint in fingerprints:
+        value = fingerprint()
+        if value is None:
+            return None
+        parts[fingerprint.label] = value
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+# ============================================================================
+# ÉTAPES
+# ============================================================================
+
+class Stage:
+    """Étape du pipeline: commande + entrées/sorties + dépendances"""
+
+    def __init__(self, name, command, inputs, outputs=(), deps=(), cwd=ROOT):
+        self.name = name
+        self.command = command
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.deps = tuple(deps)
+        self.cwd = cwd
+
+
+PYTHON = sys.executable
+
+STAGES = [
+    Stage(
+        'extract',
+        [PYTHON, 'src/extraction/extract_phase1.py'],
+        inputs=[file_fingerprint('src/extraction/extract_phase1.py', 'src/extraction/registry.py',
+                                 'src/extraction/fetch.py', 'src/extraction/parsing.py',
+                                 'src/extraction/sources/*.json')],
+        outputs=[file_fingerprint('data/raw/all_ports_raw.csv')],
+    ),
+    Stage(
+        'validate_raw',
+        [PYTHON, 'src/extraction/validate_phase1.py'],
+        inputs=[file_fingerprint('src/extraction/validate_phase1.py', 'data/raw/all_ports_raw.csv')],
+        deps=['extract'],
+    ),
+    Stage(
+        'clean',
+        [PYTHON, 'src/extraction/clean_dataset_phase1.py'],
+        inputs=[file_fingerprint('src/extraction/clean_dataset_phase1.py', 'src/quality/*.py',
+                                 'src/quality/rules.json', 'src/pipeline/profiling.py',
+                                 'data/raw/all_ports_raw.csv')],
+        outputs=[file_fingerprint('data/processed/ports_clean.csv', 'data/processed/cleaning_report.json')],
+        deps=['extract'],
+    ),
+    Stage(
+        'compare',
+        [PYTHON, 'src/extraction/compare_before_after.py'],
+        inputs=[file_fingerprint(
+            'src/extraction/compare_before_after.py',
+            'data/raw/all_ports_raw.csv',
+            'data/processed/ports_clean.csv',
+            'data/processed/cleaning_report.json',
+        )],
+        deps=['clean'],
+    ),
+    Stage(
+        'load',
+        [PYTHON, 'src/loading/load_postgres.py'],
+        inputs=[file_fingerprint('src/loading/load_postgres.py', 'src/analytics/*.py',
+                                 'src/quality/*.py', 'src/pipeline/profiling.py',
+                                 'data/processed/ports_clean.csv')],
+        outputs=[FACT_ROWSET, ROLLUP_ROWSET, FORECAST_ROWSET],
+        deps=['clean'],
+    ),
+    Stage(
+        'dbt',
+        ['dbt', 'run', '--profiles-dir', '.'],
+        inputs=[
+            file_fingerprint('dbt_project/dbt_project.yml', 'dbt_project/profiles.yml',
+                             'dbt_project/models/**/*.sql',
+                             'dbt_project/models/**/*.yml', 'dbt_project/macros/*.sql'),
+            FACT_ROWSET,
+            ROLLUP_ROWSET,
+            FORECAST_ROWSET,
+            DIM_ROWSET,
+        ],
+        outputs=[MARTS_STATE],
+        deps=['load'],
+        cwd=ROOT / 'dbt_project',
+    ),
+]
+
+# ============================================================================
+# ORCHESTRATEUR
+# ============================================================================
+
+class PipelineRunner:
+    """Exécute le DAG des étapes en sautant celles qui sont à jour"""
+
+    def __init__(self, stages, force=(), dry_run=False, max_workers=2):
+        self.stages = {stage.name: stage for stage in stages}
+        self.force = set(self.stages) if 'all' in force else set(force)
+        self.dry_run = dry_run
+        self.max_workers = max_workers
+        self.state = self.load_state()
+        self.results = {}
+        self._lock = threading.Lock()
+
+    def load_state(self):
+        """Empreintes du dernier run réussi par étape"""
+        if STATE_FILE.exists():
+            with open(STATE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def save_state(self):
+        STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(STATE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, ensure_ascii=False)
+
+    def is_up_to_date(self, stage, input_fp):
+        """À jour si mêmes entrées que le dernier succès et sorties intactes"""
+        previous = self.state.get(stage.name)
+        if stage.name in self.force or not previous or input_fp is None:
+            return False
+        if previous.get('input') != input_fp:
+            return False
+        return previous.get('output') == combine(stage.outputs)
+
+    def run_stage(self, stage):
+        """Exécute une étape (ou la saute) et retourne son statut"""
+        start = time.perf_counter()
+        input_fp = combine(stage.inputs)
+
+        if self.is_up_to_date(stage, input_fp):
+            status = 'SKIPPED'
+        elif self.dry_run:
+            status = 'WOULD_RUN'
+        else:
+            logger.info(f"▶ {stage.name}: {' '.join(str(c) for c in stage.command)}")
+            completed = subprocess.run(stage.command, cwd=stage.cwd)
+            status = 'SUCCESS' if completed.returncode == 0 else 'FAILED'
+            if status == 'SUCCESS':
+                with self._lock:
+                    self.state[stage.name] = {
+                        # Entrées recalculées: l'étape a pu modifier ses propres entrées
+                        'input': combine(stage.inputs),
+                        'output': combine(stage.outputs),
+                        'finished_at': datetime.now().isoformat(),
+                    }
+                    self.save_state()
+
+        duration_ms = int((time.perf_counter() - start) * 1000)
+        logger.info(f"{'✓' if status != 'FAILED' else '✗'} {stage.name}: {status} ({duration_ms} ms)")
+        if not self.dry_run:
+            self.log_stage(stage.name, status, duration_ms)
+        return status, duration_ms
+
+    def log_stage(self, stage_name, status, duration_ms):
+        """Enregistre la durée de l'étape dans etl_load_history"""
+        try:
+            connection = psycopg2.connect(**DB_CONFIG)
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("""
+                        INSERT INTO etl_load_history (load_phase, action, status, duration_ms)
+                        VALUES ('pipeline', %s, %s, %s)
+                    """, (stage_name, status, duration_ms))
+                connection.commit()
+            finally:
+                connection.close()
+        except Error as e:
+            logger.warning(f"[WARNING] Erreur log ETL ({stage_name}): {e}")
+
+    def run(self):
+        """Lance chaque étape dès que ses dépendances sont terminées"""
+        logger.info("\n" + "="*70)
+        logger.info("PIPELINE ETL" + (" (DRY RUN)" if self.dry_run else ""))
+        logger.info("="*70)
+
+        pipeline_start = time.perf_counter()
+        pending = dict(self.stages)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if not all(dep in self.results for dep in stage.deps):
+                        continue
+                    del pending[name]
+                    if any(self.results[dep][0] in ('FAILED', 'BLOCKED') for dep in stage.deps):
+                        self.results[name] = ('BLOCKED', 0)
+                        logger.warning(f"✗ {name}: BLOCKED (dépendance en échec)")
+                        continue
+                    running[pool.submit(self.run_stage, stage)] = name
+
+                if not running:
+                    if pending:
+                        logger.error(f"✗ Dépendances inconnues: {sorted(pending)}")
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    self.results[running.pop(future)] = future.result()
+
+        total_ms = int((time.perf_counter() - pipeline_start) * 1000)
+        self.print_summary(total_ms)
+        return all(status not in ('FAILED', 'BLOCKED') for status, _ in self.results.values())
+
+    def print_summary(self, total_ms):
+        logger.info("\n" + "="*70)
+        logger.info("RÉSUMÉ PIPELINE")
+        logger.info("="*70)
+        for name in self.stages:
+            status, duration_ms = self.results.get(name, ('NOT_RUN', 0))
+            logger.info(f"  {name:<14} {status:<10} {duration_ms:>8} ms")
+        logger.info(f"  {'TOTAL':<14} {'':<10} {total_ms:>8} ms")
+
+# ============================================================================
+# EXECUTION
+# ============================================================================
+
+def main():
+    """Script principal"""
+    parser = argparse.ArgumentParser(description="Pipeline ETL ports (étapes sautées si à jour)")
+    parser.add_argument('--force', nargs='*', default=[], metavar='STAGE',
+                        help="Étapes à relancer même si à jour ('all' pour tout)")
+    parser.add_argument('--dry-run', action='store_true', help="Affiche le plan sans exécuter")
+    parser.add_argument('--max-workers', type=int, default=2, help="Étapes en parallèle")
+    args = parser.parse_args()
+
+    runner = PipelineRunner(STAGES, force=args.force, dry_run=args.dry_run, max_workers=args.max_workers)
+    success = runner.run()
+    return 0 if success else 1
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,229 @@
+"""
+Comblement des trous (interpolation vectorisée)
+Remplace les estimations codées à la main (Tema 2023, Abidjan 2022...) par un
+calcul uniforme sur tous les ports, une grille NumPy par granularité:
+
+  annual    : t = année
+  quarterly : t = année × 4 + trimestre - 1
+  monthly   : t = année × 12 + mois - 1
+
+Une période manquante entre deux observations (trou intérieur, au plus
+max_gap périodes) devient une ligne ESTIMATED, sauf si des lignes plus fines
+la couvrent déjà (année avec trimestres / mois observés, trimestre avec mois):
+annual_rollup retiendrait sinon l'estimation grossière au lieu des mesures.
+  linear   : interpolation linéaire entre voisins observés
+  seasonal : idem sur la série désaisonnalisée (indice saisonnier par port)
+  auto     : linear en annuel, seasonal en infra-annuel
+
+Provenance: data_source "Interpolation <méthode> (auto)", notes avec les
+périodes encadrantes par indicateur, colonne estimation_method.
+"""
+
+import json
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from src.quality.rules import RULES_FILE
+
+GRAINS = {'annual': 1, 'quarterly': 4, 'monthly': 12}
+METHODS = ('linear', 'seasonal', 'auto')
+METHOD_LABELS = {'linear': 'linéaire', 'seasonal': 'saisonnière'}
+
+
+def record_grain(df):
+    """Granularité de chaque ligne (mois > trimestre > année); colonne month facultative"""
+    has_month = df['month'].notna() if 'month' in df.columns else False
+    return pd.Series(
+        np.where(has_month, 'monthly', np.where(df['quarter'].notna(), 'quarterly', 'annual')),
+        index=df.index
+    )
+
+
+def _neighbours(valid):
+    """Indices du dernier / prochain point observé pour chaque cellule (-1 / T si aucun)"""
+    width = valid.shape[1]
+    positions = np.arange(width)
+    previous = np.maximum.accumulate(np.where(valid, positions, -1), axis=1)
+    following = np.minimum.accumulate(np.where(valid, positions, width)[:, ::-1], axis=1)[:, ::-1]
+    return previous, following
+
+
+def interpolate_linear(values, max_gap):
+    """Interpolation linéaire ligne à ligne (ports × temps), trous intérieurs seulement"""
+    valid = ~np.isnan(values)
+    previous, following = _neighbours(valid)
+    width = values.shape[1]
+    fillable = ~valid & (previous >= 0) & (following < width) & (following - previous - 1 <= max_gap)
+
+    left = np.take_along_axis(values, np.clip(previous, 0, width - 1), axis=1)
+    right = np.take_along_axis(values, np.clip(following, 0, width - 1), axis=1)
+    span = np.where(fillable, following - previous, 1)
+    weight = (np.arange(width) - previous) / span
+    filled = np.where(fillable, left + (right - left) * weight, np.nan)
+    return filled, previous, following
+
+
+def interpolate_seasonal(values, max_gap, periods, phase):
+    """Linéaire sur la série désaisonnalisée, indice saisonnier par port (moyenne 1)"""
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)  # ports / phases sans observation
+        ratio = values / np.nanmean(values, axis=1, keepdims=True)
+        index = np.ones((values.shape[0], periods))
+        for k in range(periods):
+            columns = phase == k
+            if columns.any():
+                index[:, k] = np.nanmean(ratio[:, columns], axis=1)
+        index = np.where(np.isfinite(index) & (index > 0), index, 1.0)
+        index = index / index.mean(axis=1, keepdims=True)
+        seasonal = index[:, phase]
+        filled, previous, following = interpolate_linear(values / seasonal, max_gap)
+    return filled * seasonal, previous, following
+
+
+class GapFiller:
+    """Crée les lignes ESTIMATED des périodes manquantes, tous ports en une fois"""
+
+    def __init__(self, columns, method='auto', max_gap=None):
+        if method not in METHODS:
+            raise ValueError(f"Méthode inconnue: {method} (attendu: {', '.join(METHODS)})")
+        self.columns = columns
+        self.method = method
+        self.max_gap = dict({'annual': 3, 'quarterly': 4, 'monthly': 6}, **(max_gap or {}))
+
+    @classmethod
+    def from_file(cls, rules_file=RULES_FILE):
+        with open(rules_file, 'r', encoding='utf-8') as f:
+            spec = json.load(f)['gap_filling']
+        return cls(spec['columns'], spec.get('method', 'auto'), spec.get('max_gap'))
+
+    def method_for(self, grain):
+        if self.method == 'auto':
+            return 'linear' if grain == 'annual' else 'seasonal'
+        return 'linear' if grain == 'annual' else self.method
+
+    @staticmethod
+    def _period_labels(year, sub_period, grain):
+        year = year.astype(int).astype(str)
+        if grain == 'annual':
+            return year
+        if grain == 'quarterly':
+            return year + 'Q' + sub_period.astype(int).astype(str)
+        return year + '-' + sub_period.astype(int).astype(str).str.zfill(2)
+
+    @staticmethod
+    def _periods(df, grain):
+        """Indice temporel t de chaque ligne exprimé dans la granularité grain"""
+        periods = GRAINS[grain]
+        if grain == 'annual':
+            sub_period = pd.Series(1, index=df.index)
+        elif grain == 'quarterly':
+            # Lignes mensuelles: trimestre déduit du mois s'il n'est pas renseigné
+            sub_period = df['quarter']
+            if 'month' in df.columns:
+                sub_period = sub_period.fillna((df['month'] - 1) // 3 + 1)
+        else:
+            sub_period = df['month']
+        return df['year'].astype(int).to_numpy() * periods + sub_period.astype(int).to_numpy() - 1
+
+    def _fill_grain(self, df, grain, finer=None):
+        """finer: lignes de granularité plus fine (leurs périodes ne sont pas interpolées)"""
+        periods = GRAINS[grain]
+        t = self._periods(df, grain)
+
+        port_index, ports = pd.factorize(df['port_code'])
+        start = t.min()
+        width = t.max() - start + 1
+        cells = (port_index, t - start)
+        phase = (np.arange(width) + start) % periods
+
+        observed = np.zeros((len(ports), width), dtype=bool)
+        observed[cells] = True
+
+        # Périodes déjà couvertes par des lignes plus fines du même port
+        covered = np.zeros((len(ports), width), dtype=bool)
+        if finer is not None and len(finer):
+            finer_port = ports.get_indexer(finer['port_code'])
+            finer_t = self._periods(finer, grain) - start
+            inside = (finer_port >= 0) & (finer_t >= 0) & (finer_t < width)
+            covered[finer_port[inside], finer_t[inside]] = True
+
+        method = self.method_for(grain)
+        filled = {}
+        for column in self.columns:
+            values = np.full((len(ports), width), np.nan)
+            values[cells] = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+            if method == 'seasonal':
+                estimate, previous, following = interpolate_seasonal(values, self.max_gap[grain], periods, phase)
+            else:
+                estimate, previous, following = interpolate_linear(values, self.max_gap[grain])
+            estimate[observed] = np.nan  # seules les périodes absentes deviennent des lignes
+            filled[column] = (estimate, previous, following)
+
+        any_filled = np.zeros((len(ports), width), dtype=bool)
+        for estimate, _, _ in filled.values():
+            estimate[covered] = np.nan
+            any_filled |= ~np.isnan(estimate)
+        rows, cols = np.nonzero(any_filled)
+        if len(rows) == 0:
+            return None
+
+        abs_t = cols + start
+        new = pd.DataFrame({
+            'port_code': ports[rows],
+            'year': abs_t // periods,
+            'quarter': np.nan,
+            'month': np.nan,
+        })
+        if grain == 'quarterly':
+            new['quarter'] = abs_t % periods + 1
+        elif grain == 'monthly':
+            new['month'] = abs_t % periods + 1
+            new['quarter'] = (abs_t % periods) // 3 + 1
+
+        notes = pd.Series('', index=new.index)
+        for column, (estimate, previous, following) in filled.items():
+            value = estimate[rows, cols]
+            new[column] = np.round(value)
+            has_value = ~np.isnan(value)
+            if not has_value.any():
+                continue
+            left_t = previous[rows, cols] + start
+            right_t = following[rows, cols] + start
+            left = self._period_labels(pd.Series(left_t // periods), pd.Series(left_t % periods + 1), grain)
+            right = self._period_labels(pd.Series(right_t // periods), pd.Series(right_t % periods + 1), grain)
+            provenance = column + ' ' + left + '→' + right
+            notes = notes.where(~has_value, np.where(notes == '', provenance, notes + ', ' + provenance))
+
+        label = METHOD_LABELS[method]
+        new['notes'] = f"Interpolation {label} automatique ({grain}): " + notes
+        new['data_source'] = f"Interpolation {label} (auto)"
+        new['estimation_method'] = method
+        return new
+
+    def fill(self, df):
+        """Retourne (df complété, lignes créées); df doit être dédoublonné par clé"""
+        grains = record_grain(df)
+        order = grains.map({grain: level for level, grain in enumerate(GRAINS)})
+        created = [self._fill_grain(df[grains == grain], grain, finer=df[order > level])
+                   for level, grain in enumerate(GRAINS) if (grains == grain).any()]
+        created = [part for part in created if part is not None]
+        if not created:
+            # Même schéma que lorsqu'il y a des trous (colonne estimation_method)
+            df = df.assign(estimation_method=df.get('estimation_method'))
+            return df, df.iloc[0:0]
+
+        new = pd.concat(created, ignore_index=True)
+        port_info = df.drop_duplicates('port_code').set_index('port_code')
+        new['port_name'] = new['port_code'].map(port_info['port_name'])
+        new['country'] = new['port_code'].map(port_info['country'])
+        new['source_url'] = 'N/A'
+        latest = df[['port_code', 'extraction_date']].sort_values('extraction_date').drop_duplicates('port_code', keep='last')
+        new['extraction_date'] = new['port_code'].map(latest.set_index('port_code')['extraction_date'])
+        new['data_quality_flag'] = 'ESTIMATED'
+        new = new.reindex(columns=df.columns.union(new.columns, sort=False))
+
+        completed = pd.concat([df.assign(estimation_method=df.get('estimation_method')), new],
+                              ignore_index=True)
+        return completed, new
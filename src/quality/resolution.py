@@ -0,0 +1,71 @@
+"""
+Résolution des doublons / conflits entre sources
+Une seule ligne gagnante par clé (port, année, trimestre, mois), choisie par
+un tri unique sur tout le DataFrame:
+
+  1. sévérité du flag qualité (VERIFIED avant ESTIMATED/PARTIAL, cf. dim_quality_flag)
+  2. priorité de la source (section "resolution" de rules.json, motifs regex
+     testés sur data_source + source_url; non reconnue = dernière)
+  3. nombre d'indicateurs renseignés (tonnage, TEU, navires)
+  4. extraction la plus récente
+
+Le loader n'écrit ainsi chaque clé qu'une fois (plus d'UPSERT successifs
+"dernier arrivé gagne" sur la même ligne).
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.quality.rules import RULES_FILE
+
+INDICATOR_COLUMNS = ['tonnage_mt', 'teus', 'num_vessels']
+
+
+class ConflictResolver:
+    """Déduplication par tri: priorité décroissante puis première ligne par clé"""
+
+    def __init__(self, keys, source_priority, flag_severity):
+        self.keys = keys
+        self.source_priority = source_priority
+        self.flag_severity = flag_severity
+
+    @classmethod
+    def from_file(cls, rules_file=RULES_FILE):
+        with open(rules_file, 'r', encoding='utf-8') as f:
+            spec = json.load(f)
+        resolution = spec['resolution']
+        return cls(resolution['keys'], resolution['source_priority'], spec['flags'])
+
+    def source_rank(self, df):
+        """Rang de priorité par ligne; motifs évalués sur les sources distinctes seulement"""
+        text = df['data_source'].fillna('').astype(str) + ' ' + df['source_url'].fillna('').astype(str)
+        codes, uniques = pd.factorize(text)
+        uniques = pd.Series(uniques)
+        ranks = np.full(len(uniques), len(self.source_priority), dtype=np.int16)
+        for rank, entry in reversed(list(enumerate(self.source_priority))):
+            matches = uniques.str.contains(entry['pattern'], case=False, regex=True).to_numpy()
+            ranks[matches] = rank
+        return ranks[codes]
+
+    def resolve(self, df):
+        """Retourne (gagnants dans l'ordre d'origine, perdants écartés)"""
+        keys = [key for key in self.keys if key in df.columns]
+        ranking = pd.DataFrame({
+            '_severity': df['data_quality_flag'].map(self.flag_severity).fillna(len(self.flag_severity)).to_numpy(),
+            '_source_rank': self.source_rank(df),
+            '_indicators': df[[c for c in INDICATOR_COLUMNS if c in df.columns]].notna().sum(axis=1).to_numpy(),
+            '_extracted': pd.to_datetime(df['extraction_date'], errors='coerce').to_numpy(),
+            '_position': np.arange(len(df)),
+        })
+        ranked = pd.concat([df[keys].reset_index(drop=True), ranking], axis=1).sort_values(
+            keys + ['_severity', '_source_rank', '_indicators', '_extracted'],
+            ascending=[True] * len(keys) + [True, True, False, False],
+            kind='stable', na_position='last'
+        )
+        winners = ~ranked.duplicated(subset=keys, keep='first').to_numpy()
+        keep = np.zeros(len(df), dtype=bool)
+        keep[ranked['_position'].to_numpy()[winners]] = True
+        return df[keep], df[~keep]
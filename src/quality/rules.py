@@ -0,0 +1,217 @@
+"""
+Moteur de règles qualité déclaratif et vectorisé
+Règles décrites dans rules.json, évaluées en une passe sur un DataFrame
+(ou une table Arrow) du format all_ports_raw.csv / ports_clean.csv.
+
+Types de règles:
+  range         : valeur hors [min, max]
+  yoy_jump      : variation annuelle > max_pct % (même port / même période)
+  not_null_any  : aucune des colonnes renseignée
+  coverage      : part de valeurs renseignées < min_ratio par groupe
+  duplicate_key : clé (port, année, trimestre, mois) présente plusieurs fois
+
+Sortie: table compacte des violations (une ligne par ligne fautive et par
+règle) + flag qualité recalculé: une violation portant un `flag` de
+sévérité supérieure au flag courant le remplace (mêmes sévérités que
+dim_quality_flag).
+
+Ajouter un type de règle = une fonction décorée par @register_rule('nom')
+qui retourne (masque des lignes en violation, valeur observée).
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+RULES_FILE = Path(__file__).resolve().parent / 'rules.json'
+
+VIOLATION_COLUMNS = ['rule_id', 'rule_type', 'severity', 'flag', 'row',
+                     'port_code', 'year', 'quarter', 'column', 'value']
+
+# ============================================================================
+# REGISTRE DES TYPES DE RÈGLES
+# ============================================================================
+
+RULE_TYPES: Dict[str, Callable] = {}
+
+
+def register_rule(name):
+    """Décorateur: rend un type de règle utilisable depuis rules.json"""
+    def decorator(func):
+        RULE_TYPES[name] = func
+        return func
+    return decorator
+
+
+def _numeric(df, column):
+    return pd.to_numeric(df[column], errors='coerce')
+
+
+@register_rule('range')
+def check_range(df, rule):
+    values = _numeric(df, rule['column'])
+    mask = pd.Series(False, index=df.index)
+    if rule.get('min') is not None:
+        mask |= values < rule['min']
+    if rule.get('max') is not None:
+        mask |= values > rule['max']
+    return mask, values
+
+
+@register_rule('yoy_jump')
+def check_yoy_jump(df, rule):
+    """
+    Compare chaque ligne à la même période de l'année précédente.
+    Tri unique sur (clés, année) puis décalage d'une ligne: pas de groupby.
+    """
+    column = rule['column']
+    keys = [key for key in rule.get('keys', ['port_code']) if key in df.columns]
+    ordered = df[keys + ['year']].copy()
+    ordered[column] = _numeric(df, column)
+    for key in keys:
+        # NaN (trimestre/mois absents en annuel) comparables entre eux
+        ordered[key] = ordered[key].fillna(-1) if ordered[key].dtype.kind in 'fi' else ordered[key].fillna('')
+    ordered = ordered.sort_values(keys + ['year'], kind='stable')
+
+    previous = ordered.shift(1)
+    same_series = (ordered[keys] == previous[keys]).all(axis=1)
+    consecutive = same_series & (ordered['year'] - previous['year'] == 1)
+
+    base = previous[column].where(consecutive & (previous[column] > 0))
+    change_pct = ((ordered[column] - base).abs() / base * 100).reindex(df.index)
+    return change_pct > rule['max_pct'], change_pct
+
+
+@register_rule('not_null_any')
+def check_not_null_any(df, rule):
+    present = df[rule['columns']].notna().any(axis=1)
+    return ~present, pd.Series(np.nan, index=df.index)
+
+
+@register_rule('coverage')
+def check_coverage(df, rule):
+    """Toutes les lignes d'un groupe sous le seuil sont signalées (valeur = taux)"""
+    group_by = rule.get('group_by', ['port_code'])
+    ratio = df[rule['column']].notna().groupby([df[key] for key in group_by]).transform('mean')
+    return ratio < rule['min_ratio'], ratio
+
+
+@register_rule('duplicate_key')
+def check_duplicate_key(df, rule):
+    columns = [column for column in rule['columns'] if column in df.columns]
+    mask = df.duplicated(subset=columns, keep=False)
+    counts = df.groupby(columns, dropna=False)[columns[0]].transform('size') if mask.any() else None
+    return mask, counts if counts is not None else pd.Series(np.nan, index=df.index)
+
+# ============================================================================
+# MOTEUR
+# ============================================================================
+
+class QualityRuleEngine:
+    """Évalue un jeu de règles déclaratives et recalcule les flags qualité"""
+
+    def __init__(self, rules, flag_severity):
+        unknown = {rule['type'] for rule in rules} - set(RULE_TYPES)
+        if unknown:
+            raise ValueError(f"Type(s) de règle inconnu(s): {', '.join(sorted(unknown))}")
+        self.rules = rules
+        self.flag_severity = flag_severity
+
+    @classmethod
+    def from_file(cls, rules_file=RULES_FILE):
+        with open(rules_file, 'r', encoding='utf-8') as f:
+            spec = json.load(f)
+        return cls(spec['rules'], spec['flags'])
+
+    @staticmethod
+    def _as_frame(data):
+        """Accepte un DataFrame pandas ou une table Arrow (pyarrow.Table)"""
+        return data.to_pandas() if hasattr(data, 'to_pandas') else data
+
+    def evaluate(self, data):
+        """Table des violations (colonnes VIOLATION_COLUMNS), index = ligne source"""
+        df = self._as_frame(data)
+        positions = np.arange(len(df))
+        parts = []
+
+        for rule in self.rules:
+            column = rule.get('column')
+            if column is not None and column not in df.columns:
+                logger.warning(f"⚠ Règle {rule['id']}: colonne absente ({column})")
+                continue
+
+            mask, values = RULE_TYPES[rule['type']](df, rule)
+            mask = mask.fillna(False).to_numpy(dtype=bool)
+            if not mask.any():
+                continue
+
+            hits = df.loc[mask, ['port_code', 'year', 'quarter']].copy()
+            hits.insert(0, 'row', positions[mask])
+            hits['value'] = pd.to_numeric(values[mask], errors='coerce').to_numpy()
+            hits['rule_id'] = rule['id']
+            hits['rule_type'] = rule['type']
+            hits['severity'] = rule.get('severity', 1)
+            hits['flag'] = rule.get('flag')
+            hits['column'] = column or ','.join(rule.get('columns', []))
+            parts.append(hits)
+
+        if not parts:
+            return pd.DataFrame(columns=VIOLATION_COLUMNS)
+
+        violations = pd.concat(parts, ignore_index=True)[VIOLATION_COLUMNS]
+        for column in ('rule_id', 'rule_type', 'flag', 'column'):
+            violations[column] = violations[column].astype('category')
+        violations['severity'] = violations['severity'].astype('int8')
+        return violations
+
+    def assign_flags(self, data, violations, flag_column='data_quality_flag'):
+        """
+        Flag qualité par ligne: le flag de violation le plus sévère remplace le
+        flag source s'il est strictement plus sévère (ESTIMATED reste ESTIMATED
+        face à PARTIAL, VERIFIED devient PARTIAL/SUSPECT).
+        """
+        df = self._as_frame(data)
+        flags = df[flag_column].to_numpy(dtype=object).copy()
+        flagged = violations.dropna(subset=['flag'])
+        if flagged.empty:
+            return pd.Series(flags, index=df.index, name=flag_column)
+
+        severity = flagged['flag'].astype(str).map(self.flag_severity).fillna(0).to_numpy()
+        order = np.lexsort((-severity, flagged['row'].to_numpy()))
+        rows = flagged['row'].to_numpy()[order]
+        first = np.r_[True, rows[1:] != rows[:-1]]
+        rows = rows[first]
+        candidate = flagged['flag'].astype(str).to_numpy()[order][first]
+        candidate_severity = severity[order][first]
+
+        current_severity = pd.Series(flags[rows]).map(self.flag_severity).fillna(0).to_numpy()
+        upgrade = candidate_severity > current_severity
+        flags[rows[upgrade]] = candidate[upgrade]
+        return pd.Series(flags, index=df.index, name=flag_column)
+
+    @staticmethod
+    def summarize(violations):
+        """Compte par règle (rapport de nettoyage / logs)"""
+        if violations.empty:
+            return {}
+        counts = violations.groupby('rule_id', observed=True).size()
+        return {rule_id: int(count) for rule_id, count in counts.items()}
+
+    @staticmethod
+    def rules_per_row(violations, num_rows):
+        """Liste 'règle1; règle2' par ligne (vide si aucune violation)"""
+        labels = np.full(num_rows, '', dtype=object)
+        if violations.empty:
+            return labels
+        # Une concaténation vectorisée par règle (ordre d'évaluation), pas par ligne
+        for rule_id, rows in violations.groupby('rule_id', observed=True, sort=False)['row']:
+            rows = rows.to_numpy()
+            prefix = labels[rows]
+            labels[rows] = np.where(prefix == '', rule_id, prefix + '; ' + str(rule_id))
+        return labels
@@ -0,0 +1,153 @@
+"""
+Fixtures communes: base PostgreSQL simulée pour le loader (sans serveur)
+
+FakeConnection / FakeCursor répondent aux requêtes de
+src/loading/load_postgres.py à partir de tables en mémoire (dim_port,
+dim_quality_flag, fact_port_traffic, agg_port_annual_rollup,
+agg_port_forecast): le chemin complet PostgreSQLDataLoader.run() s'exécute
+sans base réelle.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+QUALITY_FLAGS = {'VERIFIED': 1, 'ESTIMATED': 2, 'PARTIAL': 3, 'SUSPECT': 4}
+
+
+def pytest_sessionstart(session):
+    """Les scripts ETL ouvrent leurs logs / dossiers data/ relatifs au cwd à l'import"""
+    os.chdir(tempfile.mkdtemp(prefix='ports_tests_'))
+
+
+class FakeCursor:
+    """Curseur psycopg2 minimal: dispatch sur le texte de la requête"""
+
+    def __init__(self, db):
+        self.db = db
+        self.description = None
+        self._rows = []
+        self.executed = []
+
+    def execute(self, query, params=None):
+        query = str(query)
+        self.executed.append(query)
+        self.description = None
+        self._rows = []
+        db = self.db
+
+        if 'information_schema.tables' in query:
+            self._rows = [(True,)]
+        elif 'FROM dim_port WHERE port_code' in query:
+            port_id = db.ports.get(params[0])
+            self._rows = [(port_id,)] if port_id is not None else []
+        elif 'FROM dim_quality_flag WHERE flag_name' in query:
+            flag_id = QUALITY_FLAGS.get(params[0])
+            self._rows = [(flag_id,)] if flag_id is not None else []
+        elif 'INSERT INTO fact_port_traffic' in query:
+            port_id, flag_id, year, quarter, month = params[:5]
+            db.facts[(port_id, year, quarter, month)] = params
+        elif 'GROUPING SETS' in query:
+            keys = {(row[0], row[2]) for row in db.facts.values()}
+            self._rows = [(None, None, 1, 1, len(db.facts), len(keys))]
+        elif 'data_quality_flag' in query and 'FROM fact_port_traffic' in query:
+            flags = {flag_id: name for name, flag_id in QUALITY_FLAGS.items()}
+            self._set_result(
+                ['port_id', 'year', 'quarter', 'month', 'tonnage_mt', 'teus', 'num_vessels', 'data_quality_flag'],
+                [(row[0], row[2], row[3], row[4], row[5], row[8], row[9], flags.get(row[1]))
+                 for row in db.facts.values()]
+            )
+        elif 'stored_years' in query:
+            latest = max((year for _, year in db.rollups), default=None)
+            stored = sorted({row[2] for row in db.forecasts}) or None
+            self._rows = [(latest, stored)]
+        elif 'FROM agg_port_annual_rollup' in query:
+            from src.analytics.rollups import ROLLUP_COLUMNS
+            columns = ['port_id', 'year', 'completeness_ratio', 'tonnage_mt_annualized',
+                       'teus_annualized', 'num_records', 'estimated_records']
+            latest = max(year for _, year in db.rollups)
+            port_ids = params.get('port_ids') if 'ANY' in query else None
+            self._set_result(
+                columns + ['latest_year'],
+                [tuple(dict(zip(ROLLUP_COLUMNS, row))[c] for c in columns) + (latest,)
+                 for (port_id, _), row in db.rollups.items() if port_ids is None or port_id in port_ids]
+            )
+        elif 'DELETE FROM agg_port_forecast' in query:
+            port_ids = params[0] if params else None
+            db.forecasts[:] = [row for row in db.forecasts if port_ids is not None and row[0] not in port_ids]
+
+    def execute_values(self, query, rows):
+        """Remplace psycopg2.extras.execute_values (cf. fixture fake_db)"""
+        self.executed.append(query)
+        if 'agg_port_annual_rollup' in query:
+            self.db.rollups.update({(row[0], row[1]): row for row in rows})
+        elif 'agg_port_forecast' in query:
+            self.db.forecasts.extend(rows)
+
+    def _set_result(self, columns, rows):
+        self.description = [(column,) for column in columns]
+        self._rows = rows
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Connexion psycopg2 minimale: tables en mémoire + compteurs commit/rollback"""
+
+    def __init__(self, ports):
+        self.ports = {code: port_id for port_id, code in enumerate(ports, start=1)}
+        self.facts = {}
+        self.rollups = {}
+        self.forecasts = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+        self.last_cursor = None
+
+    def cursor(self):
+        self.last_cursor = FakeCursor(self)
+        return self.last_cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """
+    Fabrique de FakeConnection: psycopg2.connect du loader la renvoie.
+    Usage: conn = fake_db(['PAC', 'TEMA'])
+    """
+    import psycopg2.extensions
+    from src.loading import load_postgres
+
+    # sql.Identifier.as_string exige une vraie connexion libpq
+    monkeypatch.setattr(psycopg2.extensions, 'quote_ident', lambda name, context: f'"{name}"')
+    monkeypatch.setattr(load_postgres, 'execute_values',
+                        lambda cursor, query, rows, page_size=100: cursor.execute_values(str(query), rows))
+
+    def factory(ports):
+        conn = FakeConnection(ports)
+        monkeypatch.setattr(load_postgres.psycopg2, 'connect', lambda **config: conn)
+        return conn
+
+    return factory
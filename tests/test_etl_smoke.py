@@ -0,0 +1,42 @@
+"""
+Smoke test du chemin des benchmarks (bench_etl.py, loadtest_api.py):
+données synthétiques → DatasetCleaner.run → PostgreSQLDataLoader.run,
+PostgreSQL remplacé par la base simulée de conftest.fake_db.
+"""
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_data import generate_traffic, synthetic_ports
+from src.analytics.rollups import ROLLUP_COLUMNS
+from src.extraction.clean_dataset_phase1 import DatasetCleaner
+from src.loading.load_postgres import PostgreSQLDataLoader
+
+
+@pytest.mark.parametrize('granularity', ['annual', 'quarterly', 'monthly'])
+def test_synthetic_clean_and_load(tmp_path, fake_db, granularity):
+    df = generate_traffic(num_ports=3, first_year=2019, last_year=2023, granularity=granularity,
+                          missing_rate=0.1, seed=7)
+    df.to_csv(tmp_path / 'all_ports_raw.csv', index=False)
+
+    cleaner = DatasetCleaner(tmp_path / 'all_ports_raw.csv', tmp_path / 'ports_clean.csv',
+                             tmp_path / 'cleaning_report.json')
+    assert cleaner.run()
+
+    conn = fake_db([code for code, _, _ in synthetic_ports(df)])
+    loader = PostgreSQLDataLoader({}, tmp_path / 'ports_clean.csv')
+    assert loader.run()
+
+    assert loader.touched_keys == {(port_id, year) for port_id in (1, 2, 3) for year in range(2019, 2024)}
+    assert len(conn.rollups) == 15
+
+    # Une ligne de fait par ligne nettoyée (aucune fusion mois -> trimestre)
+    clean = pd.read_csv(tmp_path / 'ports_clean.csv')
+    assert len(conn.facts) == len(clean)
+    tonnage = sum(row[5] for row in conn.facts.values() if row[5] is not None)
+    assert tonnage == pytest.approx(clean['tonnage_mt'].sum())
+    rollups = [dict(zip(ROLLUP_COLUMNS, row)) for row in conn.rollups.values()]
+    assert {r['source_grain'] for r in rollups} == {granularity}
+    assert sum(r['tonnage_mt'] or 0 for r in rollups) == pytest.approx(tonnage)
+    assert {row[2] for row in conn.forecasts} == {2024}  # année suivant la dernière connue
+    assert conn.closed
@@ -0,0 +1,53 @@
+"""
+GapFiller.fill: pas d'estimation grossière sur une période déjà couverte
+par des lignes plus fines (cf. annual_rollup)
+"""
+
+import pandas as pd
+
+from src.analytics.rollups import annual_rollup
+from src.quality.gap_filling import GapFiller
+
+
+def traffic(rows):
+    """rows: (year, quarter, month, tonnage_mt), port PAC, VERIFIED"""
+    df = pd.DataFrame(rows, columns=['year', 'quarter', 'month', 'tonnage_mt'])
+    return df.assign(port_code='PAC', port_name='Port Autonome de Cotonou', country='Benin',
+                     teus=None, num_vessels=None, data_source='Rapport', source_url='N/A',
+                     extraction_date='2025-01-15', data_quality_flag='VERIFIED', notes=None)
+
+
+def filler():
+    return GapFiller(['tonnage_mt', 'teus', 'num_vessels'])
+
+
+def test_annual_gap_covered_by_quarters_is_not_estimated():
+    df = traffic([(2020, None, None, 100.0), (2022, None, None, 140.0)]
+                 + [(2021, quarter, None, 50.0) for quarter in range(1, 5)])
+
+    completed, created = filler().fill(df)
+
+    assert created.empty
+    rollup = annual_rollup(completed.assign(port_id=1)).set_index('year')
+    assert rollup.loc[2021, 'tonnage_mt'] == 200
+    assert rollup.loc[2021, 'discarded_rows'] == 0
+    assert rollup.loc[2021, 'estimated_records'] == 0
+
+
+def test_quarterly_gap_covered_by_months_is_not_estimated():
+    df = traffic([(2021, 1, None, 30.0), (2021, 3, None, 50.0)]
+                 + [(2021, 2, month, 10.0) for month in (4, 5, 6)])
+
+    _, created = filler().fill(df)
+
+    assert created.empty
+
+
+def test_uncovered_annual_gap_is_still_interpolated():
+    df = traffic([(2020, None, None, 100.0), (2022, None, None, 140.0), (2021, 1, None, 50.0)])
+    df.loc[df['quarter'].notna(), 'port_code'] = 'TEMA'
+
+    _, created = filler().fill(df)
+
+    assert created[['port_code', 'year', 'tonnage_mt']].values.tolist() == [['PAC', 2021, 120.0]]
+    assert created['data_quality_flag'].eq('ESTIMATED').all()
@@ -0,0 +1,42 @@
+"""
+compute_insights: totaux à 0 (coalesce de stg_port_annual_rollup) = non renseignés
+"""
+
+import math
+
+import pandas as pd
+
+from src.analytics.insights import cards, compute_insights, digest
+
+
+def annual():
+    """LOME sans conteneurs en 2023 (0 après coalesce), 2.00M TEU en 2024"""
+    return pd.DataFrame({
+        'port_code': ['LOME', 'LOME', 'TEMA', 'TEMA'],
+        'year': [2023, 2024, 2023, 2024],
+        'total_tonnage_mt': [30_000_000, 31_000_000, 0, 0],
+        'total_teus': [0, 2_000_000, 1_000_000, 1_100_000],
+    })
+
+
+def test_zero_totals_are_not_observations():
+    insights = compute_insights(annual())
+
+    yoy = [m['yoy_pct'] for m in insights['movers']] + [a['yoy_pct'] for a in insights['anomalies']]
+    assert all(math.isfinite(value) for value in yoy)
+    assert [(m['port_code'], m['metric']) for m in insights['movers']] == [
+        ('LOME', 'total_tonnage_mt'), ('TEMA', 'total_teus')
+    ]
+    assert not any(a['port_code'] == 'LOME' and a['label'] == 'conteneurs' for a in insights['anomalies'])
+
+    # TEMA sans tonnage: LOME seul renseigné, 100% de part
+    tonnage = next(l for l in insights['leaders'] if l['metric'] == 'total_tonnage_mt')
+    assert (tonnage['port_code'], tonnage['share_pct']) == ('LOME', 100.0)
+    assert {'port_code': 'TEMA', 'year': 2024, 'issue': 'tonnage non renseigné'} not in insights['coverage_gaps']
+
+
+def test_texts_have_no_infinite_variation():
+    insights = compute_insights(annual())
+
+    text = digest(insights) + "\n".join(cards(insights, limit=10))
+    assert 'inf' not in text
@@ -0,0 +1,97 @@
+"""
+PostgreSQLDataLoader.insert_data sur curseur simulé (cf. conftest.fake_db)
+"""
+
+import pandas as pd
+
+from src.analytics.rollups import ROLLUP_COLUMNS
+from src.loading.load_postgres import PostgreSQLDataLoader
+
+
+def clean_rows():
+    """Trois lignes au format ports_clean.csv, dont un port absent de dim_port"""
+    return pd.DataFrame({
+        'port_code': ['PAC', 'PAC', 'UNKNOWN'],
+        'year': [2023, 2024, 2024],
+        'quarter': [None, 1.0, None],
+        'tonnage_mt': [12_000_000.0, 3_100_000.0, 1.0],
+        'imports_mt': [None, None, None],
+        'exports_mt': [None, None, None],
+        'teus': [None, 120_000.0, None],
+        'num_vessels': [None, None, None],
+        'data_source': ['Rapport annuel', 'Bulletin trimestriel', 'Article'],
+        'source_url': ['https://example.org/a', None, None],
+        'extraction_date': ['2025-01-15'] * 3,
+        'data_quality_flag': ['VERIFIED', 'ESTIMATED', 'VERIFIED'],
+        'notes': [None, None, None],
+    })
+
+
+def test_touched_keys_initialised():
+    assert PostgreSQLDataLoader({}).touched_keys == set()
+
+
+def test_insert_data_records_touched_keys(fake_db):
+    conn = fake_db(['PAC', 'TEMA'])
+    loader = PostgreSQLDataLoader({})
+    assert loader.connect()
+
+    inserted, failed = loader.insert_data(clean_rows())
+
+    assert (inserted, failed) == (2, 1)
+    assert loader.touched_keys == {(1, 2023), (1, 2024)}
+    assert set(conn.facts) == {(1, 2023, None, None), (1, 2024, 1.0, None)}
+    assert conn.facts[(1, 2024, 1.0, None)][1] == 2  # flag ESTIMATED résolu
+    assert conn.commits == 1
+
+
+def test_validate_load_scoped_to_touched_keys(fake_db):
+    fake_db(['PAC'])
+    loader = PostgreSQLDataLoader({})
+    loader.connect()
+    loader.insert_data(clean_rows())
+
+    result = loader.validate_load('touched')
+
+    assert result['keys_expected'] == 2
+    assert result['keys_missing'] == 0
+    assert result['years'] == [2023, 2024]
+
+
+def test_monthly_rows_kept_per_month(fake_db):
+    conn = fake_db(['PAC'])
+    loader = PostgreSQLDataLoader({})
+    loader.connect()
+    rows = pd.concat([clean_rows().iloc[[0]]] * 3, ignore_index=True).assign(
+        year=2024, quarter=None, month=[1, 2, 4], tonnage_mt=[100.0, 200.0, 300.0]
+    )
+
+    assert loader.insert_data(rows) == (3, 0)
+    assert set(conn.facts) == {(1, 2024, 1.0, 1), (1, 2024, 1.0, 2), (1, 2024, 2.0, 4)}
+
+    assert loader.refresh_rollups('touched') == 1
+    rollup = dict(zip(ROLLUP_COLUMNS, conn.rollups[(1, 2024)]))
+    assert rollup['source_grain'] == 'monthly'
+    assert rollup['tonnage_mt'] == 600
+    assert rollup['periods_observed'] == 3
+
+
+def test_forecast_horizon_change_recomputes_every_port(fake_db):
+    conn = fake_db(['PAC', 'TEMA'])
+    rows = pd.concat([clean_rows().iloc[[0]]] * 6, ignore_index=True).assign(
+        port_code=['PAC'] * 3 + ['TEMA'] * 3, year=[2021, 2022, 2023] * 2
+    )
+    first = PostgreSQLDataLoader({})
+    first.connect()
+    first.insert_data(rows)
+    first.refresh_rollups('touched')
+    first.refresh_forecasts('touched')
+    assert {(row[0], row[2]) for row in conn.forecasts} == {(1, 2024), (2, 2024)}
+
+    # Seul PAC reçoit 2024: l'horizon passe à 2025 pour tous les ports
+    second = PostgreSQLDataLoader({})
+    second.connect()
+    second.insert_data(rows.iloc[[0]].assign(year=2024))
+    second.refresh_rollups('touched')
+    second.refresh_forecasts('touched')
+    assert {(row[0], row[2]) for row in conn.forecasts} == {(1, 2025), (2, 2025)}
@@ -0,0 +1,131 @@
+"""
+Garde-fou du SQL généré (dashboard/sql_guard.py): validation lexicale,
+vérification du plan EXPLAIN (VERBOSE) et rôle de connexion
+"""
+
+import pytest
+
+from dashboard.sql_guard import UnsafeQueryError, check_plan, check_readonly_role, validate_sql
+
+
+@pytest.mark.parametrize('query', [
+    "SELECT port_code, SUM(total_tonnage_mt) FROM public_marts.mart_port_annual_summary GROUP BY port_code",
+    'SELECT port_code AS "update", year AS comment FROM public_marts.mart_port_comparison',
+    "SELECT port_code, RANK() OVER (PARTITION BY year ORDER BY total_teus DESC) FROM public_marts.mart_port_comparison",
+    "SELECT ROUND(total_tonnage_mt::numeric(15, 2) / 1e6, 1) FROM public_marts.mart_port_annual_summary",
+    "WITH latest AS (SELECT MAX(year) AS year FROM public_marts.mart_port_trends) "
+    "SELECT t.* FROM public_marts.mart_port_trends t JOIN latest USING (year) WHERE t.port_code IN ('LOME')",
+    "SELECT COALESCE(NULLIF(total_teus, 0), -1), EXTRACT(YEAR FROM refreshed_at) FROM public_marts.mart_port_forecast",
+    "SELECT 'pg_sleep(4)' AS label FROM public_marts.mart_port_forecast",
+])
+def test_allowed_queries(query):
+    assert validate_sql(query + ';') == query
+
+
+@pytest.mark.parametrize('query', [
+    "SELECT \"pg_read_file\"('/etc/passwd')",
+    "SELECT pg_catalog.\"pg_sleep\"(4)",
+    "SELECT \"set_config\"('default_transaction_read_only', 'off', false)",
+    "SELECT lo_get(1)",
+    "SELECT current_setting('data_directory')",
+    "SELECT pg_ls_logdir()",
+    "SELECT port_code, pg_sleep (1) FROM public_marts.mart_port_comparison",
+    "SELECT public_marts.count(*) FROM public_marts.mart_port_comparison",
+    "SELECT \"select\"(1)",
+])
+def test_functions_outside_allow_list_rejected(query):
+    with pytest.raises(UnsafeQueryError, match='Fonction non autorisée'):
+        validate_sql(query)
+
+
+@pytest.mark.parametrize('query, message', [
+    ("WITH d AS (DELETE FROM public_marts.mart_port_trends RETURNING *) SELECT * FROM d", 'Mot-clé interdit'),
+    ("SELECT * INTO tmp FROM public_marts.mart_port_trends", 'Mot-clé interdit'),
+    ("SELECT * FROM public_marts.mart_port_trends FOR UPDATE", 'Verrouillage'),
+    ("SELECT * FROM public.fact_port_traffic", 'Table non autorisée'),
+    ("SELECT 1; SELECT 2", 'Une seule instruction'),
+    ("UPDATE public_marts.mart_port_trends SET year = 0", 'Seules les requêtes SELECT'),
+])
+def test_statements_rejected(query, message):
+    with pytest.raises(UnsafeQueryError, match=message):
+        validate_sql(query)
+
+
+def result_plan(*outputs, **node):
+    return dict({'Node Type': 'Result', 'Total Cost': 0.01, 'Output': list(outputs)}, **node)
+
+
+def test_plan_function_in_target_list_rejected():
+    # Appel dans la liste de sortie d'un nœud Result (pas de Function Scan)
+    with pytest.raises(UnsafeQueryError, match='pg_read_file'):
+        check_plan(result_plan("pg_read_file('/etc/passwd'::text)"))
+    with pytest.raises(UnsafeQueryError, match='pg_catalog.pg_sleep'):
+        check_plan(result_plan('1', Plans=[result_plan("pg_catalog.pg_sleep('4'::double precision)")]))
+
+
+def test_plan_function_in_filter_rejected():
+    plan = {
+        'Node Type': 'Seq Scan', 'Schema': 'public_marts', 'Relation Name': 'mart_port_trends',
+        'Total Cost': 10.0, 'Output': ['port_code'], 'Filter': "(current_setting('is_superuser'::text) = 'on'::text)",
+    }
+    with pytest.raises(UnsafeQueryError, match='current_setting'):
+        check_plan(plan)
+
+
+def test_plan_with_allowed_expressions_passes():
+    plan = {
+        'Node Type': 'Aggregate', 'Total Cost': 42.0,
+        'Output': ['mart_port_annual_summary.port_code', 'round((sum(total_tonnage_mt))::numeric(15,2), 1)'],
+        'Group Key': ['mart_port_annual_summary.port_code'],
+        'Plans': [{
+            'Node Type': 'Seq Scan', 'Schema': 'public_marts', 'Relation Name': 'mart_port_annual_summary',
+            'Total Cost': 40.0, 'Output': ['port_code', 'total_tonnage_mt'],
+            'Filter': "(\"left\"((port_code)::text, 1) = ANY ('{L,T}'::text[]))",
+        }],
+    }
+    assert check_plan(plan) == 42.0
+
+
+def test_plan_outside_schema_and_cost_rejected():
+    scan = {'Node Type': 'Seq Scan', 'Schema': 'public', 'Relation Name': 'fact_port_traffic', 'Total Cost': 1.0}
+    with pytest.raises(UnsafeQueryError, match='public.fact_port_traffic'):
+        check_plan(scan)
+    with pytest.raises(UnsafeQueryError, match='Fonctions génératrices'):
+        check_plan({'Node Type': 'Function Scan', 'Total Cost': 1.0})
+    with pytest.raises(UnsafeQueryError, match='Coût estimé'):
+        check_plan(result_plan('1', **{'Total Cost': 1e9}), max_cost=100)
+
+
+class RoleCursor:
+    def __init__(self, row):
+        self.row = row
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchone(self):
+        return self.row
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class RoleConnection:
+    def __init__(self, row):
+        self.row = row
+
+    def cursor(self):
+        return RoleCursor(self.row)
+
+
+@pytest.mark.parametrize('row', [('postgres', True, False), ('reader', False, True)])
+def test_privileged_role_rejected(row):
+    with pytest.raises(UnsafeQueryError, match='DB_READONLY_USER'):
+        check_readonly_role(RoleConnection(row))
+
+
+def test_dedicated_readonly_role_accepted():
+    assert check_readonly_role(RoleConnection(('dashboard_readonly', False, False))) == 'dashboard_readonly'